@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from database import get_db
@@ -76,6 +76,25 @@ def get_current_user(
         raise credentials_exception
     return user
 
+def get_stream_user(
+    token: str = Query(...),
+    db: Session = Depends(get_db)
+):
+    """Get the active user for an EventSource stream, which can only pass the token as ?token="""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials"
+    )
+    
+    token_data = verify_token(token, credentials_exception)
+    
+    user = db.query(User).filter(User.username == token_data.username).first()
+    if user is None:
+        raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
 def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Get the current active user"""
     if not current_user.is_active:
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Nutrition backfill script for FitLife360
+This script adds the typed nutrient columns to an existing products table
+and fills them from each product's nutritional_info JSON.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine, SessionLocal
+from models import Product
+from nutrition import NUTRIENT_COLUMNS, parse_nutritional_info
+
+BATCH_SIZE = 1000
+
+def add_missing_columns():
+    """Add nutrient columns and indexes that create_all can't add to an existing table"""
+    existing = {column["name"] for column in inspect(engine).get_columns("products")}
+
+    with engine.begin() as connection:
+        for column in NUTRIENT_COLUMNS.values():
+            if column in existing:
+                continue
+
+            print(f"📋 Adding products.{column}...")
+            connection.execute(text(f"ALTER TABLE products ADD COLUMN {column} FLOAT"))
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_products_{column} ON products ({column})"
+            ))
+
+def backfill_nutrition():
+    """Parse nutritional_info for every product in id-ordered batches"""
+    add_missing_columns()
+
+    db = SessionLocal()
+    last_id = 0
+    updated = 0
+
+    try:
+        while True:
+            rows = db.query(Product.id, Product.nutritional_info).filter(
+                Product.id > last_id
+            ).order_by(Product.id).limit(BATCH_SIZE).all()
+
+            if not rows:
+                break
+
+            db.bulk_update_mappings(Product, [
+                {"id": product_id, **parse_nutritional_info(nutritional_info)}
+                for product_id, nutritional_info in rows
+            ])
+            db.commit()
+
+            last_id = rows[-1].id
+            updated += len(rows)
+            print(f"   Parsed {updated} products...")
+    finally:
+        db.close()
+
+    print(f"✅ Nutrition backfill completed for {updated} products")
+
+if __name__ == "__main__":
+    backfill_nutrition()
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import os
+from typing import Callable, List, Tuple
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Set to false on workers that should only serve requests
+BACKGROUND_TASKS_ENABLED = os.getenv("BACKGROUND_TASKS_ENABLED", "true").lower() == "true"
+
+_running_tasks: List[asyncio.Task] = []
+
+def _run_with_session(func: Callable):
+    """Call func with a fresh session that is always closed afterwards"""
+    db = SessionLocal()
+    try:
+        return func(db)
+    finally:
+        db.close()
+
+async def _run_async_with_session(func: Callable):
+    db = SessionLocal()
+    try:
+        return await func(db)
+    finally:
+        db.close()
+
+async def _run_periodically(name: str, interval_seconds: float, func: Callable):
+    """Run func(db) forever, sleeping interval_seconds between runs
+
+    Synchronous jobs run in a worker thread so they never block the event loop.
+    """
+    while True:
+        try:
+            if asyncio.iscoroutinefunction(func):
+                await _run_async_with_session(func)
+            else:
+                await asyncio.to_thread(_run_with_session, func)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Background task {name} failed")
+
+        await asyncio.sleep(interval_seconds)
+
+def start_background_tasks(jobs: List[Tuple[str, float, Callable]]):
+    """Start (name, interval_seconds, func) jobs on the running event loop"""
+    if not BACKGROUND_TASKS_ENABLED:
+        logger.info("Background tasks disabled")
+        return
+
+    for name, interval_seconds, func in jobs:
+        _running_tasks.append(
+            asyncio.create_task(_run_periodically(name, interval_seconds, func), name=name)
+        )
+        logger.info(f"Started background task {name} every {interval_seconds}s")
+
+async def stop_background_tasks():
+    """Cancel the background jobs started on this event loop and wait for them to finish"""
+    loop = asyncio.get_running_loop()
+    tasks = [task for task in _running_tasks if task.get_loop() is loop]
+
+    for task in tasks:
+        task.cancel()
+        _running_tasks.remove(task)
+
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+End-to-end checkout benchmark against the fake payment gateway.
+Each virtual customer runs create order -> create payment -> pay (in the
+fake gateway, standing in for the checkout widget) -> verify signature ->
+confirm payment, and the script reports throughput and per-step latency.
+
+By default the fake gateway runs in-process. Pass a URL to drive a
+fake_gateway.py server over HTTP through the real Razorpay client instead;
+the server needs the same RAZORPAY_KEY_SECRET as this script. Point
+DATABASE_URL at a scratch database; it creates its own user and product.
+
+Usage: python benchmarks/bench_checkout.py [checkouts] [threads] [gateway_url]
+"""
+
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to Python path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+GATEWAY_URL = sys.argv[3] if len(sys.argv) > 3 else None
+if GATEWAY_URL:
+    os.environ["RAZORPAY_BASE_URL"] = GATEWAY_URL
+    os.environ["PAYMENT_GATEWAY"] = "razorpay"
+else:
+    os.environ["PAYMENT_GATEWAY"] = "fake"
+    os.environ.setdefault("FAKE_GATEWAY_LATENCY_MS", "80")
+    os.environ.setdefault("FAKE_GATEWAY_JITTER_MS", "20")
+
+import requests
+from fastapi.testclient import TestClient
+from main import app
+from database import SessionLocal
+from models import User, Product
+from auth import get_password_hash, create_access_token
+from routers.payments import payment_gateway, gateway_metrics
+
+STEPS = ["create_order", "create_payment", "pay", "verify", "confirm"]
+
+def create_fixtures(checkouts: int):
+    """Create a shopper and a product with enough stock for every checkout"""
+    db = SessionLocal()
+    try:
+        suffix = uuid.uuid4().hex[:8]
+        user = User(
+            username=f"bench_{suffix}",
+            email=f"bench_{suffix}@example.com",
+            hashed_password=get_password_hash("bench"),
+            first_name="Bench",
+            last_name="Checkout"
+        )
+        product = Product(
+            name=f"Bench Product {suffix}",
+            description="Checkout benchmark product",
+            category="test",
+            price=499.0,
+            stock_quantity=checkouts
+        )
+        db.add_all([user, product])
+        db.commit()
+        return user.username, product.id
+    finally:
+        db.close()
+
+def pay(gateway_order_id: str) -> dict:
+    """Pay for a gateway order the way the customer's browser would"""
+    if GATEWAY_URL:
+        response = requests.post(f"{GATEWAY_URL}/test/orders/{gateway_order_id}/pay", timeout=10)
+        response.raise_for_status()
+        return response.json()
+    return payment_gateway.fake.pay_order(gateway_order_id)
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))] * 1000
+
+def main():
+    checkouts = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    username, product_id = create_fixtures(checkouts)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+    order_payload = {
+        "items": [{"product_id": product_id, "quantity": 1}],
+        "shipping_address": "Bench Street",
+        "billing_address": "Bench Street",
+        "payment_method": "razorpay"
+    }
+
+    def checkout(client):
+        """Run one customer's checkout; returns (step timings, failed step or None)"""
+        timings = {}
+
+        def timed(step, call):
+            started = time.perf_counter()
+            result = call()
+            timings[step] = time.perf_counter() - started
+            return result
+
+        response = timed("create_order", lambda: client.post("/api/orders/", json=order_payload, headers=headers))
+        if response.status_code != 200:
+            return timings, "create_order"
+        order = response.json()
+
+        response = timed("create_payment", lambda: client.post(f"/api/orders/{order['id']}/create-payment", headers=headers))
+        if response.status_code != 200:
+            return timings, "create_payment"
+
+        paid = timed("pay", lambda: pay(response.json()["order_id"]))
+
+        response = timed("verify", lambda: client.post("/api/payments/verify", json={
+            "payment_id": paid["razorpay_payment_id"],
+            "order_id": paid["razorpay_order_id"],
+            "signature": paid["razorpay_signature"]
+        }, headers=headers))
+        if response.status_code != 200:
+            return timings, "verify"
+
+        response = timed("confirm", lambda: client.post(
+            f"/api/orders/{order['id']}/payment",
+            json={"payment_id": paid["razorpay_payment_id"]},
+            headers={**headers, "Idempotency-Key": paid["razorpay_payment_id"]}
+        ))
+        if response.status_code != 200:
+            return timings, "confirm"
+
+        return timings, None
+
+    # One app instance for the whole run; requests from the threads overlap on its event loop
+    with TestClient(app) as client:
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(checkout, [client] * checkouts))
+        elapsed = time.perf_counter() - start_time
+
+    failures = {}
+    for _, failed_step in results:
+        if failed_step:
+            failures[failed_step] = failures.get(failed_step, 0) + 1
+    completed = checkouts - sum(failures.values())
+
+    print(f"Gateway: {GATEWAY_URL or 'in-process fake'}")
+    print(f"{checkouts} checkouts on {threads} threads in {elapsed:.2f}s "
+          f"({completed / elapsed:.1f} completed/s), {completed} completed")
+    if failures:
+        print(f"Failed at: {failures}")
+
+    print(f"{'step':<16}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for step in STEPS:
+        values = [timings[step] for timings, _ in results if step in timings]
+        if values:
+            print(f"{step:<16}{percentile(values, 0.5):>10.1f}{percentile(values, 0.95):>10.1f}{percentile(values, 0.99):>10.1f}")
+
+    print(f"Gateway calls: {gateway_metrics.snapshot()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the vectorized co-occurrence rebuild.
+Generates a synthetic order history (1M order items by default) with a
+skewed product popularity and times compute_cooccurrence on it.
+
+Usage: python benchmarks/bench_cooccurrence.py [order_items] [products]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendations import compute_cooccurrence
+
+def generate_order_items(order_items: int, products: int, seed: int = 42):
+    """Build (order_id, product_id) arrays with 1-8 lines per order"""
+    rng = np.random.default_rng(seed)
+
+    lines_per_order = rng.integers(1, 9, size=order_items // 2)
+    lines_per_order = lines_per_order[np.cumsum(lines_per_order) <= order_items]
+    order_ids = np.repeat(np.arange(len(lines_per_order)), lines_per_order)
+
+    # Zipf-like popularity so a few products dominate, as in a real catalog
+    weights = 1.0 / np.arange(1, products + 1)
+    product_ids = rng.choice(products, size=len(order_ids), p=weights / weights.sum()) + 1
+
+    return order_ids, product_ids
+
+def main():
+    order_items = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    products = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+
+    order_ids, product_ids = generate_order_items(order_items, products)
+    print(f"Orders: {order_ids.max() + 1:,}  Order items: {len(order_ids):,}  Products: {products:,}")
+
+    timings = []
+    for _ in range(3):
+        start_time = time.perf_counter()
+        rows, _, counts = compute_cooccurrence(order_ids, product_ids)
+        timings.append(time.perf_counter() - start_time)
+
+    print(f"Product pairs: {len(counts):,}  Total co-purchases: {int(counts.sum()):,}")
+    print(f"compute_cooccurrence: best {min(timings):.3f}s  mean {sum(timings) / len(timings):.3f}s")
+
+if __name__ == "__main__":
+    main()
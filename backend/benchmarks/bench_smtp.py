@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+SMTP throughput benchmark: a new connection per email vs the session pool.
+Runs a local aiosmtpd sink that can add latency to each new session
+(standing in for TCP, TLS and AUTH round trips to a real provider) and to
+each message, then sends the same emails both ways and reports throughput
+and how many connections each approach opened.
+
+Usage: python benchmarks/bench_smtp.py [emails] [threads] [connect_ms] [message_ms]
+"""
+
+import asyncio
+import os
+import smtplib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller
+from smtp_pool import SMTPConnectionPool
+
+HOST = "127.0.0.1"
+PORT = 8025
+SENDER = "bench@fitlife360.local"
+
+class LatencySink:
+    """Accepts every message, sleeping to simulate network and provider latency"""
+
+    def __init__(self, connect_seconds: float, message_seconds: float):
+        self.connect_seconds = connect_seconds
+        self.message_seconds = message_seconds
+        self.sessions = 0
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        await asyncio.sleep(self.connect_seconds)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.message_seconds)
+        self.received += 1
+        return "250 OK"
+
+def build_emails(count: int):
+    body = "Subject: FitLife360 benchmark\r\n\r\n" + "Stay on track with your goals today.\r\n" * 20
+    return [(SENDER, f"user{i}@example.com", body) for i in range(count)]
+
+def send_with_new_connections(emails, threads: int):
+    """The old behaviour: connect, send one email and quit, for every email"""
+    def send(email):
+        with smtplib.SMTP(HOST, PORT, timeout=30) as server:
+            server.sendmail(*email)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(send, emails))
+
+def send_with_pool(emails, threads: int, pool: SMTPConnectionPool):
+    """Each thread pushes its share of the emails through one pooled session"""
+    batches = [emails[start::threads] for start in range(threads)]
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = [error for errors in executor.map(pool.send_batch, batches) for error in errors]
+    failed = sum(1 for error in results if error is not None)
+    if failed:
+        print(f"   {failed} emails failed")
+
+def run(name, sink, send):
+    sink.sessions = 0
+    sink.received = 0
+    started = time.perf_counter()
+    send()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<22}{elapsed:>8.2f}s{sink.received / elapsed:>12.1f}/s{sink.sessions:>10}")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    connect_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 60
+    message_ms = float(sys.argv[4]) if len(sys.argv) > 4 else 5
+
+    sink = LatencySink(connect_ms / 1000, message_ms / 1000)
+    controller = Controller(sink, hostname=HOST, port=PORT)
+    controller.start()
+
+    emails = build_emails(count)
+    pool = SMTPConnectionPool(HOST, PORT, starttls=False, max_size=threads, max_messages_per_connection=100)
+
+    print(f"{count} emails on {threads} threads, {connect_ms}ms per new session, {message_ms}ms per message")
+    print(f"{'mode':<22}{'time':>9}{'throughput':>14}{'sessions':>10}")
+    try:
+        run("connection per email", sink, lambda: send_with_new_connections(emails, threads))
+        run("pooled sessions", sink, lambda: send_with_pool(emails, threads, pool))
+        # Warm pool: the sessions opened by the previous run are reused
+        run("pooled, warm", sink, lambda: send_with_pool(emails[:threads * 50], threads, pool))
+    finally:
+        pool.close()
+        controller.stop()
+
+    print(f"Pool stats: {pool.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Concurrent checkout stress test.
+Fires many simultaneous single-unit checkouts at one product with limited
+stock and verifies that exactly `stock` orders succeed and stock never goes
+negative. Point DATABASE_URL at a scratch Postgres database; it creates its
+own user and product.
+
+Usage: python benchmarks/checkout_stress.py [stock] [checkouts] [threads]
+"""
+
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to Python path
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from main import app
+from database import SessionLocal
+from models import User, Product, OrderItem
+from auth import get_password_hash, create_access_token
+
+def create_fixtures(stock: int):
+    """Create a shopper and a product with the given stock"""
+    db = SessionLocal()
+    try:
+        suffix = uuid.uuid4().hex[:8]
+        user = User(
+            username=f"stress_{suffix}",
+            email=f"stress_{suffix}@example.com",
+            hashed_password=get_password_hash("stress-test"),
+            first_name="Stress",
+            last_name="Test"
+        )
+        product = Product(
+            name=f"Stress Product {suffix}",
+            description="Checkout stress test product",
+            category="test",
+            price=1.0,
+            stock_quantity=stock
+        )
+        db.add_all([user, product])
+        db.commit()
+        return user.username, product.id
+    finally:
+        db.close()
+
+def main():
+    stock = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    checkouts = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+
+    username, product_id = create_fixtures(stock)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+    payload = {
+        "items": [{"product_id": product_id, "quantity": 1}],
+        "shipping_address": "Stress Street",
+        "billing_address": "Stress Street",
+        "payment_method": "razorpay"
+    }
+
+    # One client per worker thread, so requests really overlap across threads
+    # without paying for a new client on every checkout
+    local = threading.local()
+
+    def checkout(_):
+        if not hasattr(local, "client"):
+            local.client = TestClient(app)
+        return local.client.post("/api/orders/", json=payload, headers=headers).status_code
+
+    # The app starts up and shuts down once for the whole run, as a server would
+    with TestClient(app):
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            statuses = list(executor.map(checkout, range(checkouts)))
+        elapsed = time.perf_counter() - start_time
+
+    db = SessionLocal()
+    try:
+        final_stock = db.query(Product.stock_quantity).filter(Product.id == product_id).scalar()
+        units_sold = db.query(func.coalesce(func.sum(OrderItem.quantity), 0)).filter(
+            OrderItem.product_id == product_id
+        ).scalar()
+    finally:
+        db.close()
+
+    succeeded = statuses.count(200)
+    rejected = statuses.count(400)
+    print(f"{checkouts} checkouts in {elapsed:.2f}s: {succeeded} succeeded, {rejected} rejected, "
+          f"{checkouts - succeeded - rejected} errored")
+    print(f"Initial stock {stock}, units sold {units_sold}, final stock {final_stock}")
+
+    assert final_stock >= 0, "stock went negative"
+    assert units_sold == stock - final_stock, "order items don't match the stock decrement"
+    assert succeeded == units_sold, "successful checkouts don't match units sold"
+    if checkouts >= stock:
+        assert final_stock == 0, "stock left over although demand exceeded it"
+    print("✅ No oversell")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import false, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+from models import BroadcastJob, BroadcastStatus, Notification, User
+from delivery import email_delivery, sms_delivery, enqueue_deliveries
+from email_templates import render_email_batch
+from notification_counts import count_new_notifications
+from notification_hub import publish_after_commit, stream_notification
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_POLL_INTERVAL_SECONDS = 2
+BROADCAST_CHUNK_SIZE = 1000
+# A running job whose worker hasn't reported progress for this long is picked up again
+BROADCAST_STALE_AFTER = timedelta(minutes=5)
+
+def create_broadcast_job(
+    db: Session,
+    created_by: int,
+    title: str,
+    message: str,
+    notification_type: str,
+    send_email: bool = False,
+    send_sms: bool = False
+) -> BroadcastJob:
+    """Queue a broadcast to every active user; the broadcast worker writes the rows"""
+    job = BroadcastJob(
+        created_by=created_by,
+        title=title,
+        message=message,
+        type=notification_type,
+        send_email=send_email,
+        send_sms=send_sms,
+        status=BroadcastStatus.PENDING
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+def _claim_job(db: Session) -> Optional[BroadcastJob]:
+    """Take the oldest pending job, or a running one whose worker went quiet"""
+    now = datetime.now(timezone.utc)
+    job = db.query(BroadcastJob).filter(or_(
+        BroadcastJob.status == BroadcastStatus.PENDING,
+        (BroadcastJob.status == BroadcastStatus.RUNNING) & (BroadcastJob.heartbeat_at < now - BROADCAST_STALE_AFTER)
+    )).order_by(BroadcastJob.id).limit(1).with_for_update(skip_locked=True).first()
+
+    if job is None:
+        return None
+
+    if job.total_recipients is None:
+        job.total_recipients = db.query(func.count(User.id)).filter(User.is_active == True).scalar()
+    job.status = BroadcastStatus.RUNNING
+    job.started_at = job.started_at or now
+    job.heartbeat_at = now
+    db.commit()
+    return job
+
+def _queue_chunk_deliveries(db: Session, job: BroadcastJob, created):
+    """Queue the email/SMS copies for one chunk of new notifications
+
+    The broadcast layout is rendered once per chunk; only each user's name
+    is filled in per email.
+    """
+    notification_ids = dict((user_id, notification_id) for notification_id, user_id in created)
+    recipients = db.query(User.id, User.email, User.phone, User.first_name).filter(User.id.in_(notification_ids)).all()
+
+    deliveries = []
+
+    if job.send_email:
+        emailed = [recipient for recipient in recipients if recipient.email]
+        bodies = render_email_batch(
+            "broadcast.html",
+            [{"first_name": recipient.first_name or "there"} for recipient in emailed],
+            title=job.title,
+            message=job.message
+        )
+        for recipient, body in zip(emailed, bodies):
+            deliveries.append(email_delivery(recipient.email, job.title, body, notification_ids[recipient.id]))
+
+    if job.send_sms:
+        for recipient in recipients:
+            if recipient.phone:
+                deliveries.append(sms_delivery(recipient.phone, f"{job.title}: {job.message}", notification_ids[recipient.id]))
+
+    enqueue_deliveries(db, deliveries)
+
+def _run_job(db: Session, job: BroadcastJob, chunk_size: int):
+    """Write a job's notifications one user-id range at a time
+
+    Each chunk is a single INSERT ... SELECT, so user rows never leave the
+    database, and it commits together with the job's new resume point. A
+    chunk only commits if the resume point is still where this worker left
+    it, so a reclaimed job can't be written twice.
+    """
+    last_user_id = job.last_user_id
+
+    while True:
+        user_ids = db.query(User.id).filter(
+            User.is_active == True,
+            User.id > last_user_id
+        ).order_by(User.id).limit(chunk_size).all()
+
+        if not user_ids:
+            break
+
+        upper_user_id = user_ids[-1].id
+        recipients = select(
+            User.id,
+            literal(job.title),
+            literal(job.message),
+            literal(job.type),
+            false(),
+            false(),
+            false()
+        ).where(
+            User.is_active == True,
+            User.id > last_user_id,
+            User.id <= upper_user_id
+        )
+
+        created = db.execute(
+            insert(Notification)
+            .from_select(
+                ["user_id", "title", "message", "type", "is_read", "sent_via_email", "sent_via_sms"],
+                recipients
+            )
+            .returning(Notification.id, Notification.user_id)
+        ).all()
+
+        advanced = db.execute(
+            update(BroadcastJob)
+            .where(BroadcastJob.id == job.id, BroadcastJob.last_user_id == last_user_id)
+            .values(
+                last_user_id=upper_user_id,
+                sent_count=BroadcastJob.sent_count + len(created),
+                heartbeat_at=datetime.now(timezone.utc)
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        if not advanced:
+            db.rollback()
+            logger.warning(f"Broadcast job {job.id} was taken over by another worker")
+            return
+
+        count_new_notifications(db, [user_id for _, user_id in created])
+        publish_after_commit(db, [
+            stream_notification(notification_id, user_id, job.title, job.message, job.type)
+            for notification_id, user_id in created
+        ])
+        if job.send_email or job.send_sms:
+            _queue_chunk_deliveries(db, job, created)
+
+        db.commit()
+        last_user_id = upper_user_id
+
+    db.execute(
+        update(BroadcastJob)
+        .where(BroadcastJob.id == job.id, BroadcastJob.last_user_id == last_user_id)
+        .values(status=BroadcastStatus.COMPLETED, finished_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def run_broadcast_jobs(db: Session, chunk_size: int = BROADCAST_CHUNK_SIZE) -> int:
+    """Run queued broadcasts until none are left; returns the number of jobs run"""
+    jobs_run = 0
+
+    while True:
+        job = _claim_job(db)
+        if job is None:
+            break
+
+        try:
+            _run_job(db, job, chunk_size)
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Broadcast job {job.id} failed")
+            db.execute(
+                update(BroadcastJob)
+                .where(BroadcastJob.id == job.id)
+                .values(status=BroadcastStatus.FAILED, error=str(e)[:2000], finished_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+        jobs_run += 1
+
+    return jobs_run
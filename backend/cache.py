@@ -0,0 +1,57 @@
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+class TTLCache:
+    """Small thread-safe in-process cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value for key, evicting the oldest entry when full"""
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def delete(self, key: Hashable):
+        """Drop a single key from the cache"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry from the cache"""
+        with self._lock:
+            self._entries.clear()
+
+# Catalog caches shared by the product endpoints
+product_facets_cache = TTLCache(ttl_seconds=60)
+product_snapshot_cache = TTLCache(ttl_seconds=30, max_entries=10000)
+
+def invalidate_product_snapshots(product_ids):
+    """Drop cached snapshots for products whose stock or price changed"""
+    for product_id in product_ids:
+        product_snapshot_cache.delete(product_id)
+
+def invalidate_catalog_caches():
+    """Clear all cached catalog data after products change"""
+    product_facets_cache.clear()
+    product_snapshot_cache.clear()
@@ -0,0 +1,151 @@
+import csv
+import io
+import json
+from typing import BinaryIO, Iterator, Tuple
+from pydantic import ValidationError
+from sqlalchemy import case, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from database import dialect_insert
+from models import Product
+from nutrition import NUTRIENT_COLUMNS, parse_nutritional_info
+from schemas import ProductImportRow
+
+IMPORT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+# Columns an import may overwrite on an existing SKU; everything else keeps its value
+UPSERT_COLUMNS = [column for column in ProductImportRow.model_fields if column != "sku"]
+
+def detect_import_format(filename: str) -> str:
+    """Guess csv or jsonl from an uploaded file name"""
+    if (filename or "").lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+def iter_import_rows(file: BinaryIO, file_format: str) -> Iterator[Tuple[int, object]]:
+    """Yield (row number, raw row) pairs one at a time without reading the whole file"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+    if file_format == "jsonl":
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as e:
+                yield row_number, e
+    else:
+        # Row 1 is the header, so data rows start at 2
+        for row_number, row in enumerate(csv.DictReader(text), start=2):
+            yield row_number, row
+
+def _clean_row(raw: dict) -> dict:
+    """Turn empty CSV cells into missing values"""
+    return {
+        key.strip(): value
+        for key, value in raw.items()
+        if key and value not in ("", None)
+    }
+
+def _upsert_chunk(db: Session, chunk: dict):
+    """Insert or update a chunk of validated rows keyed by SKU in one statement"""
+    table = Product.__table__
+    statement = dialect_insert(db, table)
+    new_info_given = statement.excluded.nutritional_info.isnot(None)
+    statement = statement.on_conflict_do_update(
+        index_elements=["sku"],
+        set_={
+            # Blank optional cells leave the stored value alone
+            **{
+                column: func.coalesce(statement.excluded[column], table.c[column])
+                for column in UPSERT_COLUMNS
+            },
+            # Nutrients follow the new nutritional_info as a whole, so one it
+            # no longer lists is cleared rather than kept from the old info
+            **{
+                column: case((new_info_given, statement.excluded[column]), else_=table.c[column])
+                for column in NUTRIENT_COLUMNS.values()
+            },
+            "updated_at": func.now()
+        }
+    )
+    db.execute(statement, [values for _, values in chunk.values()])
+    db.commit()
+
+def import_products(db: Session, rows: Iterator[Tuple[int, object]]) -> dict:
+    """Validate rows incrementally and upsert them by SKU in chunks
+
+    Each chunk commits on its own, so the import is partial when a chunk
+    fails in the database: earlier chunks stay, the failed chunk's rows are
+    reported as errors, and later chunks still run.
+    """
+    processed = 0
+    upserted = 0
+    failed = 0
+    failed_chunks = 0
+    errors = []
+
+    def record_error(row_number, sku, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "sku": sku, "error": message})
+
+    def flush(chunk):
+        nonlocal upserted, failed_chunks
+        try:
+            _upsert_chunk(db, chunk)
+        except SQLAlchemyError as e:
+            db.rollback()
+            failed_chunks += 1
+            message = f"Database error, chunk not imported: {e.__class__.__name__}"
+            for sku, (row_number, _) in chunk.items():
+                record_error(row_number, sku, message)
+        else:
+            upserted += len(chunk)
+
+    # Keyed by SKU so a repeated SKU within a chunk keeps its last row;
+    # ON CONFLICT can't touch the same row twice in one statement
+    chunk = {}
+
+    for row_number, raw in rows:
+        processed += 1
+
+        if isinstance(raw, Exception):
+            record_error(row_number, None, f"Invalid JSON: {raw}")
+            continue
+
+        if not isinstance(raw, dict):
+            record_error(row_number, None, "Row must be an object")
+            continue
+
+        raw = _clean_row(raw)
+        try:
+            product = ProductImportRow(**raw)
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            )
+            record_error(row_number, raw.get("sku"), message)
+            continue
+
+        values = product.model_dump()
+        values.update(parse_nutritional_info(product.nutritional_info))
+        chunk[product.sku] = (row_number, values)
+
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            flush(chunk)
+            chunk = {}
+
+    if chunk:
+        flush(chunk)
+
+    return {
+        "processed": processed,
+        "upserted": upserted,
+        "failed": failed,
+        "failed_chunks": failed_chunks,
+        "errors": errors
+    }
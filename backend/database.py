@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -23,6 +24,23 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for models
 Base = declarative_base()
 
+# Postgres SQLSTATEs for serialization failures and deadlocks; safe to retry
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+def is_retryable_error(error: Exception) -> bool:
+    """Check whether a database error is a transient conflict worth retrying"""
+    if not isinstance(error, DBAPIError):
+        return False
+    return getattr(error.orig, "pgcode", None) in RETRYABLE_SQLSTATES
+
+def dialect_insert(db, table):
+    """Return an INSERT for the session's database that supports ON CONFLICT"""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
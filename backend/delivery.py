@@ -0,0 +1,298 @@
+import logging
+import os
+import random
+import smtplib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from twilio.base.exceptions import TwilioRestException
+from twilio.rest import Client
+from models import DeliveryStatus, Notification, NotificationDelivery
+from smtp_pool import SMTPConnectionPool
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_POLL_INTERVAL_SECONDS = 1
+DELIVERY_BATCH_SIZE = 100
+DELIVERY_MAX_BATCHES_PER_RUN = 20
+DELIVERY_MAX_ATTEMPTS = 6
+DELIVERY_RETRY_BASE_SECONDS = 30
+DELIVERY_RETRY_MAX_SECONDS = 3600
+# A claimed delivery goes back to the queue if its worker hasn't finished by then
+DELIVERY_LEASE = timedelta(minutes=5)
+DELIVERY_RETENTION = timedelta(days=7)
+
+# Messages in flight at once per channel, to stay inside provider rate limits
+DELIVERY_CONCURRENCY = {
+    "email": int(os.getenv("EMAIL_DELIVERY_CONCURRENCY", "4")),
+    "sms": int(os.getenv("SMS_DELIVERY_CONCURRENCY", "8"))
+}
+
+class DeliveryNotConfigured(Exception):
+    """The channel has no credentials, so retrying can't help"""
+
+twilio_client = Client(
+    os.getenv("TWILIO_ACCOUNT_SID"),
+    os.getenv("TWILIO_AUTH_TOKEN")
+)
+
+_smtp_pool: Optional[SMTPConnectionPool] = None
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """The process-wide SMTP session pool, built from the environment on first use
+
+    SMTP_STARTTLS=false and an empty EMAIL_PASSWORD let it talk to a
+    plain local sink such as `python -m aiosmtpd -n` during development.
+    """
+    global _smtp_pool
+    if _smtp_pool is None:
+        _smtp_pool = SMTPConnectionPool(
+            os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+            int(os.getenv("SMTP_PORT", "587")),
+            username=os.getenv("EMAIL_USER"),
+            password=os.getenv("EMAIL_PASSWORD"),
+            starttls=os.getenv("SMTP_STARTTLS", "true").lower() == "true",
+            max_size=int(os.getenv("SMTP_POOL_SIZE", str(DELIVERY_CONCURRENCY["email"]))),
+            max_messages_per_connection=int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+        )
+    return _smtp_pool
+
+def _build_email(to_email: str, subject: str, body: str):
+    sender = os.getenv("EMAIL_FROM") or os.getenv("EMAIL_USER")
+
+    if not sender:
+        raise DeliveryNotConfigured("Email is not configured")
+
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'html'))
+    return sender, to_email, msg.as_string()
+
+def send_email_batch(emails: List[Tuple[str, str, str]]) -> List[Optional[Exception]]:
+    """Send (to, subject, html body) emails over one pooled SMTP session
+
+    Returns None per accepted email, or the error it failed with.
+    """
+    results: List[Optional[Exception]] = [None] * len(emails)
+    outgoing, positions = [], []
+
+    for index, (to_email, subject, body) in enumerate(emails):
+        try:
+            outgoing.append(_build_email(to_email, subject, body))
+            positions.append(index)
+        except DeliveryNotConfigured as e:
+            results[index] = e
+
+    if outgoing:
+        for index, error in zip(positions, get_smtp_pool().send_batch(outgoing)):
+            results[index] = error
+    return results
+
+def send_email(to_email: str, subject: str, body: str):
+    """Send one HTML email; raises on failure"""
+    error = send_email_batch([(to_email, subject, body)])[0]
+    if error is not None:
+        raise error
+
+def send_sms(to_phone: str, message: str):
+    """Send one SMS through Twilio; raises on failure"""
+    twilio_phone = os.getenv("TWILIO_PHONE_NUMBER")
+
+    if not twilio_phone:
+        raise DeliveryNotConfigured("SMS is not configured")
+
+    twilio_client.messages.create(
+        body=message,
+        from_=twilio_phone,
+        to=to_phone
+    )
+
+def _is_permanent(error: Exception) -> bool:
+    """Errors about the message or recipient rather than the provider"""
+    if isinstance(error, (DeliveryNotConfigured, smtplib.SMTPRecipientsRefused)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    if isinstance(error, TwilioRestException):
+        return 400 <= error.status < 500 and error.status != 429
+    return False
+
+def email_delivery(to_email: str, subject: str, body: str, notification_id: Optional[int] = None) -> dict:
+    return {
+        "notification_id": notification_id,
+        "channel": "email",
+        "recipient": to_email,
+        "subject": subject,
+        "body": body
+    }
+
+def sms_delivery(to_phone: str, message: str, notification_id: Optional[int] = None) -> dict:
+    return {
+        "notification_id": notification_id,
+        "channel": "sms",
+        "recipient": to_phone,
+        "subject": None,
+        "body": message
+    }
+
+def enqueue_deliveries(db: Session, deliveries: List[dict]):
+    """Queue email_delivery/sms_delivery rows; the caller commits them with its own changes"""
+    if not deliveries:
+        return
+
+    now = datetime.now(timezone.utc)
+    db.execute(insert(NotificationDelivery), [
+        {**delivery, "status": DeliveryStatus.PENDING, "attempts": 0, "available_at": now}
+        for delivery in deliveries
+    ])
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+def _executor(channel: str) -> ThreadPoolExecutor:
+    """One bounded thread pool per channel, created on first use"""
+    if channel not in _executors:
+        _executors[channel] = ThreadPoolExecutor(
+            max_workers=DELIVERY_CONCURRENCY[channel],
+            thread_name_prefix=f"{channel}-delivery"
+        )
+    return _executors[channel]
+
+def shutdown_delivery_workers():
+    """Stop the sender threads and SMTP sessions; unfinished deliveries are retried after their lease"""
+    global _smtp_pool
+    for executor in _executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors.clear()
+    if _smtp_pool is not None:
+        _smtp_pool.close()
+        _smtp_pool = None
+
+def _send_all(deliveries: List[dict]) -> List[Tuple[dict, Optional[Exception]]]:
+    """Send a claimed batch and pair every delivery with its error, if any
+
+    Emails are split into one sub-batch per email thread so each thread
+    pushes many messages through a single pooled SMTP session. SMS messages
+    go out one per call.
+    """
+    emails = [delivery for delivery in deliveries if delivery["channel"] == "email"]
+    texts = [delivery for delivery in deliveries if delivery["channel"] == "sms"]
+
+    threads = DELIVERY_CONCURRENCY["email"]
+    email_batches = [emails[start::threads] for start in range(threads) if emails[start::threads]]
+    email_futures = [
+        (batch, _executor("email").submit(
+            send_email_batch,
+            [(delivery["recipient"], delivery["subject"], delivery["body"]) for delivery in batch]
+        ))
+        for batch in email_batches
+    ]
+    sms_futures = [
+        (delivery, _executor("sms").submit(send_sms, delivery["recipient"], delivery["body"]))
+        for delivery in texts
+    ]
+
+    results = []
+    for batch, future in email_futures:
+        try:
+            errors = future.result()
+        except Exception as e:
+            errors = [e] * len(batch)
+        results.extend(zip(batch, errors))
+    for delivery, future in sms_futures:
+        results.append((delivery, future.exception()))
+    return results
+
+def _retry_delay(attempts: int) -> timedelta:
+    delay = min(DELIVERY_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), DELIVERY_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.5))
+
+def deliver_pending(db: Session, batch_size: int = DELIVERY_BATCH_SIZE) -> int:
+    """Send due deliveries and record the outcomes; returns how many were attempted
+
+    Each batch is claimed with FOR UPDATE SKIP LOCKED and leased before the
+    transaction ends, so no row lock is held while messages are in flight.
+    Messages go out on the per-channel threads, and the results are written
+    back with one bulk update, including Notification.sent_via_email/sms.
+    """
+    handled = 0
+
+    for _ in range(DELIVERY_MAX_BATCHES_PER_RUN):
+        now = datetime.now(timezone.utc)
+        claimed = db.query(NotificationDelivery).filter(
+            NotificationDelivery.status.in_((DeliveryStatus.PENDING, DeliveryStatus.SENDING)),
+            NotificationDelivery.available_at <= now
+        ).order_by(NotificationDelivery.available_at, NotificationDelivery.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        if not claimed:
+            break
+
+        deliveries = [
+            {
+                "id": row.id,
+                "notification_id": row.notification_id,
+                "channel": row.channel,
+                "recipient": row.recipient,
+                "subject": row.subject,
+                "body": row.body,
+                "attempts": row.attempts
+            }
+            for row in claimed
+        ]
+        for row in claimed:
+            row.status = DeliveryStatus.SENDING
+            row.available_at = now + DELIVERY_LEASE
+        db.commit()
+
+        results = _send_all(deliveries)
+
+        now = datetime.now(timezone.utc)
+        outcomes = []
+        sent_notification_ids = {"email": [], "sms": []}
+
+        for delivery, error in results:
+            attempts = delivery["attempts"] + 1
+
+            if error is None:
+                outcomes.append({"id": delivery["id"], "status": DeliveryStatus.SENT, "attempts": attempts, "sent_at": now, "last_error": None})
+                if delivery["notification_id"]:
+                    sent_notification_ids[delivery["channel"]].append(delivery["notification_id"])
+            elif _is_permanent(error) or attempts >= DELIVERY_MAX_ATTEMPTS:
+                outcomes.append({"id": delivery["id"], "status": DeliveryStatus.FAILED, "attempts": attempts, "last_error": str(error)[:2000]})
+                logger.warning(f"{delivery['channel']} delivery {delivery['id']} gave up: {error}")
+            else:
+                outcomes.append({
+                    "id": delivery["id"],
+                    "status": DeliveryStatus.PENDING,
+                    "attempts": attempts,
+                    "available_at": now + _retry_delay(attempts),
+                    "last_error": str(error)[:2000]
+                })
+
+        db.bulk_update_mappings(NotificationDelivery, outcomes)
+        if sent_notification_ids["email"]:
+            db.execute(update(Notification).where(Notification.id.in_(sent_notification_ids["email"])).values(sent_via_email=True))
+        if sent_notification_ids["sms"]:
+            db.execute(update(Notification).where(Notification.id.in_(sent_notification_ids["sms"])).values(sent_via_sms=True))
+        db.commit()
+
+        handled += len(deliveries)
+
+        if len(deliveries) < batch_size:
+            break
+
+    return handled
+
+def purge_sent_deliveries(db: Session) -> int:
+    """Delete sent deliveries older than DELIVERY_RETENTION"""
+    deleted = db.query(NotificationDelivery).filter(
+        NotificationDelivery.status == DeliveryStatus.SENT,
+        NotificationDelivery.created_at < datetime.now(timezone.utc) - DELIVERY_RETENTION
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -0,0 +1,78 @@
+import os
+import re
+from typing import Dict, List, Optional
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+from markupsafe import Markup, escape
+
+EMAIL_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "email")
+
+EMAIL_TEMPLATES = [
+    "notification.html",
+    "order_confirmation.html",
+    "consultation_update.html",
+    "password_reset.html",
+    "broadcast.html"
+]
+
+# Notification types with their own email layout; anything else uses notification.html
+NOTIFICATION_EMAIL_TEMPLATES = {
+    "order": "order_confirmation.html",
+    "consultation": "consultation_update.html"
+}
+
+# auto_reload=False: templates are compiled once and never re-checked on disk
+_environment = Environment(
+    loader=FileSystemLoader(EMAIL_TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True
+)
+_templates: Dict[str, Template] = {}
+
+# Stands in for a per-recipient field while a batch's shared layout is rendered
+_FIELD_MARKER = re.compile("\x00(\\d+)\x00")
+
+def load_email_templates():
+    """Compile every email template; called at startup so template errors surface there"""
+    for name in EMAIL_TEMPLATES:
+        _templates[name] = _environment.get_template(name)
+
+def get_email_template(name: str) -> Template:
+    if name not in _templates:
+        _templates[name] = _environment.get_template(name)
+    return _templates[name]
+
+def notification_email_template(notification_type: Optional[str]) -> str:
+    return NOTIFICATION_EMAIL_TEMPLATES.get(notification_type, "notification.html")
+
+def render_email(name: str, **context) -> str:
+    """Render one email; values are HTML-escaped"""
+    return get_email_template(name).render(**context)
+
+def render_email_batch(name: str, recipients: List[dict], **shared) -> List[str]:
+    """Render one email per recipient while running the template only once
+
+    The template is rendered with the shared context and a marker in place
+    of each per-recipient field (the keys of the recipient dicts), then every
+    recipient's escaped values are spliced in at the markers. Per-recipient
+    fields must therefore only be printed by the template, not tested or
+    filtered.
+    """
+    if not recipients:
+        return []
+
+    fields = list(recipients[0])
+    markers = {field: Markup(f"\x00{index}\x00") for index, field in enumerate(fields)}
+    # Even positions are literal HTML, odd positions the index of a field
+    pieces = _FIELD_MARKER.split(get_email_template(name).render(**shared, **markers))
+    slots = [(position, int(pieces[position])) for position in range(1, len(pieces), 2)]
+
+    bodies = []
+    for recipient in recipients:
+        values = [str(escape(recipient[field])) for field in fields]
+        body = list(pieces)
+        for position, field_index in slots:
+            body[position] = values[field_index]
+        bodies.append("".join(body))
+    return bodies
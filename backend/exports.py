@@ -0,0 +1,160 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator, List, Optional
+from sqlalchemy import select
+from database import SessionLocal
+from models import Consultation, Order, Product, User
+
+EXPORT_YIELD_PER = 1000
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+# Exportable columns per entity, in default output order. Each entity also
+# names the timestamp its date range filters on and the tables it joins.
+# Sensitive fields such as password hashes are deliberately left out.
+EXPORTS = {
+    "orders": {
+        "model": Order,
+        "date_column": Order.created_at,
+        "joins": [(User, Order.user_id == User.id)],
+        "columns": {
+            "id": Order.id,
+            "order_number": Order.order_number,
+            "user_id": Order.user_id,
+            "customer_email": User.email,
+            "status": Order.status,
+            "payment_status": Order.payment_status,
+            "payment_method": Order.payment_method,
+            "total_amount": Order.total_amount,
+            "created_at": Order.created_at,
+            "updated_at": Order.updated_at,
+        },
+    },
+    "users": {
+        "model": User,
+        "date_column": User.created_at,
+        "joins": [],
+        "columns": {
+            "id": User.id,
+            "username": User.username,
+            "email": User.email,
+            "first_name": User.first_name,
+            "last_name": User.last_name,
+            "phone": User.phone,
+            "role": User.role,
+            "is_active": User.is_active,
+            "is_verified": User.is_verified,
+            "goal": User.goal,
+            "created_at": User.created_at,
+        },
+    },
+    "consultations": {
+        "model": Consultation,
+        "date_column": Consultation.created_at,
+        "joins": [(User, Consultation.user_id == User.id)],
+        "columns": {
+            "id": Consultation.id,
+            "user_id": Consultation.user_id,
+            "customer_email": User.email,
+            "consultant_id": Consultation.consultant_id,
+            "scheduled_time": Consultation.scheduled_time,
+            "duration_minutes": Consultation.duration_minutes,
+            "status": Consultation.status,
+            "rating": Consultation.rating,
+            "created_at": Consultation.created_at,
+        },
+    },
+    "products": {
+        "model": Product,
+        "date_column": Product.created_at,
+        "joins": [],
+        "columns": {
+            "id": Product.id,
+            "sku": Product.sku,
+            "name": Product.name,
+            "category": Product.category,
+            "price": Product.price,
+            "stock_quantity": Product.stock_quantity,
+            "rating": Product.rating,
+            "total_reviews": Product.total_reviews,
+            "is_active": Product.is_active,
+            "created_at": Product.created_at,
+        },
+    },
+}
+
+def resolve_columns(entity: str, columns: Optional[str]) -> List[str]:
+    """Turn a comma-separated column list into validated names; all columns if omitted"""
+    available = EXPORTS[entity]["columns"]
+    if not columns:
+        return list(available)
+
+    names = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown or not names:
+        raise ValueError(
+            f"Unknown columns: {', '.join(unknown) or '(none given)'}. "
+            f"Available: {', '.join(available)}"
+        )
+    return names
+
+def _export_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _csv_lines(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+def iter_export(
+    entity: str,
+    columns: List[str],
+    file_format: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+) -> Iterator[str]:
+    """Yield an export as CSV or NDJSON text, one EXPORT_YIELD_PER batch at a time
+
+    Uses its own session because the stream outlives the request handler,
+    and yield_per so Postgres serves rows from a server-side cursor instead
+    of loading the whole result into memory.
+    """
+    spec = EXPORTS[entity]
+
+    # Send the header before touching the database so the download starts at once
+    if file_format == "csv":
+        yield _csv_lines([columns])
+
+    statement = select(
+        *(spec["columns"][name].label(name) for name in columns)
+    ).select_from(spec["model"])
+    for table, on_clause in spec["joins"]:
+        statement = statement.outerjoin(table, on_clause)
+
+    if date_from is not None:
+        statement = statement.where(spec["date_column"] >= date_from)
+
+    if date_to is not None:
+        statement = statement.where(spec["date_column"] < date_to)
+
+    statement = statement.order_by(spec["model"].id).execution_options(yield_per=EXPORT_YIELD_PER)
+
+    db = SessionLocal()
+    try:
+        for rows in db.execute(statement).partitions():
+            rows = [[_export_value(value) for value in row] for row in rows]
+            if file_format == "csv":
+                yield _csv_lines(rows)
+            else:
+                yield "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+    finally:
+        db.close()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Razorpay API, for load testing checkout offline.
+Mimics order creation and lookup, payment capture, payment fetch and checkout
+signatures, with injectable latency and failure rates. It can run
+in-process (PAYMENT_GATEWAY=fake) or as an HTTP server that the real
+Razorpay client talks to (RAZORPAY_BASE_URL=http://127.0.0.1:9000/v1).
+
+Usage: python fake_gateway.py [--port 9000] [--latency-ms 80] [--failure-rate 0.02]
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import random
+import secrets
+import threading
+import time
+from typing import Optional
+import razorpay
+import requests
+from payment_gateway import PaymentGateway
+
+class FakeRazorpay:
+    """In-memory Razorpay orders and payments with simulated latency and failures"""
+
+    def __init__(
+        self,
+        key_id: Optional[str] = None,
+        key_secret: Optional[str] = None,
+        latency_ms: float = 0,
+        latency_jitter_ms: float = 0,
+        failure_rate: float = 0
+    ):
+        self.key_id = key_id or "rzp_test_fake"
+        self.key_secret = key_secret or "fake_secret"
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.failure_rate = failure_rate
+        self.orders = {}
+        self.payments = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, key_id: Optional[str] = None, key_secret: Optional[str] = None):
+        return cls(
+            key_id,
+            key_secret,
+            latency_ms=float(os.getenv("FAKE_GATEWAY_LATENCY_MS", "0")),
+            latency_jitter_ms=float(os.getenv("FAKE_GATEWAY_JITTER_MS", "0")),
+            failure_rate=float(os.getenv("FAKE_GATEWAY_FAILURE_RATE", "0"))
+        )
+
+    def delay_seconds(self) -> float:
+        """Draw one simulated round-trip time"""
+        jitter = random.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def should_fail(self) -> bool:
+        return random.random() < self.failure_rate
+
+    def sign(self, order_id: str, payment_id: str) -> str:
+        """Checkout signature, computed the way Razorpay does"""
+        message = f"{order_id}|{payment_id}".encode()
+        return hmac.new(self.key_secret.encode(), message, hashlib.sha256).hexdigest()
+
+    def create_order(self, amount_paise: int, currency: str, receipt: str, notes: dict) -> dict:
+        order = {
+            "id": f"order_{secrets.token_hex(7)}",
+            "entity": "order",
+            "amount": amount_paise,
+            "amount_paid": 0,
+            "currency": currency,
+            "receipt": receipt,
+            "notes": notes or {},
+            "status": "created",
+            "created_at": int(time.time())
+        }
+        with self._lock:
+            self.orders[order["id"]] = order
+        return order
+
+    def pay_order(self, order_id: str) -> Optional[dict]:
+        """Capture a payment for an order, as the checkout widget would
+
+        Returns the handler response the browser would receive, or None if
+        the order doesn't exist.
+        """
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                return None
+
+            payment = {
+                "id": f"pay_{secrets.token_hex(7)}",
+                "entity": "payment",
+                "amount": order["amount"],
+                "currency": order["currency"],
+                "status": "captured",
+                "order_id": order_id,
+                "notes": order["notes"],
+                "created_at": int(time.time())
+            }
+            self.payments[payment["id"]] = payment
+            order["status"] = "paid"
+            order["amount_paid"] = order["amount"]
+
+        return {
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment["id"],
+            "razorpay_signature": self.sign(order_id, payment["id"])
+        }
+
+    def get_payment(self, payment_id: str) -> Optional[dict]:
+        with self._lock:
+            return self.payments.get(payment_id)
+
+    def get_order(self, order_id: str) -> Optional[dict]:
+        with self._lock:
+            return self.orders.get(order_id)
+
+    def find_orders(self, receipt: str) -> list:
+        with self._lock:
+            return [order for order in self.orders.values() if order["receipt"] == receipt]
+
+class FakePaymentGateway(PaymentGateway):
+    """PaymentGateway backed by an in-process FakeRazorpay"""
+
+    name = "fake"
+
+    def __init__(self, fake: FakeRazorpay):
+        self.fake = fake
+
+    def _round_trip(self, timeout):
+        """Sleep for the simulated latency and raise what the SDK would on failure"""
+        delay = self.fake.delay_seconds()
+        read_timeout = timeout[1] if timeout else None
+
+        if read_timeout is not None and delay > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.ReadTimeout("Fake gateway read timed out")
+
+        time.sleep(delay)
+        if self.fake.should_fail():
+            raise razorpay.errors.ServerError("Injected fake gateway failure")
+
+    def create_order(self, amount_paise, currency, receipt, notes, timeout):
+        self._round_trip(timeout)
+        return self.fake.create_order(amount_paise, currency, receipt, notes)
+
+    def fetch_payment(self, payment_id, timeout):
+        self._round_trip(timeout)
+        payment = self.fake.get_payment(payment_id)
+        if payment is None:
+            raise razorpay.errors.BadRequestError("The id provided does not exist")
+        return payment
+
+    def fetch_orders_by_receipt(self, receipt, timeout):
+        self._round_trip(timeout)
+        return self.fake.find_orders(receipt)
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        return hmac.compare_digest(self.fake.sign(order_id, payment_id), signature or "")
+
+def create_fake_gateway_app(fake: FakeRazorpay):
+    """HTTP app answering the subset of Razorpay's REST API the backend uses"""
+    import asyncio
+    from fastapi import Body, FastAPI
+    from fastapi.responses import JSONResponse
+
+    app = FastAPI(title="Fake Razorpay")
+
+    def error(status_code: int, code: str, description: str):
+        return JSONResponse(
+            status_code=status_code,
+            content={"error": {"code": code, "description": description}}
+        )
+
+    async def round_trip():
+        await asyncio.sleep(fake.delay_seconds())
+        if fake.should_fail():
+            return error(500, "SERVER_ERROR", "Injected fake gateway failure")
+        return None
+
+    @app.post("/v1/orders")
+    async def create_order(data: dict = Body(...)):
+        failure = await round_trip()
+        if failure:
+            return failure
+        return fake.create_order(data["amount"], data.get("currency", "INR"), data.get("receipt"), data.get("notes"))
+
+    @app.get("/v1/orders")
+    async def list_orders(receipt: str):
+        failure = await round_trip()
+        if failure:
+            return failure
+        orders = fake.find_orders(receipt)
+        return {"entity": "collection", "count": len(orders), "items": orders}
+
+    @app.get("/v1/orders/{order_id}")
+    async def get_order(order_id: str):
+        failure = await round_trip()
+        if failure:
+            return failure
+        order = fake.get_order(order_id)
+        return order if order else error(400, "BAD_REQUEST_ERROR", "The id provided does not exist")
+
+    @app.get("/v1/payments/{payment_id}")
+    async def get_payment(payment_id: str):
+        failure = await round_trip()
+        if failure:
+            return failure
+        payment = fake.get_payment(payment_id)
+        return payment if payment else error(400, "BAD_REQUEST_ERROR", "The id provided does not exist")
+
+    # Not part of Razorpay's API: stands in for the customer paying in the checkout widget
+    @app.post("/v1/test/orders/{order_id}/pay")
+    async def pay_order(order_id: str):
+        result = fake.pay_order(order_id)
+        return result if result else error(400, "BAD_REQUEST_ERROR", "The id provided does not exist")
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Razorpay API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+    fake = FakeRazorpay(
+        os.getenv("RAZORPAY_KEY_ID"),
+        os.getenv("RAZORPAY_KEY_SECRET"),
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate
+    )
+    print(f"🧪 Fake Razorpay on http://{args.host}:{args.port}/v1 "
+          f"({args.latency_ms}±{args.jitter_ms}ms, {args.failure_rate:.0%} failures)")
+    uvicorn.run(create_fake_gateway_app(fake), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+from models import Notification, Order, OrderStatus
+from inventory import enqueue_order_cancellations, restore_order_stock
+from cache import invalidate_product_snapshots
+from notification_counts import count_new_notifications
+from notification_hub import publish_after_commit, stream_notification
+
+BULK_STATUS_CHUNK_SIZE = 500
+MAX_BULK_ORDER_IDS = 5000
+
+# Allowed moves between order states; anything not listed is rejected
+ORDER_STATUS_TRANSITIONS: Dict[OrderStatus, Set[OrderStatus]] = {
+    OrderStatus.PENDING: {OrderStatus.CONFIRMED, OrderStatus.CANCELLED},
+    OrderStatus.CONFIRMED: {OrderStatus.SHIPPED, OrderStatus.CANCELLED},
+    OrderStatus.SHIPPED: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+STATUS_NOTIFICATIONS = {
+    OrderStatus.CONFIRMED: ("Order Confirmed", "Your order {order_number} has been confirmed."),
+    OrderStatus.SHIPPED: ("Order Shipped", "Your order {order_number} is on its way."),
+    OrderStatus.DELIVERED: ("Order Delivered", "Your order {order_number} has been delivered."),
+    OrderStatus.CANCELLED: ("Order Cancelled", "Your order {order_number} has been cancelled."),
+}
+
+def source_statuses(target: OrderStatus) -> List[OrderStatus]:
+    """Statuses an order may be in to move to target"""
+    return [
+        current for current, targets in ORDER_STATUS_TRANSITIONS.items()
+        if target in targets
+    ]
+
+def _chunks(items: List[int], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _transition_chunk(db: Session, order_ids: List[int], target: OrderStatus) -> List[Tuple[int, int, str]]:
+    """Move one chunk of orders to target with a single conditional UPDATE
+
+    Orders not in a valid source state are left untouched. Notifications for
+    the moved orders are inserted in one statement in the same transaction.
+    """
+    moved = db.execute(
+        update(Order)
+        .where(
+            Order.id.in_(order_ids),
+            Order.status.in_(source_statuses(target))
+        )
+        .values(status=target, updated_at=func.now())
+        .returning(Order.id, Order.user_id, Order.order_number)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if not moved:
+        db.commit()
+        return []
+
+    product_ids = []
+    if target == OrderStatus.CANCELLED:
+        product_ids = restore_order_stock(db, [order_id for order_id, _, _ in moved])
+        enqueue_order_cancellations(db, [order_id for order_id, _, _ in moved])
+
+    title, message = STATUS_NOTIFICATIONS[target]
+    notifications = [
+        {
+            "user_id": user_id,
+            "title": title,
+            "message": message.format(order_number=order_number),
+            "type": "order",
+            "is_read": False,
+            "sent_via_email": False,
+            "sent_via_sms": False
+        }
+        for _, user_id, order_number in moved
+    ]
+    created = db.execute(insert(Notification).returning(Notification.id, sort_by_parameter_order=True), notifications).scalars().all()
+    count_new_notifications(db, [user_id for _, user_id, _ in moved])
+    publish_after_commit(db, [
+        stream_notification(notification_id, row["user_id"], row["title"], row["message"], row["type"])
+        for notification_id, row in zip(created, notifications)
+    ])
+
+    db.commit()
+    invalidate_product_snapshots(product_ids)
+
+    return moved
+
+def transition_orders(db: Session, order_ids: List[int], target: OrderStatus) -> List[int]:
+    """Move the given orders to target in chunks and return the ids that moved"""
+    moved_ids = []
+    for chunk in _chunks(list(dict.fromkeys(order_ids)), BULK_STATUS_CHUNK_SIZE):
+        moved_ids.extend(order_id for order_id, _, _ in _transition_chunk(db, chunk, target))
+    return moved_ids
+
+def transition_matching_orders(
+    db: Session,
+    target: OrderStatus,
+    current_status: Optional[OrderStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+) -> int:
+    """Move every order matching the filter to target and return how many moved
+
+    Candidates are read in id order one chunk at a time, so the filter never
+    holds locks on more than BULK_STATUS_CHUNK_SIZE orders at once.
+    """
+    sources = source_statuses(target)
+    if current_status is not None:
+        sources = [source for source in sources if source == current_status]
+
+    if not sources:
+        return 0
+
+    moved = 0
+    last_id = 0
+
+    while True:
+        query = db.query(Order.id).filter(Order.status.in_(sources), Order.id > last_id)
+
+        if date_from is not None:
+            query = query.filter(Order.created_at >= date_from)
+
+        if date_to is not None:
+            query = query.filter(Order.created_at < date_to)
+
+        chunk = [order_id for (order_id,) in query.order_by(Order.id).limit(BULK_STATUS_CHUNK_SIZE)]
+
+        if not chunk:
+            break
+
+        moved += len(_transition_chunk(db, chunk, target))
+        last_id = chunk[-1]
+
+    return moved
@@ -0,0 +1,153 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import IdempotencyKey
+
+IDEMPOTENCY_TTL = timedelta(hours=24)
+MAX_KEY_LENGTH = 255
+
+# Client errors that depend on timing rather than the request, so a retry may succeed
+NON_CACHEABLE_STATUSES = {status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS}
+
+class StateDependentHTTPException(HTTPException):
+    """A client error caused by current state, such as stock levels, rather than the request
+
+    It is never stored against an idempotency key, so a retry with the same
+    key runs again and can succeed once the state changes.
+    """
+
+def _request_hash(payload) -> str:
+    """Fingerprint a request body so a key can't be reused for a different request"""
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def _replay(record: IdempotencyKey) -> JSONResponse:
+    """Rebuild the stored response for a retried request"""
+    return JSONResponse(
+        status_code=record.status_code,
+        content=json.loads(record.response_body),
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+def _claim_key(db: Session, user_id: int, scope: str, key: str, request_hash: str):
+    """Reserve a key for this request, or return the response already stored for it"""
+    now = datetime.now(timezone.utc)
+    key_filter = (
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key
+    )
+
+    # An expired key is free to be used again
+    if db.query(IdempotencyKey).filter(*key_filter, IdempotencyKey.expires_at <= now).delete(synchronize_session=False):
+        db.commit()
+
+    existing = db.query(IdempotencyKey).filter(*key_filter).first()
+
+    if existing is None:
+        record = IdempotencyKey(
+            user_id=user_id,
+            scope=scope,
+            key=key,
+            request_hash=request_hash,
+            expires_at=now + IDEMPOTENCY_TTL
+        )
+        db.add(record)
+        try:
+            # Committed on its own so concurrent retries see the claim immediately
+            db.commit()
+            return record, None
+        except IntegrityError:
+            db.rollback()
+            existing = db.query(IdempotencyKey).filter(*key_filter).first()
+
+    if existing.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+
+    if existing.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed"
+        )
+
+    return None, _replay(existing)
+
+def _store_response(db: Session, record: IdempotencyKey, status_code: int, body):
+    """Save the final response against a claimed key"""
+    record.status_code = status_code
+    record.response_body = json.dumps(body)
+    db.commit()
+
+def _release_key(db: Session, record: IdempotencyKey):
+    """Give up a claim so the client can retry the request for real"""
+    db.rollback()
+    db.delete(record)
+    db.commit()
+
+async def run_idempotent(
+    db: Session,
+    user_id: int,
+    scope: str,
+    key: Optional[str],
+    payload,
+    handler: Callable[[], Awaitable],
+    response_model=None
+):
+    """Run handler at most once per (user, scope, key) and replay its response on retries
+
+    Successful responses and deterministic client errors are stored for
+    IDEMPOTENCY_TTL. Server errors and state-dependent client errors release
+    the key so a retry runs again.
+    """
+    if not key:
+        return await handler()
+
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"
+        )
+
+    record, replay = _claim_key(db, user_id, scope, key, _request_hash(payload))
+    if replay is not None:
+        return replay
+
+    try:
+        result = await handler()
+    except HTTPException as e:
+        if (
+            e.status_code >= 500
+            or e.status_code in NON_CACHEABLE_STATUSES
+            or isinstance(e, StateDependentHTTPException)
+        ):
+            _release_key(db, record)
+        else:
+            _store_response(db, record, e.status_code, {"detail": e.detail})
+        raise
+    except Exception:
+        _release_key(db, record)
+        raise
+
+    if response_model is not None:
+        result = response_model.model_validate(result)
+    body = jsonable_encoder(result)
+    _store_response(db, record, status.HTTP_200_OK, body)
+
+    return JSONResponse(status_code=status.HTTP_200_OK, content=body)
+
+def purge_expired_idempotency_keys(db: Session) -> int:
+    """Delete stored responses whose TTL has passed"""
+    deleted = db.query(IdempotencyKey).filter(
+        IdempotencyKey.expires_at <= datetime.now(timezone.utc)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
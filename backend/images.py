@@ -0,0 +1,89 @@
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Product images live under the /static mount so StaticFiles can serve them
+STATIC_DIR = "static"
+PRODUCT_IMAGE_DIR = os.path.join(STATIC_DIR, "products")
+PRODUCT_IMAGE_URL = "/static/products"
+
+# Bounding box (width, height) for each pre-sized variant
+IMAGE_VARIANTS = {
+    "thumbnail": (160, 160),
+    "card": (480, 360),
+    "detail": (1200, 900),
+}
+
+IMAGE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the resize process pool on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=int(os.getenv("IMAGE_WORKERS", "2")))
+    return _executor
+
+def shutdown_image_workers():
+    """Stop the resize process pool"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def generate_image_variants(data: bytes, output_dir: str = PRODUCT_IMAGE_DIR) -> dict:
+    """Write every variant, then store the original image, with content-hashed filenames
+
+    Runs inside the process pool, so it only takes and returns picklable values.
+    """
+    # Pillow is only needed by the resize workers
+    from PIL import Image, ImageOps
+
+    content_hash = hashlib.sha256(data).hexdigest()[:16]
+
+    image = Image.open(io.BytesIO(data))
+    original_format = (image.format or "PNG").lower()
+    image = ImageOps.exif_transpose(image)
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    # static/products isn't checked in, so the first upload creates it
+    os.makedirs(output_dir, exist_ok=True)
+
+    variants = {}
+    for variant, size in IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+
+        variants[variant] = {}
+        for extension, (pil_format, options) in IMAGE_FORMATS.items():
+            output = resized
+            if pil_format == "JPEG" and output.mode != "RGB":
+                output = output.convert("RGB")
+
+            filename = f"{content_hash}-{variant}.{extension}"
+            output.save(os.path.join(output_dir, filename), pil_format, **options)
+            variants[variant][extension] = f"{PRODUCT_IMAGE_URL}/{filename}"
+
+    # Only keep the original once every variant exists, so a failed resize leaves no orphan
+    originals_dir = os.path.join(output_dir, "originals")
+    os.makedirs(originals_dir, exist_ok=True)
+    with open(os.path.join(originals_dir, f"{content_hash}.{original_format}"), "wb") as original:
+        original.write(data)
+
+    return variants
+
+async def process_product_image(data: bytes) -> dict:
+    """Resize an uploaded product image in the process pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), generate_image_variants, data)
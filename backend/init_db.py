@@ -15,6 +15,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from models import Base, User, UserRole, Consultant, Consultation, ConsultationStatus, Product
 from auth import get_password_hash
+from nutrition import apply_nutrition
 from datetime import datetime, timedelta
 
 # Load environment variables
@@ -308,6 +309,7 @@ def init_database():
             
             # Add all products to database
             for product in products:
+                apply_nutrition(product)
                 db.add(product)
             
             db.commit()
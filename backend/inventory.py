@@ -0,0 +1,247 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+from models import InventoryHold, HoldStatus, Order, OrderItem, OrderStatus, PaymentStatus, Product
+from cache import invalidate_product_snapshots
+from outbox import enqueue_event
+
+# How long an unpaid order keeps its stock before the sweeper gives it back
+INVENTORY_HOLD_TTL = timedelta(minutes=int(os.getenv("INVENTORY_HOLD_MINUTES", "30")))
+HOLD_SWEEP_INTERVAL_SECONDS = 60
+HOLD_SWEEP_BATCH_SIZE = 500
+
+# Unpaid orders in these states may be expired; anything further along was
+# moved forward by an admin and keeps its stock
+UNFULFILLED_STATUSES = (OrderStatus.PENDING, OrderStatus.CANCELLED)
+
+def create_holds(db: Session, order_id: int, quantities: Dict[int, int]):
+    """Record the stock reserved for a new order; the caller owns the transaction"""
+    expires_at = datetime.now(timezone.utc) + INVENTORY_HOLD_TTL
+    db.add_all([
+        InventoryHold(
+            order_id=order_id,
+            product_id=product_id,
+            quantity=quantity,
+            expires_at=expires_at
+        )
+        for product_id, quantity in quantities.items()
+    ])
+
+def release_holds(
+    db: Session,
+    order_ids: List[int],
+    statuses=(HoldStatus.ACTIVE,)
+) -> List[int]:
+    """Return the stock of every hold on these orders that is in one of statuses
+
+    Holds are flipped to released with a conditional UPDATE first, so two
+    workers releasing the same order can never restore its stock twice.
+    Returns the product ids whose stock changed.
+    """
+    released = db.execute(
+        update(InventoryHold)
+        .where(
+            InventoryHold.order_id.in_(order_ids),
+            InventoryHold.status.in_(statuses)
+        )
+        .values(status=HoldStatus.RELEASED, resolved_at=datetime.now(timezone.utc))
+        .returning(InventoryHold.product_id, InventoryHold.quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    quantities = {}
+    for product_id, quantity in released:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+    return _restock(db, quantities)
+
+def _restock(db: Session, quantities: Dict[int, int]) -> List[int]:
+    """Atomically add stock back, in product-id order to match checkout's locking order"""
+    for product_id in sorted(quantities):
+        db.execute(
+            update(Product)
+            .where(Product.id == product_id)
+            .values(stock_quantity=Product.stock_quantity + quantities[product_id])
+            .execution_options(synchronize_session=False)
+        )
+
+    return list(quantities)
+
+def restore_order_stock(db: Session, order_ids: List[int]) -> List[int]:
+    """Give back the stock of cancelled orders, paid or not
+
+    Orders placed before holds existed have no hold rows, so their stock
+    comes back from their items instead. Returns the product ids whose
+    stock changed. The caller owns the transaction.
+    """
+    held_ids = [
+        order_id for (order_id,) in db.query(InventoryHold.order_id).filter(
+            InventoryHold.order_id.in_(order_ids)
+        ).distinct()
+    ]
+    product_ids = set(release_holds(db, held_ids, (HoldStatus.ACTIVE, HoldStatus.COMMITTED)))
+
+    legacy_ids = set(order_ids) - set(held_ids)
+    if legacy_ids:
+        quantities = dict(
+            db.query(OrderItem.product_id, func.sum(OrderItem.quantity)).filter(
+                OrderItem.order_id.in_(legacy_ids)
+            ).group_by(OrderItem.product_id).all()
+        )
+        product_ids.update(_restock(db, quantities))
+
+    return list(product_ids)
+
+def enqueue_order_cancellations(db: Session, order_ids: List[int]):
+    """Queue an order.cancelled event for each order that just became cancelled
+
+    Call it only for orders this transaction moved into the cancelled state,
+    so a cancellation is never announced twice. The caller owns the transaction.
+    """
+    if not order_ids:
+        return
+
+    product_ids = {}
+    for order_id, product_id in db.query(OrderItem.order_id, OrderItem.product_id).filter(
+        OrderItem.order_id.in_(order_ids),
+        OrderItem.product_id.isnot(None)
+    ).distinct():
+        product_ids.setdefault(order_id, []).append(product_id)
+
+    for order_id in order_ids:
+        enqueue_event(db, "order.cancelled", {
+            "order_id": order_id,
+            "product_ids": sorted(product_ids.get(order_id, []))
+        }, "order", order_id)
+
+def finalize_paid_orders(db: Session, order_ids: List[int]) -> List[Tuple[int, int, str]]:
+    """Mark pending orders paid and make their holds permanent
+
+    Orders that already left the pending state, e.g. because the sweeper
+    expired them or the customer cancelled them while the payment was being
+    confirmed, are skipped; record_cancelled_captures handles the cancelled
+    ones. Returns (id, user_id, order_number) for the orders that were
+    finalized. The caller owns the transaction.
+    """
+    finalized = db.execute(
+        update(Order)
+        .where(
+            Order.id.in_(order_ids),
+            Order.payment_status == PaymentStatus.PENDING,
+            Order.status == OrderStatus.PENDING
+        )
+        .values(payment_status=PaymentStatus.COMPLETED, status=OrderStatus.CONFIRMED)
+        .returning(Order.id, Order.user_id, Order.order_number)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if not finalized:
+        return []
+
+    db.execute(
+        update(InventoryHold)
+        .where(
+            InventoryHold.order_id.in_([order_id for order_id, _, _ in finalized]),
+            InventoryHold.status == HoldStatus.ACTIVE
+        )
+        .values(status=HoldStatus.COMMITTED, resolved_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    return finalized
+
+def finalize_paid_order(db: Session, order_id: int) -> bool:
+    """Finalize a single paid order; False if it was no longer pending"""
+    return bool(finalize_paid_orders(db, [order_id]))
+
+def record_cancelled_captures(db: Session, order_ids: List[int]) -> List[str]:
+    """Record captured payments on orders that were already cancelled
+
+    Their stock has been released and may have been sold again, so the
+    order stays cancelled and the payment needs refunding. Returns the
+    affected order numbers. The caller owns the transaction.
+    """
+    return db.execute(
+        update(Order)
+        .where(
+            Order.id.in_(order_ids),
+            Order.payment_status.in_([PaymentStatus.PENDING, PaymentStatus.FAILED]),
+            Order.status == OrderStatus.CANCELLED
+        )
+        .values(payment_status=PaymentStatus.COMPLETED)
+        .returning(Order.order_number)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+def fail_unpaid_orders(db: Session, order_ids: List[int]) -> List[int]:
+    """Cancel orders whose payment failed or never arrived and release their stock
+
+    Only orders still awaiting payment that no admin has moved forward are
+    touched; the conditional UPDATE makes this safe to race against
+    finalize_paid_order. Orders placed before holds existed get their stock
+    back from their items, like restore_order_stock. Returns the product
+    ids whose stock changed. The caller owns the transaction.
+    """
+    def fail(current_status):
+        return db.execute(
+            update(Order)
+            .where(
+                Order.id.in_(order_ids),
+                Order.payment_status == PaymentStatus.PENDING,
+                Order.status == current_status
+            )
+            .values(payment_status=PaymentStatus.FAILED, status=OrderStatus.CANCELLED)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+
+    # Split by status so only orders cancelled here are announced as cancellations
+    cancelled_ids = fail(OrderStatus.PENDING)
+    failed_ids = cancelled_ids + fail(OrderStatus.CANCELLED)
+
+    if not failed_ids:
+        return []
+
+    enqueue_order_cancellations(db, cancelled_ids)
+
+    # Orders that were already cancelled gave their stock back then
+    return restore_order_stock(db, cancelled_ids)
+
+def release_expired_holds(db: Session, batch_size: int = HOLD_SWEEP_BATCH_SIZE) -> int:
+    """Cancel unpaid orders whose holds have expired and give their stock back
+
+    Walks the (payment_status, created_at) index in batches, checking each
+    order's hold expiry. Orders placed before holds existed have no expiry,
+    so they expire one hold window after they were created. Every order it
+    touches leaves the pending payment state, so each run only sees new work.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - INVENTORY_HOLD_TTL
+    expired_orders = 0
+
+    order_holds = InventoryHold.order_id == Order.id
+    expired = or_(
+        db.query(InventoryHold.id).filter(order_holds, InventoryHold.expires_at < now).exists(),
+        and_(~db.query(InventoryHold.id).filter(order_holds).exists(), Order.created_at < cutoff)
+    )
+
+    while True:
+        order_ids = [
+            order_id for (order_id,) in db.query(Order.id).filter(
+                Order.payment_status == PaymentStatus.PENDING,
+                Order.status.in_(UNFULFILLED_STATUSES),
+                expired
+            ).order_by(Order.created_at).limit(batch_size)
+        ]
+
+        if not order_ids:
+            break
+
+        product_ids = fail_unpaid_orders(db, order_ids)
+        db.commit()
+
+        invalidate_product_snapshots(product_ids)
+        expired_orders += len(order_ids)
+
+    return expired_orders
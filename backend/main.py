@@ -11,6 +11,21 @@ from database import get_db, engine
 from models import Base
 from routers import auth, users, consultants, consultations, products, orders, admin, notifications, payments
 from middleware import setup_middleware
+from images import shutdown_image_workers
+from routers.payments import shutdown_payment_gateway
+from background import start_background_tasks, stop_background_tasks
+from inventory import release_expired_holds, HOLD_SWEEP_INTERVAL_SECONDS
+from idempotency import purge_expired_idempotency_keys
+from outbox import dispatch_outbox, purge_processed_outbox_events, OUTBOX_POLL_INTERVAL_SECONDS
+from payment_webhooks import process_payment_webhooks, WEBHOOK_POLL_INTERVAL_SECONDS
+from reconciliation import reconcile_payments, RECONCILE_INTERVAL_SECONDS
+from broadcasts import run_broadcast_jobs, BROADCAST_POLL_INTERVAL_SECONDS
+from delivery import deliver_pending, purge_sent_deliveries, shutdown_delivery_workers, DELIVERY_POLL_INTERVAL_SECONDS
+from notification_hub import notification_hub
+from email_templates import load_email_templates
+from notification_archive import (
+    archive_read_notifications, ensure_notification_partitions, ARCHIVE_INTERVAL_SECONDS, PARTITION_INTERVAL_SECONDS
+)
 
 # Load environment variables
 try:
@@ -35,6 +50,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Setup custom middleware
@@ -65,6 +81,33 @@ app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 app.include_router(notifications.router, prefix="/notifications", tags=["Notifications"])
 app.include_router(payments.router, prefix="/payments", tags=["Payments"])
 
+@app.on_event("startup")
+async def start_workers():
+    load_email_templates()
+    # Without a reachable REDIS_URL, notification streams only see notifications created by this worker
+    await notification_hub.start(os.getenv("REDIS_URL"))
+    start_background_tasks([
+        ("inventory-hold-sweeper", HOLD_SWEEP_INTERVAL_SECONDS, release_expired_holds),
+        ("idempotency-key-purge", 3600, purge_expired_idempotency_keys),
+        ("outbox-dispatcher", OUTBOX_POLL_INTERVAL_SECONDS, dispatch_outbox),
+        ("outbox-purge", 3600, purge_processed_outbox_events),
+        ("payment-webhooks", WEBHOOK_POLL_INTERVAL_SECONDS, process_payment_webhooks),
+        ("payment-reconciliation", RECONCILE_INTERVAL_SECONDS, reconcile_payments),
+        ("broadcast-jobs", BROADCAST_POLL_INTERVAL_SECONDS, run_broadcast_jobs),
+        ("notification-delivery", DELIVERY_POLL_INTERVAL_SECONDS, deliver_pending),
+        ("notification-delivery-purge", 3600, purge_sent_deliveries),
+        ("notification-archiver", ARCHIVE_INTERVAL_SECONDS, archive_read_notifications),
+        ("notification-partitions", PARTITION_INTERVAL_SECONDS, ensure_notification_partitions),
+    ])
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    await stop_background_tasks()
+    shutdown_image_workers()
+    shutdown_payment_gateway()
+    shutdown_delivery_workers()
+    await notification_hub.stop()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to FitLife360 API"}
@@ -12,7 +12,8 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         start_time = time.time()
         
         # Log request
-        logger.info(f"Request: {request.method} {request.url}")
+        # Notification streams carry the access token in the query string
+        logger.info(f"Request: {request.method} {request.url.remove_query_params('token')}")
         
         # Process request
         response = await call_next(request)
@@ -35,7 +36,20 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         
         return response
 
+class StaticCacheMiddleware(BaseHTTPMiddleware):
+    # Files under these prefixes have content-hashed names and never change
+    IMMUTABLE_PREFIXES = ("/static/products/",)
+    
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        
+        if response.status_code == 200 and request.url.path.startswith(self.IMMUTABLE_PREFIXES):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        
+        return response
+
 def setup_middleware(app: FastAPI):
     """Setup all middleware for the application"""
     app.add_middleware(LoggingMiddleware)
     app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(StaticCacheMiddleware)
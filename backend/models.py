@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -28,6 +28,34 @@ class PaymentStatus(str, enum.Enum):
     FAILED = "failed"
     REFUNDED = "refunded"
 
+class HoldStatus(str, enum.Enum):
+    ACTIVE = "active"
+    COMMITTED = "committed"
+    RELEASED = "released"
+
+class WebhookEventStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+    IGNORED = "ignored"
+    FAILED = "failed"
+
+class OutboxStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+class DeliveryStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class BroadcastStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -115,14 +143,21 @@ class Product(Base):
     __tablename__ = "products"
     
     id = Column(Integer, primary_key=True, index=True)
+    sku = Column(String(64), unique=True, index=True)  # Supplier SKU used by bulk imports
     name = Column(String(200), nullable=False)
     description = Column(Text)
     category = Column(String(50))  # supplements, snacks, equipment, etc.
     price = Column(Float, nullable=False)
     stock_quantity = Column(Integer, default=0)
     image_url = Column(String(500))
+    image_variants = Column(Text)  # JSON string of pre-sized local image URLs
     ingredients = Column(Text)
     nutritional_info = Column(Text)  # JSON string
+    # Typed copies of nutritional_info, kept in sync on write for range filters
+    protein_g = Column(Float, index=True)
+    carbs_g = Column(Float, index=True)
+    fat_g = Column(Float, index=True)
+    calories = Column(Float, index=True)
     rating = Column(Float, default=0.0)
     total_reviews = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
@@ -152,6 +187,14 @@ class Order(Base):
     # Relationships
     user = relationship("User", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order")
+    
+    __table_args__ = (
+        # Keyset pagination over (created_at, id), overall and per user
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_user_created_at_id", "user_id", "created_at", "id"),
+        # Lets the inventory hold sweeper find stale unpaid orders cheaply
+        Index("ix_orders_payment_status_created_at", "payment_status", "created_at"),
+    )
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -167,6 +210,38 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="order_items")
     product = relationship("Product", back_populates="order_items")
 
+class InventoryHold(Base):
+    __tablename__ = "inventory_holds"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(Enum(HoldStatus), default=HoldStatus.ACTIVE, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    resolved_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    order = relationship("Order")
+    product = relationship("Product")
+
+class ProductCooccurrence(Base):
+    __tablename__ = "product_cooccurrences"
+    
+    # Stored in both directions so top-K for a product is one index range scan
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    related_product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_product_cooccurrences_top", "product_id", "order_count"),
+    )
+    
+    # Relationships
+    related_product = relationship("Product", foreign_keys=[related_product_id])
+
 class ProgressRecord(Base):
     __tablename__ = "progress_records"
     
@@ -211,6 +286,80 @@ class Notification(Base):
     
     # Relationships
     user = relationship("User")
+    
+    __table_args__ = (
+        # Backs the unread-count reconciliation and the unread filters
+        Index("ix_notifications_user_id_is_read", "user_id", "is_read"),
+        # Newest-first keyset pages, across all users and per user
+        Index("ix_notifications_created_at_id", "created_at", "id"),
+        Index("ix_notifications_user_created_at_id", "user_id", "created_at", "id"),
+    )
+
+class NotificationArchive(Base):
+    __tablename__ = "notifications_archive"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # the id it had in notifications
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    title = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+    type = Column(String(50))
+    is_read = Column(Boolean, default=True)
+    sent_via_email = Column(Boolean, default=False)
+    sent_via_sms = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_notifications_archive_user_created_at", "user_id", "created_at"),
+    )
+
+class NotificationCounter(Base):
+    __tablename__ = "notification_counters"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread_count = Column(Integer, default=0, nullable=False)
+    reconciled_at = Column(DateTime(timezone=True), nullable=False)  # last recount from the notifications table
+
+class NotificationDelivery(Base):
+    __tablename__ = "notification_deliveries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete="CASCADE"), index=True)  # null for emails with no in-app copy
+    channel = Column(String(20), nullable=False)  # email or sms
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(200))
+    body = Column(Text, nullable=False)
+    status = Column(Enum(DeliveryStatus), default=DeliveryStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    available_at = Column(DateTime(timezone=True), nullable=False)  # next attempt, or lease expiry while sending
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # Workers poll for deliveries that are due or whose lease ran out
+        Index("ix_notification_deliveries_status_available_at", "status", "available_at"),
+    )
+
+class BroadcastJob(Base):
+    __tablename__ = "broadcast_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    title = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+    type = Column(String(50))
+    send_email = Column(Boolean, default=False, nullable=False)
+    send_sms = Column(Boolean, default=False, nullable=False)
+    status = Column(Enum(BroadcastStatus), default=BroadcastStatus.PENDING, nullable=False)
+    total_recipients = Column(Integer)  # active users counted when the job starts
+    sent_count = Column(Integer, default=0, nullable=False)
+    last_user_id = Column(Integer, default=0, nullable=False)  # resume point; users are walked in id order
+    error = Column(Text)
+    heartbeat_at = Column(DateTime(timezone=True))  # bumped per chunk so stalled jobs can be reclaimed
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
 
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
@@ -223,4 +372,59 @@ class PasswordResetToken(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    scope = Column(String(100), nullable=False)  # endpoint the key applies to, e.g. orders.create
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer)  # NULL while the original request is still running
+    response_body = Column(Text)  # JSON string
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    __table_args__ = (
+        UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_keys_user_scope_key"),
+    )
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_type = Column(String(100), nullable=False)  # e.g. order.paid
+    handler = Column(String(100), nullable=False)  # one row per registered handler
+    aggregate_type = Column(String(50))
+    aggregate_id = Column(Integer)
+    payload = Column(Text, nullable=False)  # JSON string
+    status = Column(Enum(OutboxStatus), default=OutboxStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    available_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # The dispatcher polls for pending events that are due
+        Index("ix_outbox_events_status_available_at", "status", "available_at"),
+    )
+
+class PaymentWebhookEvent(Base):
+    __tablename__ = "payment_webhook_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String(100), unique=True, nullable=False)  # gateway event id, used to drop redeliveries
+    event_type = Column(String(100), nullable=False)  # e.g. payment.captured
+    payload = Column(Text, nullable=False)  # raw JSON body as received
+    status = Column(Enum(WebhookEventStatus), default=WebhookEventStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_payment_webhook_events_status_id", "status", "id"),
+    )
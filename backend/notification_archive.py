@@ -0,0 +1,149 @@
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.orm import Session
+from models import Notification, NotificationArchive
+from notification_counts import adjust_unread_counts
+
+# Read notifications older than this are moved to notifications_archive
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+ARCHIVE_INTERVAL_SECONDS = 3600
+ARCHIVE_BATCH_SIZE = 5000
+ARCHIVE_MAX_BATCHES_PER_RUN = 20
+MARK_READ_CHUNK_SIZE = 5000
+# Monthly partitions kept ready ahead of time on a partitioned notifications table
+PARTITION_MONTHS_AHEAD = 3
+PARTITION_INTERVAL_SECONDS = 86400
+
+ARCHIVED_COLUMNS = [
+    "id", "user_id", "title", "message", "type", "is_read",
+    "sent_via_email", "sent_via_sms", "created_at"
+]
+
+def archive_read_notifications(
+    db: Session,
+    retention: Optional[timedelta] = None,
+    batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """Move read notifications past the retention period to the archive; returns how many moved
+
+    Each batch is locked with SKIP LOCKED, copied and deleted in one
+    transaction, so a row is never in both tables or in neither, and two
+    archivers never fight over the same rows. Only read rows move, so the
+    unread counters are unaffected.
+    """
+    cutoff = datetime.now(timezone.utc) - (retention or timedelta(days=NOTIFICATION_RETENTION_DAYS))
+    archived = 0
+
+    for _ in range(ARCHIVE_MAX_BATCHES_PER_RUN):
+        notification_ids = [
+            notification_id for (notification_id,) in db.query(Notification.id).filter(
+                Notification.is_read == True,
+                Notification.created_at < cutoff
+            ).order_by(Notification.created_at, Notification.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        ]
+
+        if not notification_ids:
+            break
+
+        columns = [getattr(Notification, column) for column in ARCHIVED_COLUMNS]
+        db.execute(
+            insert(NotificationArchive).from_select(
+                ARCHIVED_COLUMNS,
+                select(*columns).where(Notification.id.in_(notification_ids))
+            )
+        )
+        db.query(Notification).filter(Notification.id.in_(notification_ids)).delete(synchronize_session=False)
+        db.commit()
+
+        archived += len(notification_ids)
+        if len(notification_ids) < batch_size:
+            break
+
+    return archived
+
+def mark_all_read_in_chunks(db: Session, chunk_size: int = MARK_READ_CHUNK_SIZE) -> int:
+    """Mark every unread notification read, committing one id range at a time
+
+    A single UPDATE over the whole table would hold its row locks and grow
+    its transaction with the table; chunks keep both bounded. Each chunk
+    takes its own rows off the owners' unread counters.
+    """
+    marked = 0
+    last_id = 0
+
+    while True:
+        notification_ids = [
+            notification_id for (notification_id,) in db.query(Notification.id).filter(
+                Notification.is_read == False,
+                Notification.id > last_id
+            ).order_by(Notification.id).limit(chunk_size).all()
+        ]
+
+        if not notification_ids:
+            break
+
+        user_ids = db.execute(
+            update(Notification)
+            .where(Notification.id.in_(notification_ids), Notification.is_read == False)
+            .values(is_read=True)
+            .returning(Notification.user_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+
+        adjust_unread_counts(db, {user_id: -count for user_id, count in Counter(user_ids).items()})
+        db.commit()
+
+        marked += len(user_ids)
+        last_id = notification_ids[-1]
+
+    return marked
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def is_partitioned(db) -> bool:
+    """Whether notifications is a Postgres partitioned table"""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'notifications'::regclass)"
+    )).scalar()
+
+def create_month_partitions(db, first_month: date, last_month: date) -> int:
+    """Create the monthly partitions of notifications from first_month to last_month inclusive"""
+    created = 0
+    month = _month_start(first_month)
+
+    while month <= last_month:
+        following = _next_month(month)
+        name = f"notifications_y{month.year}m{month.month:02d}"
+        exists = db.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+        if not exists:
+            db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF notifications "
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{following.isoformat()} 00:00:00+00')"
+            ))
+            created += 1
+        month = following
+
+    return created
+
+def ensure_notification_partitions(db: Session, months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """Keep this and the next months_ahead months' partitions in place; a no-op unless partitioned"""
+    if not is_partitioned(db):
+        return 0
+
+    this_month = _month_start(datetime.now(timezone.utc).date())
+    last_month = this_month
+    for _ in range(months_ahead):
+        last_month = _next_month(last_month)
+
+    created = create_month_partitions(db, this_month, last_month)
+    db.commit()
+    return created
@@ -0,0 +1,73 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from database import dialect_insert
+from models import Notification, NotificationCounter
+
+# Counters are recounted from the notifications table once they are this old,
+# which bounds any drift from writes that raced a recount
+UNREAD_COUNT_MAX_AGE = timedelta(minutes=10)
+
+def adjust_unread_counts(db: Session, deltas: Dict[int, int]):
+    """Apply per-user changes to the unread counters; the caller owns the transaction
+
+    Only existing counters are touched. A user without one is counted from
+    scratch on their next read, so writers never need to create them.
+    """
+    user_ids_by_delta = {}
+    for user_id, delta in deltas.items():
+        if delta:
+            user_ids_by_delta.setdefault(delta, []).append(user_id)
+
+    for delta, user_ids in user_ids_by_delta.items():
+        db.execute(
+            update(NotificationCounter)
+            .where(NotificationCounter.user_id.in_(user_ids))
+            .values(unread_count=NotificationCounter.unread_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+def count_new_notifications(db: Session, user_ids: Iterable[int]):
+    """Add one unread notification per occurrence of a user id"""
+    adjust_unread_counts(db, Counter(user_ids))
+
+def reset_unread_counts(db: Session, user_ids=None):
+    """Forget counters so they are recounted on next read; all of them if user_ids is None"""
+    query = db.query(NotificationCounter)
+    if user_ids is not None:
+        query = query.filter(NotificationCounter.user_id.in_(user_ids))
+    query.delete(synchronize_session=False)
+
+def get_unread_count(db: Session, user_id: int) -> int:
+    """Unread notifications for a user: a primary-key lookup, or an indexed recount when stale"""
+    unread_count = db.query(NotificationCounter.unread_count).filter(
+        NotificationCounter.user_id == user_id,
+        NotificationCounter.reconciled_at > datetime.now(timezone.utc) - UNREAD_COUNT_MAX_AGE
+    ).scalar()
+
+    if unread_count is None:
+        unread_count = reconcile_unread_count(db, user_id)
+
+    return max(unread_count, 0)
+
+def reconcile_unread_count(db: Session, user_id: int) -> int:
+    """Recount a user's unread notifications over (user_id, is_read) and store the result"""
+    unread_count = db.query(func.count(Notification.id)).filter(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    ).scalar()
+    now = datetime.now(timezone.utc)
+
+    statement = dialect_insert(db, NotificationCounter.__table__).values(
+        user_id=user_id,
+        unread_count=unread_count,
+        reconciled_at=now
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={"unread_count": unread_count, "reconciled_at": now}
+    ))
+    db.commit()
+    return unread_count
@@ -0,0 +1,343 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Set
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, func, or_
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Notifications buffered per open stream; a client that falls this far behind is disconnected
+NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", "100"))
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = 15
+# Most notifications replayed to a reconnecting client before it is told to reload instead
+NOTIFICATION_STREAM_REPLAY_LIMIT = 200
+NOTIFICATION_STREAM_RETRY_MS = 3000
+# Ids aren't committed in order, so a notification can commit after one with a
+# higher id was already sent. A stream remembers this many ids it sent, and a
+# replay also resends anything created this recently below Last-Event-ID.
+NOTIFICATION_STREAM_SENT_IDS = 1000
+NOTIFICATION_STREAM_REPLAY_LOOKBACK = timedelta(seconds=60)
+REDIS_CHANNEL = "fitlife360:notifications"
+
+_PENDING_KEY = "pending_stream_notifications"
+
+def stream_notification(notification_id: int, user_id: int, title: str, message: str, notification_type: str) -> dict:
+    """The event pushed to a user's open streams for one new notification"""
+    return {
+        "id": notification_id,
+        "user_id": user_id,
+        "title": title,
+        "message": message,
+        "type": notification_type,
+        "is_read": False,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+
+def _encode(notifications: List[dict]) -> str:
+    """Serialize for the backplane, sending a broadcast's shared text once"""
+    groups = {}
+    for notification in notifications:
+        key = (notification["title"], notification["message"], notification["type"], notification["created_at"])
+        groups.setdefault(key, []).append([notification["id"], notification["user_id"]])
+
+    return json.dumps([
+        {"title": title, "message": message, "type": notification_type, "created_at": created_at, "recipients": recipients}
+        for (title, message, notification_type, created_at), recipients in groups.items()
+    ])
+
+def _decode(data) -> List[dict]:
+    return [
+        {
+            "id": notification_id,
+            "user_id": user_id,
+            "title": group["title"],
+            "message": group["message"],
+            "type": group["type"],
+            "is_read": False,
+            "created_at": group["created_at"]
+        }
+        for group in json.loads(data)
+        for notification_id, user_id in group["recipients"]
+    ]
+
+class Subscription:
+    """The buffer of one open stream"""
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, notification: dict):
+        try:
+            self.queue.put_nowait(notification)
+        except asyncio.QueueFull:
+            # Don't let a slow client hold memory; it reconnects and replays from the table
+            self.overflowed = True
+
+class LocalBackplane:
+    """Delivers to this process's streams only; enough for a single worker"""
+
+    def __init__(self, hub: "NotificationHub"):
+        self.hub = hub
+
+    def publish(self, notifications: List[dict]):
+        self.hub.deliver(notifications)
+
+    async def close(self):
+        pass
+
+class RedisBackplane:
+    """Relays notifications over a Redis channel so streams on every worker receive them"""
+
+    def __init__(self, hub: "NotificationHub", client, channel: str):
+        self.hub = hub
+        self.client = client
+        self.channel = channel
+        self._publishing: Set[asyncio.Task] = set()
+        self._listener: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def connect(cls, hub: "NotificationHub", url: str, channel: str = REDIS_CHANNEL) -> "RedisBackplane":
+        import redis.asyncio as redis
+
+        client = redis.from_url(url)
+        await client.ping()
+        backplane = cls(hub, client, channel)
+        backplane._listener = asyncio.create_task(backplane._listen(), name="notification-backplane")
+        return backplane
+
+    def publish(self, notifications: List[dict]):
+        task = asyncio.create_task(self.client.publish(self.channel, _encode(notifications)))
+        self._publishing.add(task)
+        task.add_done_callback(lambda done: self._published(done, notifications))
+
+    def _published(self, task: asyncio.Task, notifications: List[dict]):
+        self._publishing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # Redis is down; at least this worker's clients get them now, the rest on reconnect
+            logger.warning(f"Notification backplane publish failed: {task.exception()}")
+            self.hub.deliver(notifications)
+
+    async def _listen(self):
+        """Feed every message on the channel to this process's streams, resubscribing after errors"""
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.hub.deliver(_decode(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Notification backplane subscription failed")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+        await asyncio.gather(*self._publishing, return_exceptions=True)
+        await self.client.aclose()
+
+class NotificationHub:
+    """Pushes new notifications to the users' open streams
+
+    publish() may be called from any thread; delivery to the streams always
+    happens on the event loop the hub was started on. Before start() and
+    after stop(), publishing is a no-op: clients pick up anything they
+    missed from the table when they reconnect.
+    """
+
+    def __init__(self, queue_size: int = NOTIFICATION_STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._backplane = None
+
+    async def start(self, redis_url: Optional[str] = None):
+        """Bind to the running loop and connect the backplane, falling back to local delivery"""
+        self._loop = asyncio.get_running_loop()
+        self._backplane = LocalBackplane(self)
+
+        if redis_url:
+            try:
+                self._backplane = await RedisBackplane.connect(self, redis_url)
+                logger.info("Notification streams use the Redis backplane")
+            except Exception as e:
+                logger.warning(f"Redis backplane unavailable, notification streams are local to this worker: {e}")
+
+    async def stop(self):
+        backplane, self._backplane, self._loop = self._backplane, None, None
+        if backplane is not None:
+            await backplane.close()
+
+    @property
+    def connections(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def publish(self, notifications: List[dict]):
+        """Send stream_notification() events to their users on every worker"""
+        loop = self._loop
+        if loop is None or not notifications:
+            return
+        try:
+            loop.call_soon_threadsafe(self._publish, notifications)
+        except RuntimeError:
+            # The loop closed during shutdown
+            pass
+
+    def _publish(self, notifications: List[dict]):
+        if self._backplane is not None:
+            self._backplane.publish(notifications)
+
+    def deliver(self, notifications: List[dict]):
+        """Hand notifications to the streams open in this process; runs on the loop"""
+        for notification in notifications:
+            for subscription in self._subscriptions.get(notification["user_id"], ()):
+                subscription.offer(notification)
+
+notification_hub = NotificationHub()
+
+def publish_after_commit(db: Session, notifications: List[dict]):
+    """Publish stream_notification() events once the session's transaction commits
+
+    Nothing is sent if it rolls back, so a client never sees a notification
+    that doesn't exist.
+    """
+    db.info.setdefault(_PENDING_KEY, []).extend(notifications)
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session):
+    notifications = session.info.pop(_PENDING_KEY, None)
+    if notifications:
+        notification_hub.publish(notifications)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+def _format_event(event_type: str, data: dict, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(data))}")
+    return "\n".join(lines) + "\n\n"
+
+class _SentIds:
+    """The most recent ids a stream has sent, forgetting the oldest past a fixed size"""
+
+    def __init__(self, size: int = NOTIFICATION_STREAM_SENT_IDS):
+        self._order = deque()
+        self._ids = set()
+        self._size = size
+
+    def __contains__(self, notification_id: int) -> bool:
+        return notification_id in self._ids
+
+    def add(self, notification_id: int):
+        if notification_id in self._ids:
+            return
+        self._order.append(notification_id)
+        self._ids.add(notification_id)
+        if len(self._order) > self._size:
+            self._ids.discard(self._order.popleft())
+
+def _missed_notifications(user_id: int, last_event_id: int):
+    """Notifications a reconnecting client may have missed, oldest first, or None if too many to replay
+
+    That is everything after last_event_id plus anything created within the
+    lookback window, which catches lower ids that committed late. The client
+    may already have some of the latter and skips them by id.
+    """
+    since = datetime.now(timezone.utc) - NOTIFICATION_STREAM_REPLAY_LOOKBACK
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            Notification.id,
+            Notification.user_id,
+            Notification.title,
+            Notification.message,
+            Notification.type,
+            Notification.is_read,
+            Notification.created_at
+        ).filter(
+            Notification.user_id == user_id,
+            or_(Notification.id > last_event_id, Notification.created_at >= since)
+        ).order_by(Notification.id).limit(NOTIFICATION_STREAM_REPLAY_LIMIT + 1).all()
+
+        if len(rows) > NOTIFICATION_STREAM_REPLAY_LIMIT:
+            latest_id = db.query(func.max(Notification.id)).filter(Notification.user_id == user_id).scalar()
+            return None, latest_id
+
+        return [dict(row._mapping) for row in rows], None
+    finally:
+        db.close()
+
+async def notification_event_stream(
+    user_id: int,
+    last_event_id: Optional[int] = None,
+    hub: NotificationHub = notification_hub,
+    heartbeat_seconds: float = NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+) -> AsyncIterator[str]:
+    """Server-Sent Events for one user's new notifications
+
+    Subscribes before replaying what a reconnecting client missed, so nothing
+    falls between the two; an id this stream already sent is skipped. Event
+    ids carry the highest id sent so far, for Last-Event-ID. A client too
+    far behind gets a "resync" event telling it to reload its list. A comment
+    line goes out every heartbeat_seconds to keep proxies from closing the
+    connection.
+    """
+    subscription = hub.subscribe(user_id)
+    try:
+        yield f"retry: {NOTIFICATION_STREAM_RETRY_MS}\n\n"
+        sent_id = last_event_id or 0
+        sent_ids = _SentIds()
+
+        if last_event_id is not None:
+            missed, latest_id = await asyncio.to_thread(_missed_notifications, user_id, last_event_id)
+            if missed is None:
+                sent_id = latest_id or sent_id
+                yield _format_event("resync", {}, sent_id)
+            else:
+                for notification in missed:
+                    sent_ids.add(notification["id"])
+                    sent_id = max(sent_id, notification["id"])
+                    yield _format_event("notification", notification, sent_id)
+
+        while not subscription.overflowed:
+            try:
+                notification = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+
+            if notification["id"] in sent_ids:
+                continue
+            sent_ids.add(notification["id"])
+            sent_id = max(sent_id, notification["id"])
+            yield _format_event("notification", notification, sent_id)
+    finally:
+        hub.unsubscribe(subscription)
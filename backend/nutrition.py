@@ -0,0 +1,73 @@
+import json
+import re
+from typing import Optional
+
+# Nutrient keys in Product.nutritional_info and the typed column each one is stored in
+NUTRIENT_COLUMNS = {
+    "protein": "protein_g",
+    "carbs": "carbs_g",
+    "fat": "fat_g",
+    "calories": "calories",
+}
+
+# Multipliers that convert a unit suffix into grams
+UNIT_TO_GRAMS = {
+    "": 1.0,
+    "g": 1.0,
+    "mg": 0.001,
+    "mcg": 0.000001,
+    "kg": 1000.0,
+}
+
+_AMOUNT_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*$")
+
+def parse_amount(value, grams: bool = True) -> Optional[float]:
+    """Parse an amount like "25g" or "120" into a number, returning None if it isn't one"""
+    if isinstance(value, bool) or value is None:
+        return None
+
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    match = _AMOUNT_PATTERN.match(str(value))
+    if not match:
+        return None
+
+    number = float(match.group(1))
+    unit = match.group(2).lower()
+
+    if not grams:
+        # Calories may carry a kcal/cal suffix but are never scaled
+        return number if unit in ("", "kcal", "cal") else None
+
+    if unit not in UNIT_TO_GRAMS:
+        return None
+
+    return number * UNIT_TO_GRAMS[unit]
+
+def parse_nutritional_info(raw: Optional[str]) -> dict:
+    """Parse a nutritional_info JSON string into typed nutrient column values"""
+    values = {column: None for column in NUTRIENT_COLUMNS.values()}
+
+    if not raw:
+        return values
+
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return values
+
+    if not isinstance(data, dict):
+        return values
+
+    for key, column in NUTRIENT_COLUMNS.items():
+        if key in data:
+            values[column] = parse_amount(data[key], grams=(key != "calories"))
+
+    return values
+
+def apply_nutrition(product):
+    """Refresh a product's typed nutrient columns from its nutritional_info"""
+    for column, value in parse_nutritional_info(product.nutritional_info).items():
+        setattr(product, column, value)
+    return product
@@ -0,0 +1,143 @@
+import json
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from models import OutboxEvent, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_BATCHES_PER_RUN = 20
+OUTBOX_POLL_INTERVAL_SECONDS = 1
+OUTBOX_MAX_ATTEMPTS = 8
+OUTBOX_RETRY_BASE_SECONDS = 2
+OUTBOX_RETRY_MAX_SECONDS = 600
+OUTBOX_RETENTION = timedelta(days=7)
+
+# event type -> {handler name: handler(db, payload)}
+_handlers: Dict[str, Dict[str, Callable]] = {}
+
+def register_handler(*event_types: str):
+    """Decorator subscribing handler(db, payload) to one or more event types
+
+    Each handler gets its own outbox row per event, so a failing handler is
+    retried alone. Handlers may still run more than once and must tolerate it.
+    """
+    def decorator(handler: Callable):
+        for event_type in event_types:
+            _handlers.setdefault(event_type, {})[handler.__name__] = handler
+        return handler
+    return decorator
+
+def _handlers_for(event_type: str) -> Dict[str, Callable]:
+    """The handlers subscribed to event_type
+
+    The handlers live in outbox_handlers, which is imported here rather than
+    by each entry point, so scripts and workers that enqueue or dispatch
+    events see the same handlers as the app.
+    """
+    import outbox_handlers  # noqa: F401  registers the handlers on first import
+    return _handlers.get(event_type, {})
+
+def enqueue_event(
+    db: Session,
+    event_type: str,
+    payload: dict,
+    aggregate_type: Optional[str] = None,
+    aggregate_id: Optional[int] = None
+):
+    """Add an event to the outbox; the caller commits it with its state change
+
+    Raises ValueError for an event type no handler subscribes to, which
+    would otherwise be dropped without a trace.
+    """
+    handler_names = list(_handlers_for(event_type))
+    if not handler_names:
+        raise ValueError(f"No outbox handlers registered for {event_type}")
+
+    encoded = json.dumps(jsonable_encoder(payload))
+    now = datetime.now(timezone.utc)
+
+    db.add_all([
+        OutboxEvent(
+            event_type=event_type,
+            handler=handler_name,
+            aggregate_type=aggregate_type,
+            aggregate_id=aggregate_id,
+            payload=encoded,
+            available_at=now
+        )
+        for handler_name in handler_names
+    ])
+
+def _retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with jitter so failing handlers don't retry in lockstep"""
+    delay = min(OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), OUTBOX_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.5))
+
+def _dispatch_event(db: Session, event: OutboxEvent):
+    """Run one event's handler inside a savepoint and record the outcome"""
+    handler = _handlers_for(event.event_type).get(event.handler)
+    now = datetime.now(timezone.utc)
+
+    if handler is None:
+        event.status = OutboxStatus.FAILED
+        event.last_error = f"No handler named {event.handler}"
+        return
+
+    try:
+        with db.begin_nested():
+            handler(db, json.loads(event.payload))
+    except Exception as e:
+        event.attempts += 1
+        event.last_error = str(e)[:2000]
+
+        if event.attempts >= OUTBOX_MAX_ATTEMPTS:
+            event.status = OutboxStatus.FAILED
+            logger.error(f"Outbox event {event.id} ({event.event_type} -> {event.handler}) gave up: {e}")
+        else:
+            event.available_at = now + _retry_delay(event.attempts)
+        return
+
+    event.status = OutboxStatus.PROCESSED
+    event.processed_at = now
+
+def dispatch_outbox(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Drain due outbox events in batches and return how many were handled
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED, so several app processes
+    can run the dispatcher without handling the same event twice.
+    """
+    handled = 0
+
+    for _ in range(OUTBOX_MAX_BATCHES_PER_RUN):
+        events = db.query(OutboxEvent).filter(
+            OutboxEvent.status == OutboxStatus.PENDING,
+            OutboxEvent.available_at <= datetime.now(timezone.utc)
+        ).order_by(OutboxEvent.available_at, OutboxEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        if not events:
+            break
+
+        for event in events:
+            _dispatch_event(db, event)
+
+        db.commit()
+        handled += len(events)
+
+        if len(events) < batch_size:
+            break
+
+    return handled
+
+def purge_processed_outbox_events(db: Session) -> int:
+    """Delete processed events older than OUTBOX_RETENTION"""
+    deleted = db.query(OutboxEvent).filter(
+        OutboxEvent.status == OutboxStatus.PROCESSED,
+        OutboxEvent.created_at < datetime.now(timezone.utc) - OUTBOX_RETENTION
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
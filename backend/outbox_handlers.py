@@ -0,0 +1,53 @@
+from sqlalchemy.orm import Session
+from models import Notification
+from outbox import register_handler
+from notification_counts import count_new_notifications
+from notification_hub import publish_after_commit, stream_notification
+from recommendations import record_order_cooccurrence, remove_order_cooccurrence
+
+# Importing this module registers the handlers; outbox imports it on first use
+
+def _notify(db: Session, user_id: int, title: str, message: str, notification_type: str):
+    notification = Notification(user_id=user_id, title=title, message=message, type=notification_type)
+    db.add(notification)
+    db.flush()
+    count_new_notifications(db, [user_id])
+    publish_after_commit(db, [stream_notification(notification.id, user_id, title, message, notification_type)])
+
+@register_handler("order.placed")
+def update_order_rollups(db: Session, payload: dict):
+    """Count the order's product pairs towards bought-together recommendations
+
+    A retried event can count an order twice; rebuild_recommendations.py
+    recomputes the exact counts if that drift ever matters.
+    """
+    record_order_cooccurrence(db, payload["product_ids"])
+
+@register_handler("order.cancelled")
+def remove_order_rollups(db: Session, payload: dict):
+    """Take a cancelled order's product pairs back off the bought-together counts
+
+    rebuild_recommendations.py skips cancelled orders, so this keeps the
+    incremental counts in line with a rebuild.
+    """
+    remove_order_cooccurrence(db, payload["product_ids"])
+
+@register_handler("order.paid")
+def notify_order_paid(db: Session, payload: dict):
+    _notify(
+        db,
+        payload["user_id"],
+        "Payment Successful",
+        f"Payment for order {payload['order_number']} was received. Your order is confirmed.",
+        "order"
+    )
+
+@register_handler("consultation.status_changed")
+def notify_consultation_status(db: Session, payload: dict):
+    _notify(
+        db,
+        payload["user_id"],
+        "Consultation Updated",
+        f"Your consultation is now {payload['status']}.",
+        "consultation"
+    )
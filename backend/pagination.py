@@ -0,0 +1,52 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException, Response, status
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Response header carrying the cursor for the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque URL-safe cursor"""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def keyset_page(query, created_at_column, id_column, cursor: Optional[str], limit: int, response: Response):
+    """Fetch one newest-first page ordered by (created_at, id) and set the next-page cursor header
+
+    query may select an entity or a tuple of columns, as long as each row
+    exposes the created_at and id values under the given columns' names.
+    """
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            created_at_column < cursor_created_at,
+            and_(created_at_column == cursor_created_at, id_column < cursor_id)
+        ))
+
+    # One extra row tells us whether another page exists
+    rows = query.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            getattr(last, created_at_column.key), getattr(last, id_column.key)
+        )
+
+    return rows
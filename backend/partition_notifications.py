@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Notification partitioning script for FitLife360
+This script converts the notifications table on Postgres into one
+range-partitioned by month on created_at, so queries and the archiver
+that filter on created_at only touch recent partitions. It copies the
+existing rows in a single transaction that locks the table, so run it
+during a maintenance window. Running it again just adds partitions for
+the coming months.
+
+Usage: python partition_notifications.py [months_ahead]
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+from sqlalchemy import text
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine, SessionLocal
+from models import Notification
+from notification_archive import (
+    create_month_partitions, ensure_notification_partitions, is_partitioned, PARTITION_MONTHS_AHEAD
+)
+
+def partition_notifications(db):
+    """Recreate notifications as a partitioned table and move its rows into it"""
+    db.execute(text("LOCK TABLE notifications IN ACCESS EXCLUSIVE MODE"))
+    oldest = db.execute(text("SELECT min(created_at AT TIME ZONE 'UTC') FROM notifications")).scalar()
+
+    print("📋 Creating the partitioned table...")
+    db.execute(text("ALTER TABLE notifications RENAME TO notifications_unpartitioned"))
+    db.execute(text("ALTER INDEX notifications_pkey RENAME TO notifications_unpartitioned_pkey"))
+    # A partitioned table's unique keys must include created_at, so notification ids
+    # can no longer be the target of a foreign key
+    db.execute(text(
+        "ALTER TABLE notification_deliveries DROP CONSTRAINT IF EXISTS notification_deliveries_notification_id_fkey"
+    ))
+    db.execute(text(
+        "CREATE TABLE notifications (LIKE notifications_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    ))
+    db.execute(text("UPDATE notifications_unpartitioned SET created_at = now() WHERE created_at IS NULL"))
+    db.execute(text("ALTER TABLE notifications ALTER COLUMN created_at SET NOT NULL"))
+    db.execute(text("ALTER TABLE notifications ADD PRIMARY KEY (id, created_at)"))
+    db.execute(text(
+        "ALTER TABLE notifications ADD FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE"
+    ))
+    db.execute(text("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id"))
+
+    # Months ahead are added by ensure_notification_partitions once this commits
+    this_month = datetime.now(timezone.utc).date()
+    created = create_month_partitions(db, oldest.date() if oldest is not None else this_month, this_month)
+    # Catches anything outside the monthly ranges, such as clock-skewed rows
+    db.execute(text("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT"))
+    print(f"✅ Created {created} monthly partitions")
+
+    print("📦 Copying notifications...")
+    copied = db.execute(text("INSERT INTO notifications SELECT * FROM notifications_unpartitioned")).rowcount
+    db.execute(text("DROP TABLE notifications_unpartitioned"))
+
+    # Indexes on the parent are created on every partition, present and future
+    for index in Notification.__table__.indexes:
+        index.create(db.connection())
+
+    db.commit()
+    print(f"✅ Moved {copied} notifications")
+
+def main():
+    """Partition the notifications table"""
+    months_ahead = int(sys.argv[1]) if len(sys.argv) > 1 else PARTITION_MONTHS_AHEAD
+
+    if engine.dialect.name != "postgresql":
+        print("❌ Partitioning needs Postgres")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        if is_partitioned(db):
+            print("ℹ️  notifications is already partitioned")
+        else:
+            partition_notifications(db)
+
+        created = ensure_notification_partitions(db, months_ahead)
+        print(f"✅ Added {created} partitions for the coming months")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Partitioning failed: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
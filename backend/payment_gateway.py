@@ -0,0 +1,92 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+import razorpay
+import requests
+
+# (connect, read) timeouts in seconds, as requests takes them
+Timeout = Tuple[float, float]
+
+class PaymentGateway(ABC):
+    """Blocking payment gateway client
+
+    Implementations mirror Razorpay's semantics: amounts are in paise,
+    create_order returns an order dict with an id, fetch_payment returns a
+    payment dict with id, status, amount and currency, and failures raise
+    the same exception types the Razorpay SDK does. A subclass missing
+    any of the methods below can't be instantiated.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def create_order(self, amount_paise: int, currency: str, receipt: str, notes: dict, timeout: Timeout) -> dict:
+        ...
+
+    @abstractmethod
+    def fetch_payment(self, payment_id: str, timeout: Timeout) -> dict:
+        ...
+
+    @abstractmethod
+    def fetch_orders_by_receipt(self, receipt: str, timeout: Timeout) -> list:
+        """Every gateway order created for a receipt, each with status and amount_paid"""
+
+    @abstractmethod
+    def verify_payment_signature(self, order_id: str, payment_id: str, signature: str) -> bool:
+        ...
+
+class RazorpayGateway(PaymentGateway):
+    """The live Razorpay API, or anything speaking it at base_url"""
+
+    name = "razorpay"
+
+    def __init__(self, key_id: str, key_secret: str, base_url: Optional[str] = None, max_connections: int = 10):
+        # One pooled HTTP connection per gateway worker thread
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_connections)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        options = {"base_url": base_url} if base_url else {}
+        self.client = razorpay.Client(session=session, auth=(key_id, key_secret), **options)
+
+    def create_order(self, amount_paise, currency, receipt, notes, timeout):
+        return self.client.order.create({
+            'amount': amount_paise,
+            'currency': currency,
+            'receipt': receipt,
+            'notes': notes
+        }, timeout=timeout)
+
+    def fetch_payment(self, payment_id, timeout):
+        return self.client.payment.fetch(payment_id, timeout=timeout)
+
+    def fetch_orders_by_receipt(self, receipt, timeout):
+        return self.client.order.all({'receipt': receipt}, timeout=timeout)['items']
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        try:
+            self.client.utility.verify_payment_signature({
+                'razorpay_order_id': order_id,
+                'razorpay_payment_id': payment_id,
+                'razorpay_signature': signature
+            })
+            return True
+        except razorpay.errors.SignatureVerificationError:
+            return False
+
+def build_payment_gateway(max_connections: int = 10) -> PaymentGateway:
+    """Build the gateway named by PAYMENT_GATEWAY (razorpay or fake)
+
+    RAZORPAY_BASE_URL points the Razorpay client elsewhere, e.g. at
+    fake_gateway.py running as a server. PAYMENT_GATEWAY=fake runs the
+    same fake in-process instead, with no HTTP at all.
+    """
+    key_id = os.getenv("RAZORPAY_KEY_ID")
+    key_secret = os.getenv("RAZORPAY_KEY_SECRET")
+
+    if os.getenv("PAYMENT_GATEWAY", "razorpay") == "fake":
+        from fake_gateway import FakePaymentGateway, FakeRazorpay
+        return FakePaymentGateway(FakeRazorpay.from_env(key_id, key_secret))
+
+    return RazorpayGateway(key_id, key_secret, os.getenv("RAZORPAY_BASE_URL"), max_connections)
@@ -0,0 +1,140 @@
+import hashlib
+import hmac
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from database import dialect_insert
+from models import Order, PaymentWebhookEvent, WebhookEventStatus
+from inventory import finalize_paid_orders, record_cancelled_captures
+from outbox import enqueue_event
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_POLL_INTERVAL_SECONDS = 1
+WEBHOOK_BATCH_SIZE = 200
+WEBHOOK_MAX_ATTEMPTS = 5
+
+# Events that mean the money was captured; anything else is stored and ignored
+PAYMENT_CAPTURED_EVENTS = {"payment.captured", "order.paid"}
+
+def get_webhook_secret() -> str:
+    return os.getenv("RAZORPAY_WEBHOOK_SECRET", "")
+
+def verify_webhook_signature(body: bytes, signature: str, secret: str) -> bool:
+    """Check the X-Razorpay-Signature HMAC-SHA256 of the raw request body"""
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+def store_webhook_event(db: Session, event_id: str, body: bytes) -> bool:
+    """Persist a verified webhook; returns False if this event id was already stored"""
+    payload = json.loads(body)
+    statement = dialect_insert(db, PaymentWebhookEvent.__table__).values(
+        event_id=event_id,
+        event_type=str(payload.get("event", "unknown"))[:100],
+        payload=body.decode(),
+        status=WebhookEventStatus.PENDING,
+        attempts=0
+    ).on_conflict_do_nothing(index_elements=["event_id"])
+
+    inserted = db.execute(statement).rowcount
+    db.commit()
+    return bool(inserted)
+
+def _captured_payment(payload: dict):
+    """Pull (order_number, amount in paise) out of a payment event"""
+    payment = payload["payload"]["payment"]["entity"]
+    return payment["notes"]["order_number"], payment["amount"]
+
+def _mark(event: PaymentWebhookEvent, status: WebhookEventStatus, error: str = None):
+    event.status = status
+    event.last_error = error
+    event.processed_at = datetime.now(timezone.utc)
+
+def process_payment_webhooks(db: Session, batch_size: int = WEBHOOK_BATCH_SIZE) -> int:
+    """Apply stored webhook events to their orders in batches
+
+    Each batch looks its orders up with one IN query and finalizes every
+    captured payment with one set-based update. Returns events handled.
+    """
+    handled = 0
+
+    while True:
+        events = db.query(PaymentWebhookEvent).filter(
+            PaymentWebhookEvent.status == WebhookEventStatus.PENDING
+        ).order_by(PaymentWebhookEvent.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        if not events:
+            break
+
+        captured = {}
+        for event in events:
+            if event.event_type not in PAYMENT_CAPTURED_EVENTS:
+                _mark(event, WebhookEventStatus.IGNORED)
+                continue
+            try:
+                captured[event.id] = _captured_payment(json.loads(event.payload))
+            except (KeyError, TypeError, ValueError) as e:
+                _mark(event, WebhookEventStatus.FAILED, f"Malformed payment event: {e}")
+
+        order_numbers = {order_number for order_number, _ in captured.values()}
+        orders = {
+            order.order_number: order
+            for order in db.query(Order).filter(Order.order_number.in_(order_numbers)).all()
+        } if order_numbers else {}
+
+        orders_by_id = {order.id: order for order in orders.values()}
+        payable = {}
+        for event in events:
+            if event.id not in captured:
+                continue
+
+            order_number, amount_paise = captured[event.id]
+            order = orders.get(order_number)
+
+            if order is None:
+                _mark(event, WebhookEventStatus.FAILED, f"Unknown order {order_number}")
+            elif round(order.total_amount * 100) != amount_paise:
+                _mark(event, WebhookEventStatus.FAILED, f"Amount {amount_paise} does not match order {order_number}")
+            else:
+                payable.setdefault(order.id, []).append(event)
+
+        try:
+            finalized = finalize_paid_orders(db, list(payable)) if payable else []
+            refunds = record_cancelled_captures(db, list(payable)) if payable else []
+            for order_id, user_id, order_number in finalized:
+                enqueue_event(db, "order.paid", {
+                    "order_id": order_id,
+                    "user_id": user_id,
+                    "order_number": order_number
+                }, "order", order_id)
+        except Exception as e:
+            # Leave the batch pending for the next run unless it keeps failing
+            db.rollback()
+            logger.exception("Payment webhook batch failed")
+            for event in events:
+                event.attempts += 1
+                if event.attempts >= WEBHOOK_MAX_ATTEMPTS:
+                    _mark(event, WebhookEventStatus.FAILED, str(e)[:2000])
+            db.commit()
+            break
+
+        if refunds:
+            logger.warning("Payment captured on cancelled orders, refund needed: %s", ", ".join(refunds))
+
+        finalized_ids = {order_id for order_id, _, _ in finalized}
+        for order_id, order_events in payable.items():
+            for event in order_events:
+                if order_id in finalized_ids:
+                    _mark(event, WebhookEventStatus.PROCESSED)
+                elif orders_by_id[order_id].order_number in refunds:
+                    _mark(event, WebhookEventStatus.PROCESSED, "Order was cancelled; payment needs a refund")
+                else:
+                    # Paid already, or expired first; reconciliation sorts out the latter
+                    _mark(event, WebhookEventStatus.IGNORED, "Order was no longer awaiting payment")
+
+        db.commit()
+        handled += len(events)
+
+    return handled
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Recommendation rebuild script for FitLife360
+This script recomputes the "frequently bought together" table from all
+historical orders. Incremental updates keep it current between rebuilds.
+"""
+
+import os
+import sys
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SessionLocal
+from recommendations import rebuild_cooccurrence
+
+def main():
+    """Rebuild product co-occurrence counts"""
+    print("🔁 Rebuilding product co-occurrence counts...")
+    start_time = time.time()
+
+    db = SessionLocal()
+    try:
+        pair_count = rebuild_cooccurrence(db)
+    finally:
+        db.close()
+
+    print(f"✅ Stored {pair_count} product pairs in {time.time() - start_time:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+from typing import Iterable, List
+from database import dialect_insert
+from models import Order, OrderItem, OrderStatus, Product, ProductCooccurrence
+
+REBUILD_READ_BATCH_SIZE = 50000
+REBUILD_WRITE_BATCH_SIZE = 5000
+
+def record_order_cooccurrence(db: Session, product_ids: Iterable[int]):
+    """Add one co-purchase to every pair of distinct products in an order
+
+    Pairs are written in sorted order so concurrent orders lock rows consistently.
+    The caller owns the transaction.
+    """
+    distinct_ids = sorted(set(product_ids))
+    pairs = [
+        {"product_id": product_id, "related_product_id": related_id, "order_count": 1}
+        for product_id in distinct_ids
+        for related_id in distinct_ids
+        if product_id != related_id
+    ]
+
+    if not pairs:
+        return
+
+    statement = dialect_insert(db, ProductCooccurrence.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=["product_id", "related_product_id"],
+        set_={
+            "order_count": ProductCooccurrence.order_count + statement.excluded.order_count,
+            "updated_at": func.now()
+        }
+    )
+    db.execute(statement, pairs)
+
+def remove_order_cooccurrence(db: Session, product_ids: Iterable[int]):
+    """Take one co-purchase off every pair of distinct products in a cancelled order
+
+    Pairs whose count reaches zero are deleted. The caller owns the transaction.
+    """
+    distinct_ids = sorted(set(product_ids))
+
+    if len(distinct_ids) < 2:
+        return
+
+    pairs = (
+        ProductCooccurrence.product_id.in_(distinct_ids),
+        ProductCooccurrence.related_product_id.in_(distinct_ids),
+        ProductCooccurrence.product_id != ProductCooccurrence.related_product_id
+    )
+    db.execute(
+        update(ProductCooccurrence)
+        .where(*pairs)
+        .values(order_count=ProductCooccurrence.order_count - 1, updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.query(ProductCooccurrence).filter(*pairs, ProductCooccurrence.order_count <= 0).delete(synchronize_session=False)
+
+def get_bought_together(db: Session, product_id: int, limit: int = 10) -> List[Product]:
+    """Get the active products most often bought with a product"""
+    return db.query(Product).join(
+        ProductCooccurrence, ProductCooccurrence.related_product_id == Product.id
+    ).filter(
+        ProductCooccurrence.product_id == product_id,
+        Product.is_active == True
+    ).order_by(
+        ProductCooccurrence.order_count.desc(),
+        Product.id
+    ).limit(limit).all()
+
+def compute_cooccurrence(order_ids, product_ids):
+    """Count how many orders contain each ordered pair of distinct products
+
+    Builds a sparse order x product incidence matrix A and returns the
+    off-diagonal entries of A^T A as (product_ids, related_product_ids, counts).
+    """
+    import numpy as np
+    from scipy import sparse
+
+    order_ids = np.asarray(order_ids)
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+
+    _, order_rows = np.unique(order_ids, return_inverse=True)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(product_ids), dtype=np.int32), (order_rows, product_ids)),
+        shape=(int(order_rows.max()) + 1, int(product_ids.max()) + 1)
+    )
+    # A product appearing on several lines of one order still counts once
+    incidence.data[:] = 1
+
+    cooccurrence = (incidence.T @ incidence).tocoo()
+    off_diagonal = cooccurrence.row != cooccurrence.col
+
+    return (
+        cooccurrence.row[off_diagonal],
+        cooccurrence.col[off_diagonal],
+        cooccurrence.data[off_diagonal]
+    )
+
+def rebuild_cooccurrence(db: Session) -> int:
+    """Recompute the whole co-occurrence table from historical orders
+
+    Cancelled orders are left out, matching the incremental updates, which
+    take an order's pairs back off when it is cancelled.
+    """
+    import numpy as np
+
+    order_ids = []
+    product_ids = []
+    rows = db.query(OrderItem.order_id, OrderItem.product_id).join(Order).filter(
+        Order.status != OrderStatus.CANCELLED,
+        OrderItem.product_id.isnot(None)
+    ).yield_per(REBUILD_READ_BATCH_SIZE)
+
+    for order_id, product_id in rows:
+        order_ids.append(order_id)
+        product_ids.append(product_id)
+
+    db.query(ProductCooccurrence).delete(synchronize_session=False)
+
+    pair_count = 0
+    if product_ids:
+        products, related_products, counts = compute_cooccurrence(
+            np.array(order_ids, dtype=np.int64),
+            np.array(product_ids, dtype=np.int64)
+        )
+        pair_count = len(counts)
+
+        for start in range(0, pair_count, REBUILD_WRITE_BATCH_SIZE):
+            end = start + REBUILD_WRITE_BATCH_SIZE
+            db.execute(insert(ProductCooccurrence), [
+                {
+                    "product_id": int(product_id),
+                    "related_product_id": int(related_id),
+                    "order_count": int(count)
+                }
+                for product_id, related_id, count in zip(
+                    products[start:end], related_products[start:end], counts[start:end]
+                )
+            ])
+
+    db.commit()
+    return pair_count
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Payment reconciliation script for FitLife360
+This script re-checks pending and failed Razorpay orders against the
+gateway, settles the ones that were actually paid, and prints a report.
+The API runs the same job every 15 minutes in the background.
+
+Usage: python reconcile_payments.py [lookback_days] [concurrency]
+"""
+
+import os
+import sys
+import time
+from datetime import timedelta
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import SessionLocal
+from reconciliation import reconcile_payments, RECONCILE_CONCURRENCY, RECONCILE_LOOKBACK
+from routers.payments import shutdown_payment_gateway
+
+def main():
+    """Reconcile recent unsettled payments and print what changed"""
+    lookback = timedelta(days=float(sys.argv[1])) if len(sys.argv) > 1 else RECONCILE_LOOKBACK
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else RECONCILE_CONCURRENCY
+
+    print(f"🔎 Reconciling payments from the last {lookback.days} days ({concurrency} lookups at a time)...")
+    start_time = time.time()
+
+    db = SessionLocal()
+    try:
+        report = reconcile_payments(db, concurrency=concurrency, lookback=lookback)
+    finally:
+        db.close()
+        shutdown_payment_gateway()
+
+    print(f"✅ Checked {report['scanned']} orders in {time.time() - start_time:.2f}s")
+    print(f"   Marked paid: {report['paid']}")
+    print(f"   Revived from failed: {report['revived']}")
+    print(f"   Still unpaid: {report['unpaid']}")
+    print(f"   Already settled meanwhile: {report['already_settled']}")
+    print(f"   Gateway unreachable: {report['unreachable']}")
+
+    if report["refund_required"]:
+        print(f"⚠️  Paid after cancellation, refund needed: {', '.join(report['refund_required'])}")
+    if report["amount_mismatch"]:
+        print(f"⚠️  Captured amount differs from order total: {', '.join(report['amount_mismatch'])}")
+    if report["aborted"]:
+        print("❌ Stopped early: the payment gateway could not be reached")
+
+if __name__ == "__main__":
+    main()
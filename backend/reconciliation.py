@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+from models import InventoryHold, HoldStatus, Order, OrderStatus, PaymentStatus
+from inventory import finalize_paid_orders, record_cancelled_captures
+from outbox import enqueue_event
+from routers.payments import fetch_payment_orders, PaymentGatewayUnavailable
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL_SECONDS = 900
+RECONCILE_CHUNK_SIZE = 200
+# Gateway lookups in flight at once; they share the gateway's worker pool with checkout
+RECONCILE_CONCURRENCY = 8
+# Younger orders are still in checkout, where the client and webhooks settle them
+RECONCILE_GRACE_PERIOD = timedelta(minutes=10)
+RECONCILE_LOOKBACK = timedelta(days=7)
+
+RECONCILED_STATUSES = (PaymentStatus.PENDING, PaymentStatus.FAILED)
+
+def _captured_paise(gateway_orders: list) -> int:
+    """Total captured across every gateway order created for one receipt"""
+    return sum(gateway_order.get("amount_paid") or 0 for gateway_order in gateway_orders)
+
+async def _lookup_chunk(order_numbers: List[str], concurrency: int) -> Dict[str, Optional[list]]:
+    """Fetch the gateway orders for each order number, at most concurrency at a time
+
+    Orders whose lookup failed map to None.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(order_number):
+        async with semaphore:
+            try:
+                return order_number, await fetch_payment_orders(order_number)
+            except PaymentGatewayUnavailable:
+                return order_number, None
+            except Exception as e:
+                logger.warning("Gateway lookup for %s failed: %s", order_number, e)
+                return order_number, None
+
+    return dict(await asyncio.gather(*(lookup(order_number) for order_number in order_numbers)))
+
+def _emit_paid(db: Session, paid_orders):
+    for order_id, user_id, order_number in paid_orders:
+        enqueue_event(db, "order.paid", {
+            "order_id": order_id,
+            "user_id": user_id,
+            "order_number": order_number
+        }, "order", order_id)
+
+def _revive_failed_orders(db: Session, order_ids: List[int]):
+    """Mark failed-but-captured orders paid if nobody cancelled them since
+
+    Only legacy orders can be in this state: the checkout used to mark
+    payments failed on any error without cancelling the order or giving
+    its stock back. The caller owns the transaction.
+    """
+    revived = db.execute(
+        update(Order)
+        .where(
+            Order.id.in_(order_ids),
+            Order.payment_status == PaymentStatus.FAILED,
+            Order.status != OrderStatus.CANCELLED
+        )
+        .values(payment_status=PaymentStatus.COMPLETED, status=OrderStatus.CONFIRMED)
+        .returning(Order.id, Order.user_id, Order.order_number)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if revived:
+        db.execute(
+            update(InventoryHold)
+            .where(
+                InventoryHold.order_id.in_([order_id for order_id, _, _ in revived]),
+                InventoryHold.status == HoldStatus.ACTIVE
+            )
+            .values(status=HoldStatus.COMMITTED, resolved_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+    return revived
+
+def reconcile_payments(
+    db: Session,
+    chunk_size: int = RECONCILE_CHUNK_SIZE,
+    concurrency: int = RECONCILE_CONCURRENCY,
+    lookback: timedelta = RECONCILE_LOOKBACK
+) -> dict:
+    """Re-check pending and failed Razorpay orders against the gateway
+
+    Walks the (payment_status, created_at) index in keyset chunks, looks
+    each chunk up on the gateway concurrently, and applies the corrections
+    for a chunk in set-based updates committed together. Stops early if a
+    whole chunk can't be looked up, since the gateway is then down.
+    Returns a summary of what was found and changed.
+    """
+    now = datetime.now(timezone.utc)
+    report = {
+        "scanned": 0,
+        "paid": 0,
+        "revived": 0,
+        "refund_required": [],
+        "amount_mismatch": [],
+        "unpaid": 0,
+        "unreachable": 0,
+        "already_settled": 0,
+        "aborted": False
+    }
+
+    for payment_status in RECONCILED_STATUSES:
+        last_created_at, last_id = None, 0
+
+        while not report["aborted"]:
+            query = db.query(Order.id, Order.order_number, Order.total_amount, Order.created_at).filter(
+                Order.payment_status == payment_status,
+                Order.payment_method == "razorpay",
+                Order.created_at >= now - lookback,
+                Order.created_at < now - RECONCILE_GRACE_PERIOD
+            )
+            if last_created_at is not None:
+                query = query.filter(or_(
+                    Order.created_at > last_created_at,
+                    and_(Order.created_at == last_created_at, Order.id > last_id)
+                ))
+
+            orders = query.order_by(Order.created_at, Order.id).limit(chunk_size).all()
+            if not orders:
+                break
+
+            last_created_at, last_id = orders[-1].created_at, orders[-1].id
+            report["scanned"] += len(orders)
+
+            gateway_orders = asyncio.run(_lookup_chunk([order.order_number for order in orders], concurrency))
+
+            captured_ids = []
+            for order in orders:
+                found = gateway_orders.get(order.order_number)
+                if found is None:
+                    report["unreachable"] += 1
+                    continue
+
+                captured = _captured_paise(found)
+                if captured == 0:
+                    report["unpaid"] += 1
+                elif captured != round(order.total_amount * 100):
+                    report["amount_mismatch"].append(order.order_number)
+                else:
+                    captured_ids.append(order.id)
+
+            if captured_ids:
+                if payment_status == PaymentStatus.PENDING:
+                    paid = finalize_paid_orders(db, captured_ids)
+                    report["paid"] += len(paid)
+                else:
+                    paid = _revive_failed_orders(db, captured_ids)
+                    report["revived"] += len(paid)
+
+                refunds = record_cancelled_captures(db, captured_ids)
+                report["refund_required"].extend(refunds)
+                settled = len(paid) + len(refunds)
+
+                _emit_paid(db, paid)
+                db.commit()
+
+                # Settled in the meantime by checkout, a webhook or the sweeper
+                report["already_settled"] += len(captured_ids) - settled
+
+            if all(found is None for found in gateway_orders.values()):
+                report["aborted"] = True
+
+    if report["refund_required"] or report["amount_mismatch"]:
+        logger.warning(
+            "Payment reconciliation needs attention: refund %s, amount mismatch %s",
+            report["refund_required"], report["amount_mismatch"]
+        )
+    logger.info("Payment reconciliation: %s", report)
+    return report
@@ -0,0 +1,131 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Type
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open"""
+
+class CircuitBreaker:
+    """Fail fast after repeated failures, then let a single trial call through
+
+    closed: calls pass; failure_threshold consecutive failures open it.
+    open: calls are rejected until reset_timeout_seconds have passed.
+    half-open: one trial call; success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout_seconds: float = 30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError unless a call is allowed right now
+
+        Returns True if the call is the half-open trial, which the caller must
+        pass to end_trial in a finally block once it completes either way.
+        """
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return False
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+        raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def end_trial(self):
+        """Let another trial through if this one ended without recording an outcome, e.g. cancelled"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+class LatencyMetrics:
+    """Per-operation call counts, error counts and recent latency percentiles"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._operations: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: Optional[float], outcome: str):
+        """Count a call; seconds is None for calls that never reached the dependency"""
+        with self._lock:
+            stats = self._operations.setdefault(operation, {
+                "calls": 0,
+                "outcomes": {},
+                "latencies": deque(maxlen=self.window)
+            })
+            stats["calls"] += 1
+            stats["outcomes"][outcome] = stats["outcomes"].get(outcome, 0) + 1
+            if seconds is not None:
+                stats["latencies"].append(seconds)
+
+    def snapshot(self) -> dict:
+        """Summarise every operation, with percentiles over the last window calls"""
+        with self._lock:
+            operations = {
+                operation: (stats["calls"], dict(stats["outcomes"]), sorted(stats["latencies"]))
+                for operation, stats in self._operations.items()
+            }
+
+        def percentile(latencies, fraction):
+            index = min(len(latencies) - 1, int(round(fraction * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 2)
+
+        return {
+            operation: {
+                "calls": calls,
+                "outcomes": outcomes,
+                "p50_ms": percentile(latencies, 0.50) if latencies else None,
+                "p95_ms": percentile(latencies, 0.95) if latencies else None,
+                "p99_ms": percentile(latencies, 0.99) if latencies else None,
+                "max_ms": round(latencies[-1] * 1000, 2) if latencies else None
+            }
+            for operation, (calls, outcomes, latencies) in operations.items()
+        }
+
+async def retry_async(
+    call: Callable[[], Awaitable],
+    attempts: int,
+    backoff_seconds: float,
+    retry_on: Tuple[Type[BaseException], ...]
+):
+    """Await call(), retrying retry_on errors with jittered exponential backoff"""
+    for attempt in range(attempts):
+        try:
+            return await call()
+        except retry_on:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.5))
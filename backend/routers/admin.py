@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 from database import get_db
-from models import User, Consultant, Product, Order, OrderItem, Consultation, Notification, ProductReview
+from models import User, Consultant, Product, Order, OrderItem, OrderStatus, Consultation, ConsultationStatus, Notification, ProductReview
 from schemas import UserResponse, ConsultantResponse, ConsultantCreate, ConsultantUpdate, ProductResponse, OrderResponse, ConsultationResponse, ProductReviewResponse
 from auth import get_admin_user
 from routers.notifications import create_notification
+from outbox import enqueue_event
+from routers.orders import get_order_page
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from exports import EXPORTS, EXPORT_FORMATS, iter_export, resolve_columns
 
 router = APIRouter()
 
@@ -367,13 +373,51 @@ async def get_all_products(
 
 @router.get("/orders", response_model=List[OrderResponse])
 async def get_all_orders(
+    response: Response,
+    order_status: Optional[OrderStatus] = Query(None, alias="status", description="Filter by order status"),
+    date_from: Optional[datetime] = Query(None, description="Only orders created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only orders created before this time"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get all orders"""
-    from sqlalchemy.orm import joinedload
-    orders = db.query(Order).options(joinedload(Order.user), joinedload(Order.order_items).joinedload(OrderItem.product)).order_by(Order.created_at.desc()).all()
-    return orders
+    """Get a page of all orders"""
+    return get_order_page(
+        db, response, None, order_status, date_from, date_to, cursor, limit
+    )
+
+@router.get("/export/{entity}")
+async def export_entity(
+    entity: str,
+    file_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns; all columns if omitted"),
+    date_from: Optional[datetime] = Query(None, description="Only rows created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only rows created before this time"),
+    current_user: User = Depends(get_admin_user)
+):
+    """Stream orders, users, consultations or products as CSV or NDJSON"""
+    if entity not in EXPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown export. Must be one of: {list(EXPORTS)}"
+        )
+    
+    try:
+        selected_columns = resolve_columns(entity, columns)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    filename = f"{entity}_{datetime.now().strftime('%Y%m%d')}.{file_format}"
+    
+    return StreamingResponse(
+        iter_export(entity, selected_columns, file_format, date_from, date_to),
+        media_type=EXPORT_FORMATS[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.get("/consultations", response_model=List[ConsultationResponse])
 async def get_all_consultations(
@@ -400,17 +444,32 @@ async def update_consultation_status(
             detail="Consultation not found"
         )
     
-    status = status_data.get("status")
-    if not status:
+    new_status = status_data.get("status")
+    if not new_status:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Status is required"
         )
     
-    consultation.status = status
+    valid_statuses = [consultation_status.value for consultation_status in ConsultationStatus]
+    if new_status not in valid_statuses:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid status. Must be one of: {valid_statuses}"
+        )
+    
+    consultation.status = new_status
+    
+    # The customer is notified from the outbox, committed with the status change
+    enqueue_event(db, "consultation.status_changed", {
+        "consultation_id": consultation.id,
+        "user_id": consultation.user_id,
+        "status": new_status
+    }, "consultation", consultation.id)
+    
     db.commit()
     
-    return {"message": f"Consultation status updated to {status}"}
+    return {"message": f"Consultation status updated to {new_status}"}
 
 @router.put("/consultations/{consultation_id}")
 async def update_consultation(
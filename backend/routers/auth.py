@@ -11,7 +11,8 @@ from auth import (
 )
 import secrets
 import os
-from routers.notifications import send_email_notification
+from delivery import email_delivery, enqueue_deliveries
+from email_templates import render_email
 
 router = APIRouter()
 
@@ -127,40 +128,22 @@ async def forgot_password(request: ForgotPasswordRequest, db: Session = Depends(
     )
     
     db.add(reset_token_record)
-    db.commit()
     
     # Send email with reset link
     frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
     reset_link = f"{frontend_url}/reset-password?token={reset_token}"
     
     email_subject = "Password Reset Request - FitLife360"
-    email_body = f"""
-    <html>
-    <body>
-        <h2>Password Reset Request</h2>
-        <p>Hello {user.first_name},</p>
-        <p>You have requested to reset your password for your FitLife360 account.</p>
-        <p>Click the link below to reset your password:</p>
-        <p><a href="{reset_link}" style="background-color: #4CAF50; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Reset Password</a></p>
-        <p>This link will expire in 1 hour.</p>
-        <p>If you didn't request this password reset, please ignore this email.</p>
-        <br>
-        <p>Best regards,<br>FitLife360 Team</p>
-    </body>
-    </html>
-    """
-    
-    # Send email
-    email_sent = send_email_notification(user.email, email_subject, email_body)
-    
-    if not email_sent:
-        # If email fails, clean up the token
-        db.delete(reset_token_record)
-        db.commit()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to send password reset email. Please try again later."
-        )
+    email_body = render_email(
+        "password_reset.html",
+        first_name=user.first_name,
+        reset_link=reset_link,
+        expires_in="1 hour"
+    )
+    
+    # Queue the email in the same transaction as the token; the delivery worker retries failures
+    enqueue_deliveries(db, [email_delivery(user.email, email_subject, email_body)])
+    db.commit()
     
     return {"message": "If the email exists, a password reset link has been sent."}
 
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from twilio.rest import Client
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import os
+from typing import List, Optional
+from datetime import datetime
 from dotenv import load_dotenv
 from database import get_db
-from models import Notification, User
-from schemas import NotificationResponse
-from auth import get_current_active_user, get_admin_user
+from models import BroadcastJob, Notification, User
+from schemas import AdminNotificationResponse, BroadcastJobResponse, NotificationResponse
+from auth import get_current_active_user, get_admin_user, get_stream_user
+from broadcasts import create_broadcast_job
+from delivery import email_delivery, sms_delivery, enqueue_deliveries
+from email_templates import notification_email_template, render_email
+from notification_counts import adjust_unread_counts, count_new_notifications, get_unread_count
+from notification_archive import mark_all_read_in_chunks
+from notification_hub import notification_event_stream, publish_after_commit, stream_notification
+from pagination import keyset_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 try:
     load_dotenv()
@@ -20,66 +24,6 @@ except (UnicodeDecodeError, FileNotFoundError):
 
 router = APIRouter()
 
-# Initialize Twilio client
-twilio_client = Client(
-    os.getenv("TWILIO_ACCOUNT_SID"),
-    os.getenv("TWILIO_AUTH_TOKEN")
-)
-
-def send_email_notification(to_email: str, subject: str, body: str):
-    """Send email notification"""
-    try:
-        # Email configuration
-        smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
-        smtp_port = int(os.getenv("SMTP_PORT", "587"))
-        email_user = os.getenv("EMAIL_USER")
-        email_password = os.getenv("EMAIL_PASSWORD")
-        
-        if not email_user or not email_password:
-            return False
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = email_user
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(body, 'html'))
-        
-        # Send email
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(email_user, email_password)
-        text = msg.as_string()
-        server.sendmail(email_user, to_email, text)
-        server.quit()
-        
-        return True
-    
-    except Exception as e:
-        print(f"Email sending error: {e}")
-        return False
-
-def send_sms_notification(to_phone: str, message: str):
-    """Send SMS notification using Twilio"""
-    try:
-        twilio_phone = os.getenv("TWILIO_PHONE_NUMBER")
-        
-        if not twilio_phone:
-            return False
-        
-        message = twilio_client.messages.create(
-            body=message,
-            from_=twilio_phone,
-            to=to_phone
-        )
-        
-        return True
-    
-    except Exception as e:
-        print(f"SMS sending error: {e}")
-        return False
-
 async def create_notification(
     user_id: int,
     title: str,
@@ -89,42 +33,50 @@ async def create_notification(
     send_sms: bool = False,
     db: Session = None
 ):
-    """Create a notification and optionally send via email/SMS"""
+    """Create a notification and optionally queue email/SMS copies"""
     notification = Notification(
         user_id=user_id,
         title=title,
         message=message,
         type=notification_type,
-        sent_via_email=send_email,
-        sent_via_sms=send_sms
+        sent_via_email=False,
+        sent_via_sms=False
     )
     
     db.add(notification)
     db.flush()
+    count_new_notifications(db, [user_id])
+    publish_after_commit(db, [stream_notification(notification.id, user_id, title, message, notification_type)])
     
-    # Send email if requested
-    if send_email:
+    # Email and SMS go out from the delivery worker, which flips sent_via_* once delivered
+    if send_email or send_sms:
         user = db.query(User).filter(User.id == user_id).first()
-        if user and user.email:
-            email_sent = send_email_notification(
-                user.email,
-                title,
-                f"<h2>{title}</h2><p>{message}</p>"
+        deliveries = []
+        if send_email and user and user.email:
+            body = render_email(
+                notification_email_template(notification_type),
+                title=title,
+                message=message,
+                first_name=user.first_name
             )
-            notification.sent_via_email = email_sent
-    
-    # Send SMS if requested
-    if send_sms:
-        user = db.query(User).filter(User.id == user_id).first()
-        if user and user.phone:
-            sms_sent = send_sms_notification(user.phone, f"{title}: {message}")
-            notification.sent_via_sms = sms_sent
+            deliveries.append(email_delivery(user.email, title, body, notification.id))
+        if send_sms and user and user.phone:
+            deliveries.append(sms_delivery(user.phone, f"{title}: {message}", notification.id))
+        enqueue_deliveries(db, deliveries)
     
     db.commit()
     db.refresh(notification)
     
     return notification
 
+def _mark_read(db: Session, notification: Notification):
+    """Flip one notification to read, counting it only if nobody else just did"""
+    marked = db.query(Notification).filter(
+        Notification.id == notification.id,
+        Notification.is_read == False
+    ).update({"is_read": True})
+    adjust_unread_counts(db, {notification.user_id: -marked})
+
 @router.get("/", response_model=List[NotificationResponse])
 async def get_user_notifications(
     current_user: User = Depends(get_current_active_user),
@@ -137,38 +89,109 @@ async def get_user_notifications(
     
     return notifications
 
-@router.get("/admin/all")
+@router.get("/unread-count")
+async def get_unread_notification_count(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Get the current user's unread notification count"""
+    return {"unread_count": get_unread_count(db, current_user.id)}
+
+@router.get("/stream")
+async def stream_user_notifications(
+    last_event_id: Optional[int] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: User = Depends(get_stream_user),
+    db: Session = Depends(get_db)
+):
+    """Stream the current user's new notifications as Server-Sent Events
+
+    Authenticates with ?token= since EventSource can't send headers. A
+    reconnecting browser sends Last-Event-ID and first receives what it missed.
+    """
+    if last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    
+    # The stream can stay open for hours; don't hold a pooled connection for it
+    db.close()
+    
+    return StreamingResponse(
+        notification_event_stream(current_user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/admin/all", response_model=List[AdminNotificationResponse])
 async def get_all_notifications_admin(
+    response: Response,
+    notification_type: Optional[str] = Query(None, alias="type", description="Filter by notification type"),
+    is_read: Optional[bool] = Query(None, description="Filter by read state"),
+    user_id: Optional[int] = Query(None, description="Only this user's notifications"),
+    date_from: Optional[datetime] = Query(None, description="Only notifications created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only notifications created before this time"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get all notifications with user info (Admin only)"""
-    notifications = db.query(Notification).join(User).order_by(Notification.created_at.desc()).all()
-    
-    result = []
-    for notification in notifications:
-        user = db.query(User).filter(User.id == notification.user_id).first()
-        notification_data = {
-            "id": notification.id,
-            "user_id": notification.user_id,
-            "title": notification.title,
-            "message": notification.message,
-            "type": notification.type,
-            "is_read": notification.is_read,
-            "sent_via_email": notification.sent_via_email,
-            "sent_via_sms": notification.sent_via_sms,
-            "created_at": notification.created_at,
+    """Get a page of all notifications with user info (Admin only)
+
+    One query joins in just the user columns shown, however big the page.
+    """
+    query = db.query(
+        Notification.id,
+        Notification.user_id,
+        Notification.title,
+        Notification.message,
+        Notification.type,
+        Notification.is_read,
+        Notification.sent_via_email,
+        Notification.sent_via_sms,
+        Notification.created_at,
+        User.username,
+        User.email,
+        User.first_name,
+        User.last_name
+    ).join(User, User.id == Notification.user_id)
+    
+    if notification_type is not None:
+        query = query.filter(Notification.type == notification_type)
+    
+    if is_read is not None:
+        query = query.filter(Notification.is_read == is_read)
+    
+    if user_id is not None:
+        query = query.filter(Notification.user_id == user_id)
+    
+    if date_from is not None:
+        query = query.filter(Notification.created_at >= date_from)
+    
+    if date_to is not None:
+        query = query.filter(Notification.created_at < date_to)
+    
+    rows = keyset_page(query, Notification.created_at, Notification.id, cursor, limit, response)
+    
+    return [
+        {
+            "id": row.id,
+            "user_id": row.user_id,
+            "title": row.title,
+            "message": row.message,
+            "type": row.type,
+            "is_read": row.is_read,
+            "sent_via_email": row.sent_via_email,
+            "sent_via_sms": row.sent_via_sms,
+            "created_at": row.created_at,
             "user": {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name
-            } if user else None
+                "id": row.user_id,
+                "username": row.username,
+                "email": row.email,
+                "first_name": row.first_name,
+                "last_name": row.last_name
+            }
         }
-        result.append(notification_data)
-    
-    return result
+        for row in rows
+    ]
 
 @router.put("/{notification_id}/read")
 async def mark_notification_read(
@@ -188,7 +211,7 @@ async def mark_notification_read(
             detail="Notification not found"
         )
     
-    notification.is_read = True
+    _mark_read(db, notification)
     db.commit()
     
     return {"message": "Notification marked as read"}
@@ -210,7 +233,7 @@ async def mark_notification_read_admin(
             detail="Notification not found"
         )
     
-    notification.is_read = True
+    _mark_read(db, notification)
     db.commit()
     
     return {"message": "Notification marked as read"}
@@ -221,11 +244,12 @@ async def mark_all_notifications_read(
     db: Session = Depends(get_db)
 ):
     """Mark all notifications as read for current user"""
-    db.query(Notification).filter(
+    marked = db.query(Notification).filter(
         Notification.user_id == current_user.id,
         Notification.is_read == False
     ).update({"is_read": True})
     
+    adjust_unread_counts(db, {current_user.id: -marked})
     db.commit()
     
     return {"message": "All notifications marked as read"}
@@ -236,11 +260,7 @@ async def mark_all_notifications_read_admin(
     db: Session = Depends(get_db)
 ):
     """Mark all notifications as read (Admin only)"""
-    updated_count = db.query(Notification).filter(
-        Notification.is_read == False
-    ).update({"is_read": True})
-    
-    db.commit()
+    updated_count = mark_all_read_in_chunks(db)
     
     return {"message": f"All {updated_count} notifications marked as read"}
 
@@ -290,7 +310,10 @@ async def broadcast_notification(
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Broadcast notification to all active users (Admin only)"""
+    """Queue a notification to all active users (Admin only)
+
+    Returns a job id at once; follow it at /broadcast/{job_id}.
+    """
     title = notification_data.get("title")
     message = notification_data.get("message")
     notification_type = notification_data.get("notification_type")
@@ -303,25 +326,34 @@ async def broadcast_notification(
             detail="Missing required fields: title, message, notification_type"
         )
     
-    active_users = db.query(User).filter(User.is_active == True).all()
+    job = create_broadcast_job(
+        db,
+        created_by=current_user.id,
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        send_email=send_email,
+        send_sms=send_sms
+    )
     
-    sent_count = 0
-    for user in active_users:
-        try:
-            await create_notification(
-                user_id=user.id,
-                title=title,
-                message=message,
-                notification_type=notification_type,
-                send_email=send_email,
-                send_sms=send_sms,
-                db=db
-            )
-            sent_count += 1
-        except Exception as e:
-            print(f"Error sending notification to user {user.id}: {e}")
+    return {"message": "Broadcast queued", "job_id": job.id}
+
+@router.get("/broadcast/{job_id}", response_model=BroadcastJobResponse)
+async def get_broadcast_progress(
+    job_id: int,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Get the progress of a broadcast (Admin only)"""
+    job = db.query(BroadcastJob).filter(BroadcastJob.id == job_id).first()
     
-    return {"message": f"Notification broadcasted to {sent_count} users"}
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Broadcast not found"
+        )
+    
+    return job
 
 @router.delete("/{notification_id}")
 async def delete_notification(
@@ -341,6 +373,8 @@ async def delete_notification(
             detail="Notification not found"
         )
     
+    if not notification.is_read:
+        adjust_unread_counts(db, {current_user.id: -1})
     db.delete(notification)
     db.commit()
     
@@ -352,10 +386,15 @@ async def delete_all_notifications(
     db: Session = Depends(get_db)
 ):
     """Delete all notifications for current user"""
-    deleted_count = db.query(Notification).filter(
+    unread_deleted = db.query(Notification).filter(
+        Notification.user_id == current_user.id,
+        Notification.is_read == False
+    ).delete()
+    deleted_count = unread_deleted + db.query(Notification).filter(
         Notification.user_id == current_user.id
     ).delete()
     
+    adjust_unread_counts(db, {current_user.id: -unread_deleted})
     db.commit()
     
     return {"message": f"Deleted {deleted_count} notifications"}
\ No newline at end of file
@@ -1,36 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response
+from sqlalchemy import update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
 from datetime import datetime
+import asyncio
+import logging
+import random
 import uuid
-from database import get_db
-from models import Order, OrderItem, Product, User
-from schemas import OrderCreate, OrderResponse, PaymentProcessRequest
+from database import get_db, is_retryable_error
+from models import Order, OrderItem, OrderStatus, Product, User
+from schemas import OrderCreate, OrderResponse, PaymentProcessRequest, OrderStatusUpdate, BulkOrderStatusUpdate, BulkOrderStatusResponse
 from auth import get_current_active_user, get_admin_user
-from routers.payments import process_payment, create_payment_order
+from routers.payments import process_payment, create_payment_order, PaymentGatewayUnavailable
+from cache import invalidate_product_snapshots
+from outbox import enqueue_event
+from idempotency import run_idempotent, StateDependentHTTPException
+from pagination import keyset_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from fulfillment import MAX_BULK_ORDER_IDS, ORDER_STATUS_TRANSITIONS, transition_orders, transition_matching_orders
+from inventory import create_holds, restore_order_stock, finalize_paid_order, fail_unpaid_orders, enqueue_order_cancellations, record_cancelled_captures
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+ORDER_RETRY_ATTEMPTS = 3
+ORDER_RETRY_BACKOFF_SECONDS = 0.05
+
+def get_order_page(
+    db: Session,
+    response: Response,
+    user_id: Optional[int] = None,
+    order_status: Optional[OrderStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
+    """Fetch one newest-first page of orders with users, items and products eager-loaded
+
+    selectinload issues one extra query per relationship, so a page costs the
+    same number of queries however many orders or items it holds.
+    """
+    query = db.query(Order).options(
+        selectinload(Order.user),
+        selectinload(Order.order_items).selectinload(OrderItem.product)
+    )
+    
+    if user_id is not None:
+        query = query.filter(Order.user_id == user_id)
+    
+    if order_status is not None:
+        query = query.filter(Order.status == order_status)
+    
+    if date_from is not None:
+        query = query.filter(Order.created_at >= date_from)
+    
+    if date_to is not None:
+        query = query.filter(Order.created_at < date_to)
+    
+    return keyset_page(query, Order.created_at, Order.id, cursor, limit, response)
+
 @router.get("/", response_model=List[OrderResponse])
 async def get_orders(
+    response: Response,
+    order_status: Optional[OrderStatus] = Query(None, alias="status", description="Filter by order status"),
+    date_from: Optional[datetime] = Query(None, description="Only orders created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only orders created before this time"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Get orders for current user"""
-    orders = db.query(Order).filter(Order.user_id == current_user.id).order_by(
-        Order.created_at.desc()
-    ).all()
-    
-    return orders
+    """Get a page of orders for current user"""
+    return get_order_page(
+        db, response, current_user.id, order_status, date_from, date_to, cursor, limit
+    )
 
 @router.get("/all", response_model=List[OrderResponse])
 async def get_all_orders(
+    response: Response,
+    order_status: Optional[OrderStatus] = Query(None, alias="status", description="Filter by order status"),
+    date_from: Optional[datetime] = Query(None, description="Only orders created at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only orders created before this time"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get all orders (Admin only)"""
-    orders = db.query(Order).order_by(Order.created_at.desc()).all()
-    return orders
+    """Get a page of all orders (Admin only)"""
+    return get_order_page(
+        db, response, None, order_status, date_from, date_to, cursor, limit
+    )
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
@@ -56,41 +117,57 @@ async def get_order(
     
     return order
 
-@router.post("/", response_model=OrderResponse)
-async def create_order(
-    order_data: OrderCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """Create a new order"""
+def _place_order(db: Session, current_user: User, order_data: OrderCreate):
+    """Validate items, reserve stock and write the order in one transaction
+
+    Returns the order and the ids of the products whose stock it reserved.
+    """
     # Generate unique order number
     order_number = f"FL{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4())[:8].upper()}"
     
-    # Calculate total amount and validate products
-    total_amount = 0
-    order_items = []
-    
+    # Total quantity per product, so repeated lines reserve stock once
+    quantities = {}
     for item_data in order_data.items:
-        product = db.query(Product).filter(Product.id == item_data.product_id).first()
+        if item_data.quantity <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Quantity must be greater than 0"
+            )
+        quantities[item_data.product_id] = quantities.get(item_data.product_id, 0) + item_data.quantity
+    
+    # Validate every product with a single IN query
+    products = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_(quantities)).all()
+    }
+    
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
         
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Product with ID {item_data.product_id} not found"
+                detail=f"Product with ID {product_id} not found"
             )
         
         if not product.is_active:
-            raise HTTPException(
+            raise StateDependentHTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Product {product.name} is not available"
             )
         
-        if product.stock_quantity < item_data.quantity:
-            raise HTTPException(
+        if product.stock_quantity < quantity:
+            raise StateDependentHTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Insufficient stock for {product.name}"
             )
-        
+    
+    # Calculate total amount
+    total_amount = 0
+    order_items = []
+    
+    for item_data in order_data.items:
+        product = products[item_data.product_id]
         item_total = product.price * item_data.quantity
         total_amount += item_total
         
@@ -101,6 +178,27 @@ async def create_order(
             "total_price": item_total
         })
     
+    # Reserve stock with conditional atomic updates, always in product-id order
+    # so concurrent checkouts lock rows in the same sequence and can't deadlock
+    for product_id in sorted(quantities):
+        result = db.execute(
+            update(Product)
+            .where(
+                Product.id == product_id,
+                Product.is_active == True,
+                Product.stock_quantity >= quantities[product_id]
+            )
+            .values(stock_quantity=Product.stock_quantity - quantities[product_id])
+            .execution_options(synchronize_session=False)
+        )
+        
+        if result.rowcount != 1:
+            db.rollback()
+            raise StateDependentHTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient stock for {products[product_id].name}"
+            )
+    
     # Create order
     order = Order(
         user_id=current_user.id,
@@ -117,17 +215,51 @@ async def create_order(
     
     # Create order items
     for item_data in order_items:
-        order_item = OrderItem(
-            order_id=order.id,
-            **item_data
-        )
-        db.add(order_item)
-        
-        # Update product stock
-        product = db.query(Product).filter(Product.id == item_data["product_id"]).first()
-        product.stock_quantity -= item_data["quantity"]
+        db.add(OrderItem(order_id=order.id, **item_data))
+    
+    # The reserved stock is only held until the payment window runs out
+    create_holds(db, order.id, quantities)
+    
+    # Recommendations run from the outbox after commit
+    enqueue_event(db, "order.placed", {
+        "order_id": order.id,
+        "user_id": current_user.id,
+        "product_ids": sorted(quantities)
+    }, "order", order.id)
     
     db.commit()
+    
+    return order, sorted(quantities)
+
+@router.post("/", response_model=OrderResponse)
+async def create_order(
+    order_data: OrderCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Create a new order; retries with the same Idempotency-Key return the original order"""
+    return await run_idempotent(
+        db, current_user.id, "orders.create", idempotency_key, order_data,
+        lambda: _create_order(order_data, current_user, db),
+        response_model=OrderResponse
+    )
+
+async def _create_order(order_data: OrderCreate, current_user: User, db: Session):
+    """Place the order, retrying transient database conflicts"""
+    for attempt in range(ORDER_RETRY_ATTEMPTS):
+        try:
+            order, product_ids = _place_order(db, current_user, order_data)
+            break
+        except DBAPIError as e:
+            db.rollback()
+            if not is_retryable_error(e) or attempt == ORDER_RETRY_ATTEMPTS - 1:
+                raise
+            # Back off with jitter so conflicting checkouts don't collide again
+            await asyncio.sleep(ORDER_RETRY_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5))
+    
+    invalidate_product_snapshots(product_ids)
+    
     db.refresh(order)
     
     return order
@@ -136,10 +268,23 @@ async def create_order(
 async def process_order_payment(
     order_id: int,
     payment_data: PaymentProcessRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Process payment for an order"""
+    """Process payment for an order; retries with the same Idempotency-Key are replayed"""
+    return await run_idempotent(
+        db, current_user.id, f"orders.{order_id}.payment", idempotency_key, payment_data,
+        lambda: _process_order_payment(order_id, payment_data, current_user, db)
+    )
+
+async def _process_order_payment(
+    order_id: int,
+    payment_data: PaymentProcessRequest,
+    current_user: User,
+    db: Session
+):
+    """Verify the payment with the gateway and update the order"""
     order = db.query(Order).filter(Order.id == order_id).first()
     
     if not order:
@@ -169,26 +314,56 @@ async def process_order_payment(
         )
         
         if payment_result["success"]:
-            order.payment_status = "completed"
-            order.status = "confirmed"
+            finalized = finalize_paid_order(db, order.id)
+            refunds = [] if finalized else record_cancelled_captures(db, [order.id])
+            if finalized:
+                enqueue_event(db, "order.paid", {
+                    "order_id": order.id,
+                    "user_id": order.user_id,
+                    "order_number": order.order_number
+                }, "order", order.id)
             db.commit()
             
+            if refunds:
+                logger.warning("Payment captured on cancelled order %s, refund needed", order.order_number)
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Order was cancelled before the payment was confirmed; the payment will be refunded"
+                )
+            
+            if not finalized:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Order expired before the payment was confirmed"
+                )
+            
             return {
                 "message": "Payment processed successfully",
                 "transaction_id": payment_result.get("transaction_id")
             }
         else:
-            order.payment_status = "failed"
+            product_ids = fail_unpaid_orders(db, [order.id])
             db.commit()
+            invalidate_product_snapshots(product_ids)
             
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Payment failed: {payment_result.get('error')}"
             )
     
+    except HTTPException:
+        raise
+    except PaymentGatewayUnavailable:
+        # The payment may still have gone through, so the order stays pending
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment gateway is temporarily unavailable, please try again"
+        )
     except Exception as e:
-        order.payment_status = "failed"
-        db.commit()
+        # The gateway may already have captured the money, so the order stays
+        # pending for the webhook or reconciliation to settle
+        db.rollback()
+        logger.exception(f"Payment processing error for order {order.order_number}")
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -198,10 +373,18 @@ async def process_order_payment(
 @router.post("/{order_id}/create-payment")
 async def create_order_payment(
     order_id: int,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Create Razorpay payment order"""
+    """Create Razorpay payment order; retries with the same Idempotency-Key are replayed"""
+    return await run_idempotent(
+        db, current_user.id, f"orders.{order_id}.create-payment", idempotency_key, {},
+        lambda: _create_order_payment(order_id, current_user, db)
+    )
+
+async def _create_order_payment(order_id: int, current_user: User, db: Session):
+    """Create the gateway payment order for an order"""
     order = db.query(Order).filter(Order.id == order_id).first()
     
     if not order:
@@ -240,6 +423,11 @@ async def create_order_payment(
     
     except HTTPException:
         raise
+    except PaymentGatewayUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment gateway is temporarily unavailable, please try again"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -249,7 +437,7 @@ async def create_order_payment(
 @router.put("/{order_id}/status")
 async def update_order_status(
     order_id: int,
-    status_data: dict,
+    status_data: OrderStatusUpdate,
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -262,25 +450,69 @@ async def update_order_status(
             detail="Order not found"
         )
     
-    status = status_data.get("status")
-    if not status:
+    if status_data.status == order.status:
+        return {"message": f"Order status updated to {status_data.status.value}"}
+    
+    if status_data.status not in ORDER_STATUS_TRANSITIONS[order.status]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Status is required"
+            detail=f"Cannot change order from {order.status.value} to {status_data.status.value}"
         )
     
-    # Validate status
-    valid_statuses = ["pending", "confirmed", "shipped", "delivered", "cancelled"]
-    if status not in valid_statuses:
+    if not transition_orders(db, [order.id], status_data.status):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order status changed concurrently, please reload"
+        )
+    
+    return {"message": f"Order status updated to {status_data.status.value}"}
+
+@router.post("/bulk-status", response_model=BulkOrderStatusResponse)
+def bulk_update_order_status(
+    update_data: BulkOrderStatusUpdate,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Move many orders to a new status in chunked set-based updates (Admin only)
+
+    Orders whose current status can't move to the target are skipped.
+    """
+    # Plain def so a large batch runs in the threadpool
+    has_filter = any(
+        value is not None
+        for value in (update_data.current_status, update_data.date_from, update_data.date_to)
+    )
+    
+    if (update_data.order_ids is None) == (not has_filter):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid status. Must be one of: {valid_statuses}"
+            detail="Provide either order_ids or a filter"
         )
     
-    order.status = status
-    db.commit()
+    if update_data.order_ids is not None and len(update_data.order_ids) > MAX_BULK_ORDER_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_ORDER_IDS} orders can be updated per request"
+        )
     
-    return {"message": f"Order status updated to {status}"}
+    if update_data.order_ids is not None:
+        moved = set(transition_orders(db, update_data.order_ids, update_data.status))
+        
+        return {
+            "status": update_data.status,
+            "updated": len(moved),
+            "skipped_ids": [order_id for order_id in dict.fromkeys(update_data.order_ids) if order_id not in moved]
+        }
+    
+    updated = transition_matching_orders(
+        db,
+        update_data.status,
+        update_data.current_status,
+        update_data.date_from,
+        update_data.date_to
+    )
+    
+    return {"status": update_data.status, "updated": updated, "skipped_ids": []}
 
 @router.post("/{order_id}/cancel")
 async def cancel_order(
@@ -303,21 +535,24 @@ async def cancel_order(
             detail="Not enough permissions"
         )
     
-    if order.status.value in ["shipped", "delivered", "cancelled"]:
+    # Conditional so an order the sweeper or an admin moved meanwhile isn't cancelled twice
+    cancelled = db.query(Order).filter(
+        Order.id == order.id,
+        Order.status.notin_([OrderStatus.SHIPPED, OrderStatus.DELIVERED, OrderStatus.CANCELLED])
+    ).update({"status": OrderStatus.CANCELLED}, synchronize_session=False)
+    
+    if not cancelled:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot cancel this order"
         )
     
-    # Cancel order
-    order.status = "cancelled"
-    
-    # Restore product stock
-    for item in order.order_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            product.stock_quantity += item.quantity
+    # Releasing through the holds means a sweeper that already expired
+    # this order can't hand its stock back a second time
+    product_ids = restore_order_stock(db, [order.id])
+    enqueue_order_cancellations(db, [order.id])
     
     db.commit()
+    invalidate_product_snapshots(product_ids)
     
     return {"message": "Order cancelled successfully"}
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
 from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+import hashlib
+import asyncio
+import time
 import razorpay
+import requests
 import os
 from dotenv import load_dotenv
 from database import get_db
 from models import User, Order
 from auth import get_current_active_user, get_admin_user
 from schemas import PaymentVerificationRequest
+from payment_gateway import build_payment_gateway
+from resilience import CircuitBreaker, CircuitOpenError, LatencyMetrics, retry_async
+from payment_webhooks import get_webhook_secret, verify_webhook_signature, store_webhook_event
 
 try:
     load_dotenv()
@@ -16,25 +26,84 @@ except (UnicodeDecodeError, FileNotFoundError):
 
 router = APIRouter()
 
-# Initialize Razorpay client
-razorpay_client = razorpay.Client(
-    auth=(os.getenv("RAZORPAY_KEY_ID"), os.getenv("RAZORPAY_KEY_SECRET"))
+RAZORPAY_CONNECT_TIMEOUT_SECONDS = float(os.getenv("RAZORPAY_CONNECT_TIMEOUT", "3"))
+RAZORPAY_READ_TIMEOUT_SECONDS = float(os.getenv("RAZORPAY_READ_TIMEOUT", "10"))
+RAZORPAY_MAX_WORKERS = int(os.getenv("RAZORPAY_MAX_WORKERS", "16"))
+RAZORPAY_FETCH_ATTEMPTS = 3
+RAZORPAY_RETRY_BACKOFF_SECONDS = 0.2
+
+# Errors that say nothing about the request itself, so the gateway may be degraded
+TRANSIENT_GATEWAY_ERRORS = (
+    requests.RequestException,
+    razorpay.errors.ServerError,
+    razorpay.errors.GatewayError
 )
 
+class PaymentGatewayUnavailable(Exception):
+    """The gateway timed out, kept failing, or its circuit breaker is open"""
+
+# Razorpay by default; see payment_gateway.build_payment_gateway for the fake
+payment_gateway = build_payment_gateway(RAZORPAY_MAX_WORKERS)
+
+# Gateway clients are blocking, so calls run on a bounded pool off the event loop
+gateway_executor = ThreadPoolExecutor(max_workers=RAZORPAY_MAX_WORKERS, thread_name_prefix="razorpay")
+razorpay_breaker = CircuitBreaker("razorpay", failure_threshold=5, reset_timeout_seconds=30)
+gateway_metrics = LatencyMetrics()
+
+async def _call_gateway(operation: str, func, *args, **kwargs):
+    """Run one blocking SDK call with timeouts, breaker accounting and latency metrics"""
+    try:
+        trial = razorpay_breaker.before_call()
+    except CircuitOpenError:
+        gateway_metrics.record(operation, None, "rejected")
+        raise
+    
+    kwargs["timeout"] = (RAZORPAY_CONNECT_TIMEOUT_SECONDS, RAZORPAY_READ_TIMEOUT_SECONDS)
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    
+    try:
+        result = await loop.run_in_executor(gateway_executor, partial(func, *args, **kwargs))
+    except TRANSIENT_GATEWAY_ERRORS:
+        razorpay_breaker.record_failure()
+        gateway_metrics.record(operation, time.perf_counter() - started, "error")
+        raise
+    except Exception:
+        # Client errors such as bad requests mean the gateway itself is healthy
+        razorpay_breaker.record_success()
+        gateway_metrics.record(operation, time.perf_counter() - started, "rejected_by_gateway")
+        raise
+    else:
+        razorpay_breaker.record_success()
+        gateway_metrics.record(operation, time.perf_counter() - started, "ok")
+        return result
+    finally:
+        # A cancelled trial records no outcome and would otherwise block every later call
+        if trial:
+            razorpay_breaker.end_trial()
+
+def shutdown_payment_gateway():
+    """Stop the gateway worker threads; called on app shutdown"""
+    gateway_executor.shutdown(wait=False, cancel_futures=True)
+
 async def create_payment_order(amount: float, order_number: str):
-    """Create a Razorpay payment order"""
+    """Create a Razorpay payment order
+
+    Not retried: creating an order isn't idempotent on the gateway side.
+    Raises PaymentGatewayUnavailable when the gateway can't be reached.
+    """
     try:
         # Convert amount to paise (Razorpay expects amount in smallest currency unit)
-        amount_paise = int(amount * 100)
+        amount_paise = round(amount * 100)
         
-        payment_order = razorpay_client.order.create({
-            'amount': amount_paise,
-            'currency': 'INR',
-            'receipt': order_number,
-            'notes': {
-                'order_number': order_number
-            }
-        })
+        payment_order = await _call_gateway(
+            "order.create",
+            payment_gateway.create_order,
+            amount_paise,
+            'INR',
+            order_number,
+            {'order_number': order_number}
+        )
         
         return {
             "success": True,
@@ -44,6 +113,8 @@ async def create_payment_order(amount: float, order_number: str):
             "receipt": order_number
         }
     
+    except (CircuitOpenError, *TRANSIENT_GATEWAY_ERRORS) as e:
+        raise PaymentGatewayUnavailable(str(e))
     except Exception as e:
         return {
             "success": False,
@@ -51,7 +122,11 @@ async def create_payment_order(amount: float, order_number: str):
         }
 
 async def process_payment(amount: float, payment_id: str, order_number: str):
-    """Process payment verification"""
+    """Process payment verification
+
+    Fetching a payment is read-only, so transient failures are retried with
+    jitter. Raises PaymentGatewayUnavailable if the outcome can't be known.
+    """
     try:
         # For test payments, simulate success
         if payment_id.startswith("test_"):
@@ -63,7 +138,12 @@ async def process_payment(amount: float, payment_id: str, order_number: str):
             }
         
         # Verify payment with Razorpay
-        payment = razorpay_client.payment.fetch(payment_id)
+        payment = await retry_async(
+            lambda: _call_gateway("payment.fetch", payment_gateway.fetch_payment, payment_id),
+            attempts=RAZORPAY_FETCH_ATTEMPTS,
+            backoff_seconds=RAZORPAY_RETRY_BACKOFF_SECONDS,
+            retry_on=TRANSIENT_GATEWAY_ERRORS
+        )
         
         if payment['status'] == 'captured':
             return {
@@ -78,12 +158,30 @@ async def process_payment(amount: float, payment_id: str, order_number: str):
                 "error": f"Payment not captured. Status: {payment['status']}"
             }
     
+    except (CircuitOpenError, *TRANSIENT_GATEWAY_ERRORS) as e:
+        raise PaymentGatewayUnavailable(str(e))
     except Exception as e:
         return {
             "success": False,
             "error": str(e)
         }
 
+async def fetch_payment_orders(order_number: str) -> list:
+    """Fetch every gateway order created for one of our orders
+
+    Read-only, so retried like payment fetches. Raises
+    PaymentGatewayUnavailable if the gateway can't be reached.
+    """
+    try:
+        return await retry_async(
+            lambda: _call_gateway("order.list", payment_gateway.fetch_orders_by_receipt, order_number),
+            attempts=RAZORPAY_FETCH_ATTEMPTS,
+            backoff_seconds=RAZORPAY_RETRY_BACKOFF_SECONDS,
+            retry_on=TRANSIENT_GATEWAY_ERRORS
+        )
+    except (CircuitOpenError, *TRANSIENT_GATEWAY_ERRORS) as e:
+        raise PaymentGatewayUnavailable(str(e))
+
 @router.post("/create-order")
 async def create_razorpay_order(
     amount: float,
@@ -97,7 +195,13 @@ async def create_razorpay_order(
             detail="Amount must be greater than 0"
         )
     
-    result = await create_payment_order(amount, order_number)
+    try:
+        result = await create_payment_order(amount, order_number)
+    except PaymentGatewayUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment gateway is temporarily unavailable, please try again"
+        )
     
     if result["success"]:
         return result
@@ -115,13 +219,12 @@ async def verify_payment(
     """Verify payment signature"""
     try:
         # Verify payment signature
-        params_dict = {
-            'razorpay_order_id': verification_data.order_id,
-            'razorpay_payment_id': verification_data.payment_id,
-            'razorpay_signature': verification_data.signature
-        }
-        
-        razorpay_client.utility.verify_payment_signature(params_dict)
+        if not payment_gateway.verify_payment_signature(
+            verification_data.order_id,
+            verification_data.payment_id,
+            verification_data.signature
+        ):
+            raise ValueError("Signature mismatch")
         
         return {
             "success": True,
@@ -136,10 +239,56 @@ async def verify_payment(
             detail=f"Payment verification failed: {str(e)}"
         )
 
+@router.post("/webhook")
+async def razorpay_webhook(
+    request: Request,
+    x_razorpay_signature: Optional[str] = Header(None),
+    x_razorpay_event_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Receive a Razorpay webhook; it is stored and applied to the order in the background"""
+    secret = get_webhook_secret()
+    if not secret:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhooks are not configured"
+        )
+    
+    body = await request.body()
+    
+    if not verify_webhook_signature(body, x_razorpay_signature, secret):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook signature"
+        )
+    
+    # Razorpay redelivers with the same event id; fall back to the body hash
+    event_id = x_razorpay_event_id or hashlib.sha256(body).hexdigest()
+    
+    try:
+        stored = store_webhook_event(db, event_id, body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Webhook body must be JSON"
+        )
+    
+    return {"status": "ok", "duplicate": not stored}
+
+@router.get("/metrics")
+async def get_gateway_metrics(current_user: User = Depends(get_admin_user)):
+    """Gateway call latency and circuit breaker state (Admin only)"""
+    return {
+        "circuit_breaker": razorpay_breaker.state,
+        "operations": gateway_metrics.snapshot()
+    }
+
 @router.get("/config")
 async def get_payment_config():
     """Get payment configuration for frontend"""
     return {
         "key_id": os.getenv("RAZORPAY_KEY_ID"),
-        "currency": "INR"
+        "currency": "INR",
+        # When true, captured payments are confirmed by webhook and the client needn't report them
+        "webhooks_enabled": bool(get_webhook_secret())
     }
\ No newline at end of file
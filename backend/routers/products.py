@@ -1,38 +1,164 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from sqlalchemy import func, case
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import json
 from database import get_db
 from models import Product, ProductReview, User
-from schemas import ProductCreate, ProductUpdate, ProductResponse, ProductReviewCreate, ProductReviewResponse
+from schemas import ProductCreate, ProductUpdate, ProductResponse, ProductBatchResponse, ProductImportResponse, ProductReviewCreate, ProductReviewResponse
 from auth import get_current_active_user, get_admin_user
+from cache import product_facets_cache, product_snapshot_cache, invalidate_catalog_caches
+from nutrition import apply_nutrition
+from images import process_product_image, MAX_IMAGE_BYTES
+from recommendations import get_bought_together
+from catalog_import import detect_import_format, iter_import_rows, import_products
 
 router = APIRouter()
 
+MAX_BATCH_PRODUCTS = 100
+
+class ProductFilters:
+    """Catalog filters shared by the product list and its facets
+
+    Used as a dependency, so both endpoints accept exactly the same query
+    parameters and filter the same way.
+    """
+
+    def __init__(
+        self,
+        category: Optional[str] = Query(None, description="Filter by product category"),
+        search: Optional[str] = Query(None, description="Search products by name"),
+        min_price: Optional[float] = Query(None, description="Minimum price filter"),
+        max_price: Optional[float] = Query(None, description="Maximum price filter"),
+        min_protein: Optional[float] = Query(None, description="Minimum protein per serving in grams"),
+        max_protein: Optional[float] = Query(None, description="Maximum protein per serving in grams"),
+        min_carbs: Optional[float] = Query(None, description="Minimum carbs per serving in grams"),
+        max_carbs: Optional[float] = Query(None, description="Maximum carbs per serving in grams"),
+        min_fat: Optional[float] = Query(None, description="Minimum fat per serving in grams"),
+        max_fat: Optional[float] = Query(None, description="Maximum fat per serving in grams"),
+        min_calories: Optional[float] = Query(None, description="Minimum calories per serving"),
+        max_calories: Optional[float] = Query(None, description="Maximum calories per serving")
+    ):
+        self.category = category
+        self.search = search
+        self.min_price = min_price
+        self.max_price = max_price
+        # Typed nutrient column -> (min, max) bounds
+        self.nutrient_ranges = {
+            "protein_g": (min_protein, max_protein),
+            "carbs_g": (min_carbs, max_carbs),
+            "fat_g": (min_fat, max_fat),
+            "calories": (min_calories, max_calories),
+        }
+    
+    def cache_key(self) -> tuple:
+        return (self.category, self.search, self.min_price, self.max_price, tuple(self.nutrient_ranges.items()))
+    
+    def apply(self, query):
+        """Apply the filters to a product query"""
+        query = query.filter(Product.is_active == True)
+        
+        if self.category:
+            query = query.filter(Product.category.ilike(f"%{self.category}%"))
+        
+        if self.search:
+            query = query.filter(Product.name.ilike(f"%{self.search}%"))
+        
+        if self.min_price is not None:
+            query = query.filter(Product.price >= self.min_price)
+        
+        if self.max_price is not None:
+            query = query.filter(Product.price <= self.max_price)
+        
+        for column_name, (minimum, maximum) in self.nutrient_ranges.items():
+            column = getattr(Product, column_name)
+            if minimum is not None:
+                query = query.filter(column >= minimum)
+            if maximum is not None:
+                query = query.filter(column <= maximum)
+        
+        return query
+
 @router.get("/", response_model=List[ProductResponse])
 async def get_products(
-    category: Optional[str] = Query(None, description="Filter by product category"),
-    search: Optional[str] = Query(None, description="Search products by name"),
-    min_price: Optional[float] = Query(None, description="Minimum price filter"),
-    max_price: Optional[float] = Query(None, description="Maximum price filter"),
+    filters: ProductFilters = Depends(),
     db: Session = Depends(get_db)
 ):
     """Get all active products with optional filters"""
-    query = db.query(Product).filter(Product.is_active == True)
+    products = filters.apply(db.query(Product)).order_by(Product.created_at.desc()).all()
+    return products
+
+@router.get("/facets")
+async def get_product_facets(
+    filters: ProductFilters = Depends(),
+    price_bucket_size: float = Query(500, gt=0, description="Width of each price histogram bucket"),
+    db: Session = Depends(get_db)
+):
+    """Get category, price, rating and stock counts for the filtered catalog"""
+    cache_key = (filters.cache_key(), price_bucket_size)
+    cached = product_facets_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    if category:
-        query = query.filter(Product.category.ilike(f"%{category}%"))
+    price_bucket = func.floor(Product.price / price_bucket_size)
+    # Fold perfect 5.0 ratings into the 4-5 band
+    rating_band = case(
+        (Product.rating >= 5, 4),
+        else_=func.floor(func.coalesce(Product.rating, 0))
+    )
+    in_stock = case((Product.stock_quantity > 0, True), else_=False)
     
-    if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
+    # One grouped query; every facet is rolled up from these rows
+    rows = filters.apply(
+        db.query(
+            Product.category,
+            price_bucket,
+            rating_band,
+            in_stock,
+            func.count(Product.id)
+        )
+    ).group_by(Product.category, price_bucket, rating_band, in_stock).all()
     
-    if min_price is not None:
-        query = query.filter(Product.price >= min_price)
+    total = 0
+    in_stock_count = 0
+    categories = {}
+    price_buckets = {}
+    rating_bands = {}
     
-    if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+    for row_category, row_bucket, row_band, row_in_stock, count in rows:
+        total += count
+        if row_in_stock:
+            in_stock_count += count
+        if row_category is not None:
+            categories[row_category] = categories.get(row_category, 0) + count
+        price_buckets[int(row_bucket)] = price_buckets.get(int(row_bucket), 0) + count
+        rating_bands[int(row_band)] = rating_bands.get(int(row_band), 0) + count
     
-    products = query.order_by(Product.created_at.desc()).all()
-    return products
+    facets = {
+        "total": total,
+        "in_stock": in_stock_count,
+        "out_of_stock": total - in_stock_count,
+        "categories": [
+            {"category": name, "count": count}
+            for name, count in sorted(categories.items())
+        ],
+        "price_buckets": [
+            {
+                "min": bucket * price_bucket_size,
+                "max": (bucket + 1) * price_bucket_size,
+                "count": count
+            }
+            for bucket, count in sorted(price_buckets.items())
+        ],
+        "rating_bands": [
+            {"min": band, "max": band + 1, "count": count}
+            for band, count in sorted(rating_bands.items())
+        ]
+    }
+    
+    product_facets_cache.set(cache_key, facets)
+    return facets
 
 @router.get("/categories")
 async def get_product_categories(db: Session = Depends(get_db)):
@@ -44,6 +170,48 @@ async def get_product_categories(db: Session = Depends(get_db)):
     
     return [cat[0] for cat in categories]
 
+@router.get("/batch", response_model=ProductBatchResponse)
+async def get_products_batch(
+    ids: str = Query(..., description="Comma-separated product IDs"),
+    db: Session = Depends(get_db)
+):
+    """Get several products by ID in request order, reporting IDs that don't exist"""
+    try:
+        requested_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    
+    # Drop duplicates but keep the order the client asked for
+    requested_ids = list(dict.fromkeys(requested_ids))
+    
+    if len(requested_ids) > MAX_BATCH_PRODUCTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_PRODUCTS} products can be requested at once"
+        )
+    
+    found = {}
+    for product_id in requested_ids:
+        snapshot = product_snapshot_cache.get(product_id)
+        if snapshot is not None:
+            found[product_id] = snapshot
+    
+    # Fetch everything the snapshot couldn't serve with a single IN query
+    uncached_ids = [product_id for product_id in requested_ids if product_id not in found]
+    if uncached_ids:
+        for product in db.query(Product).filter(Product.id.in_(uncached_ids)).all():
+            snapshot = ProductResponse.model_validate(product)
+            product_snapshot_cache.set(product.id, snapshot)
+            found[product.id] = snapshot
+    
+    return {
+        "products": [found[product_id] for product_id in requested_ids if product_id in found],
+        "missing_ids": [product_id for product_id in requested_ids if product_id not in found]
+    }
+
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(product_id: int, db: Session = Depends(get_db)):
     """Get a specific product by ID"""
@@ -57,6 +225,17 @@ async def get_product(product_id: int, db: Session = Depends(get_db)):
     
     return product
 
+def _commit_product(db: Session):
+    """Commit a product write, turning a duplicate SKU into a 400"""
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="SKU already exists"
+        )
+
 @router.post("/", response_model=ProductResponse)
 async def create_product(
     product_data: ProductCreate,
@@ -65,13 +244,34 @@ async def create_product(
 ):
     """Create a new product (Admin only)"""
     product = Product(**product_data.dict())
+    apply_nutrition(product)
     
     db.add(product)
-    db.commit()
+    _commit_product(db)
     db.refresh(product)
+    invalidate_catalog_caches()
     
     return product
 
+@router.post("/bulk", response_model=ProductImportResponse)
+def bulk_import_products(
+    file: UploadFile = File(..., description="CSV with a header row, or JSON Lines"),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|jsonl)$", description="csv or jsonl; guessed from the file name if omitted"),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Create or update products by SKU from a streamed CSV/JSONL file (Admin only)"""
+    # Plain def so the long-running import runs in the threadpool
+    rows = iter_import_rows(file.file, file_format or detect_import_format(file.filename))
+    
+    try:
+        result = import_products(db, rows)
+    finally:
+        # Earlier chunks may have committed even if a later one failed
+        invalidate_catalog_caches()
+    
+    return result
+
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
@@ -93,8 +293,68 @@ async def update_product(
     for field, value in update_data.items():
         setattr(product, field, value)
     
+    if "nutritional_info" in update_data:
+        apply_nutrition(product)
+    
+    _commit_product(db)
+    db.refresh(product)
+    invalidate_catalog_caches()
+    
+    return product
+
+@router.get("/{product_id}/bought-together", response_model=List[ProductResponse])
+async def get_frequently_bought_together(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=50, description="Number of recommendations"),
+    db: Session = Depends(get_db)
+):
+    """Get products most often bought together with this product"""
+    return get_bought_together(db, product_id, limit)
+
+@router.post("/{product_id}/image", response_model=ProductResponse)
+async def upload_product_image(
+    product_id: int,
+    image: UploadFile = File(...),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Upload a product image and generate its pre-sized variants (Admin only)"""
+    product = db.query(Product).filter(Product.id == product_id).first()
+    
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    if not (image.content_type or "").startswith("image/"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an image"
+        )
+    
+    data = await image.read(MAX_IMAGE_BYTES + 1)
+    if len(data) > MAX_IMAGE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Image must be smaller than {MAX_IMAGE_BYTES // (1024 * 1024)}MB"
+        )
+    
+    try:
+        variants = await process_product_image(data)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not process image: {str(e)}"
+        )
+    
+    # The grid loads the card variant; clients pick other sizes from image_variants
+    product.image_url = variants["card"]["webp"]
+    product.image_variants = json.dumps(variants)
+    
     db.commit()
     db.refresh(product)
+    invalidate_catalog_caches()
     
     return product
 
@@ -116,6 +376,7 @@ async def delete_product(
     # Soft delete by setting is_active to False
     product.is_active = False
     db.commit()
+    invalidate_catalog_caches()
     
     return {"message": "Product deleted successfully"}
 
@@ -181,6 +442,7 @@ async def create_product_review(
     
     db.commit()
     db.refresh(review)
+    invalidate_catalog_caches()
     
     return review
 
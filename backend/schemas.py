@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from datetime import datetime
-from models import UserRole, ConsultationStatus, OrderStatus, PaymentStatus
+from models import UserRole, ConsultationStatus, OrderStatus, PaymentStatus, BroadcastStatus
 
 # Base schemas
 class UserBase(BaseModel):
@@ -144,6 +144,7 @@ class ConsultationResponse(BaseModel):
 
 # Product schemas
 class ProductBase(BaseModel):
+    sku: Optional[str] = None
     name: str
     description: str
     category: str
@@ -156,7 +157,11 @@ class ProductBase(BaseModel):
 class ProductCreate(ProductBase):
     pass
 
+class ProductImportRow(ProductBase):
+    sku: str
+
 class ProductUpdate(BaseModel):
+    sku: Optional[str] = None
     name: Optional[str] = None
     description: Optional[str] = None
     category: Optional[str] = None
@@ -169,6 +174,11 @@ class ProductUpdate(BaseModel):
 
 class ProductResponse(ProductBase):
     id: int
+    protein_g: Optional[float] = None
+    carbs_g: Optional[float] = None
+    fat_g: Optional[float] = None
+    calories: Optional[float] = None
+    image_variants: Optional[str] = None
     rating: float
     total_reviews: int
     is_active: bool
@@ -178,6 +188,23 @@ class ProductResponse(ProductBase):
     class Config:
         from_attributes = True
 
+class ProductImportError(BaseModel):
+    row: int
+    sku: Optional[str] = None
+    error: str
+
+class ProductImportResponse(BaseModel):
+    processed: int
+    upserted: int
+    failed: int
+    # Chunks rolled back by a database error; their rows are in errors
+    failed_chunks: int = 0
+    errors: List[ProductImportError]
+
+class ProductBatchResponse(BaseModel):
+    products: List[ProductResponse]
+    missing_ids: List[int]
+
 # Order schemas
 class OrderItemCreate(BaseModel):
     product_id: int
@@ -220,6 +247,22 @@ class OrderResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class OrderStatusUpdate(BaseModel):
+    status: OrderStatus
+
+class BulkOrderStatusUpdate(BaseModel):
+    status: OrderStatus
+    # Either explicit ids, or a filter over current status and creation date
+    order_ids: Optional[List[int]] = None
+    current_status: Optional[OrderStatus] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+class BulkOrderStatusResponse(BaseModel):
+    status: OrderStatus
+    updated: int
+    skipped_ids: List[int]
+
 # Progress tracking schemas
 class ProgressRecordCreate(BaseModel):
     weight: Optional[float] = None
@@ -312,6 +355,33 @@ class NotificationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class NotificationUserSummary(BaseModel):
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+
+class AdminNotificationResponse(NotificationResponse):
+    user: NotificationUserSummary
+
+class BroadcastJobResponse(BaseModel):
+    id: int
+    title: str
+    type: Optional[str] = None
+    send_email: bool
+    send_sms: bool
+    status: BroadcastStatus
+    total_recipients: Optional[int] = None
+    sent_count: int
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # Payment verification schema
 class PaymentVerificationRequest(BaseModel):
     payment_id: str
@@ -0,0 +1,172 @@
+import smtplib
+import threading
+import time
+from collections import deque
+from typing import List, Optional, Tuple
+
+# (sender, recipient, full message text)
+OutgoingEmail = Tuple[str, str, str]
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+class SMTPConnectionPool:
+    """Reusable logged-in SMTP sessions shared by the email delivery threads
+
+    At most max_size sessions exist at once. A session idle for longer than
+    noop_after_seconds is checked with NOOP before reuse, one idle for longer
+    than max_idle_seconds is replaced, since servers drop quiet clients. A
+    session is retired after max_messages_per_connection messages to stay
+    under provider per-connection limits.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        max_size: int = 4,
+        max_messages_per_connection: int = 100,
+        noop_after_seconds: float = 10,
+        max_idle_seconds: float = 120,
+        timeout: float = 30
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.max_messages_per_connection = max_messages_per_connection
+        self.noop_after_seconds = noop_after_seconds
+        self.max_idle_seconds = max_idle_seconds
+        self.timeout = timeout
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"connections_opened": 0, "reconnects": 0, "messages_sent": 0}
+
+    def _connect(self) -> _PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+
+        with self._lock:
+            self.stats["connections_opened"] += 1
+        return _PooledConnection(smtp)
+
+    def _is_healthy(self, connection: _PooledConnection) -> bool:
+        idle_for = time.monotonic() - connection.last_used
+        if idle_for > self.max_idle_seconds:
+            return False
+        if idle_for > self.noop_after_seconds:
+            try:
+                return connection.smtp.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                return False
+        return True
+
+    def _checkout(self) -> _PooledConnection:
+        """Reuse the most recently used healthy session, or open a new one"""
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect()
+            if self._is_healthy(connection):
+                return connection
+            connection.close()
+
+    def _checkin(self, connection: _PooledConnection):
+        connection.last_used = time.monotonic()
+        if self._closed or connection.messages_sent >= self.max_messages_per_connection:
+            connection.close()
+            return
+        with self._lock:
+            self._idle.append(connection)
+
+    def send_batch(self, emails: List[OutgoingEmail]) -> List[Optional[Exception]]:
+        """Send many emails over one pooled session
+
+        Returns one entry per email: None if the server accepted it, else the
+        error. A refused message doesn't affect the rest of the batch. A dead
+        session is replaced and the message retried once; if that fails too,
+        the remaining messages fail with the same error.
+        """
+        results: List[Optional[Exception]] = []
+        connection = None
+
+        self._slots.acquire()
+        try:
+            for index, email in enumerate(emails):
+                error = None
+
+                for attempt in range(2):
+                    try:
+                        if connection is None:
+                            connection = self._checkout()
+                        elif connection.messages_sent >= self.max_messages_per_connection:
+                            connection.close()
+                            connection = None
+                            connection = self._connect()
+
+                        connection.smtp.sendmail(*email)
+                        connection.messages_sent += 1
+                        error = None
+                        break
+                    except smtplib.SMTPServerDisconnected as e:
+                        error = e
+                    except smtplib.SMTPException as e:
+                        # Refused by the server; the session is still usable
+                        error = e
+                        break
+                    except OSError as e:
+                        error = e
+
+                    # The session died or couldn't be opened; try once more on a fresh one
+                    if connection is not None:
+                        connection.close()
+                        connection = None
+                    if attempt == 0:
+                        with self._lock:
+                            self.stats["reconnects"] += 1
+
+                if error is not None and connection is None:
+                    results.extend([error] * (len(emails) - index))
+                    return results
+
+                results.append(error)
+                if error is None:
+                    with self._lock:
+                        self.stats["messages_sent"] += 1
+
+            if connection is not None:
+                self._checkin(connection)
+            return results
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Quit every idle session; sessions in use are closed when returned"""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            connection.close()
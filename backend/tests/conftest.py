@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Point the app at a throwaway SQLite database before anything imports database.py
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ["BACKGROUND_TASKS_ENABLED"] = "false"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+from database import Base, SessionLocal, engine
+from models import User, UserRole
+from auth import get_password_hash, create_access_token
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client(db):
+    # Not used as a context manager, so the startup hooks and workers never run
+    return TestClient(main.app)
+
+def _create_user(db, username, role):
+    user = User(
+        username=username,
+        email=f"{username}@example.com",
+        hashed_password=get_password_hash("password"),
+        first_name=username.title(),
+        last_name="Test",
+        role=role
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+@pytest.fixture
+def admin(db):
+    return _create_user(db, "admin", UserRole.ADMIN)
+
+@pytest.fixture
+def shopper(db):
+    return _create_user(db, "shopper", UserRole.USER)
+
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.username})}"}
+
+@contextmanager
+def count_queries():
+    """Count the SQL statements executed inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
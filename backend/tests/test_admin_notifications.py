@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+
+from models import Notification, User, UserRole
+from conftest import auth_headers, count_queries
+
+ADMIN_LIST_URL = "/api/notifications/admin/all"
+
+def _create_notifications(db, count, **fields):
+    """One notification per new user, so a per-row user lookup would show up as extra queries"""
+    first = db.query(Notification).count()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(first, first + count):
+        user = User(
+            username=f"member{i}",
+            email=f"member{i}@example.com",
+            hashed_password="x",
+            first_name="Member",
+            last_name=str(i),
+            role=UserRole.USER
+        )
+        db.add(user)
+        db.flush()
+        db.add(Notification(
+            user_id=user.id,
+            title=f"Notification {i}",
+            message="Message",
+            type=fields.get("type", "system"),
+            is_read=fields.get("is_read", False),
+            created_at=start + timedelta(minutes=i)
+        ))
+    db.commit()
+
+def _statements_for_page(client, headers, params=None):
+    with count_queries() as statements:
+        response = client.get(ADMIN_LIST_URL, headers=headers, params=params or {})
+    assert response.status_code == 200
+    return len(statements), response.json()
+
+def test_admin_list_statement_count_is_the_same_for_one_and_many_rows(db, client, admin):
+    headers = auth_headers(admin)
+
+    _create_notifications(db, 1)
+    single_count, single_page = _statements_for_page(client, headers)
+
+    _create_notifications(db, 30)
+    many_count, many_page = _statements_for_page(client, headers)
+
+    assert len(single_page) == 1
+    assert len(many_page) == 31
+    assert many_count == single_count
+    assert many_page[0]["user"]["username"] == "member30"
+
+def test_admin_list_filters_and_pages(db, client, admin):
+    headers = auth_headers(admin)
+    _create_notifications(db, 5, type="order")
+    _create_notifications(db, 3, type="system", is_read=True)
+
+    _, unread_orders = _statements_for_page(client, headers, {"type": "order", "is_read": False})
+    assert len(unread_orders) == 5
+    assert all(notification["type"] == "order" for notification in unread_orders)
+
+    response = client.get(ADMIN_LIST_URL, headers=headers, params={"limit": 6})
+    assert len(response.json()) == 6
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(ADMIN_LIST_URL, headers=headers, params={"limit": 6, "cursor": cursor})
+    assert len(response.json()) == 2
+    assert "X-Next-Cursor" not in response.headers
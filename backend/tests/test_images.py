@@ -0,0 +1,29 @@
+import io
+import os
+
+from PIL import Image
+
+from images import generate_image_variants, IMAGE_VARIANTS
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), "white").save(buffer, "PNG")
+    return buffer.getvalue()
+
+def test_first_upload_creates_the_output_directory(tmp_path):
+    output_dir = tmp_path / "static" / "products"
+
+    variants = generate_image_variants(_png(), str(output_dir))
+
+    assert set(variants) == set(IMAGE_VARIANTS)
+    assert len(os.listdir(output_dir / "originals")) == 1
+
+def test_invalid_image_leaves_no_files(tmp_path):
+    output_dir = tmp_path / "products"
+
+    try:
+        generate_image_variants(b"not an image", str(output_dir))
+    except Exception:
+        pass
+
+    assert not output_dir.exists() or not any(output_dir.rglob("*.*"))
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from models import Order, OrderItem, Product
+from conftest import auth_headers, count_queries
+
+def _create_orders(db, user, count, items_per_order=3):
+    """Create orders with explicit, distinct timestamps so keyset cursors are exact"""
+    products = [
+        Product(name=f"Product {i}", description="d", category="snacks", price=10.0, stock_quantity=100)
+        for i in range(items_per_order)
+    ]
+    db.add_all(products)
+    db.flush()
+
+    first = db.query(Order).count()
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(first, first + count):
+        order = Order(
+            user_id=user.id,
+            order_number=f"ORD-{user.id}-{i}",
+            total_amount=10.0 * items_per_order,
+            created_at=start + timedelta(minutes=i)
+        )
+        order.order_items = [
+            OrderItem(product_id=product.id, quantity=1, unit_price=10.0, total_price=10.0)
+            for product in products
+        ]
+        db.add(order)
+    db.commit()
+
+def _statements_for_page(client, url, headers):
+    with count_queries() as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return len(statements), response.json()
+
+@pytest.mark.parametrize("url", ["/api/orders/", "/api/admin/orders"])
+def test_order_page_query_count_does_not_grow_with_rows(db, client, admin, url):
+    headers = auth_headers(admin)
+
+    _create_orders(db, admin, 1)
+    single_count, single_page = _statements_for_page(client, url, headers)
+
+    _create_orders(db, admin, 20)
+    many_count, many_page = _statements_for_page(client, url, headers)
+
+    assert len(single_page) == 1
+    assert len(many_page) == 21
+    assert many_count == single_count
+
+def test_following_next_cursor_returns_every_order_once(db, client, shopper):
+    headers = auth_headers(shopper)
+    _create_orders(db, shopper, 7, items_per_order=1)
+
+    seen = []
+    params = {"limit": 3}
+    while True:
+        response = client.get("/api/orders/", headers=headers, params=params)
+        assert response.status_code == 200
+        seen.extend(order["id"] for order in response.json())
+
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params = {"limit": 3, "cursor": cursor}
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+
+def _place_order(client, headers, product_id):
+    response = client.post("/api/orders/", headers=headers, json={
+        "items": [{"product_id": product_id, "quantity": 1}],
+        "shipping_address": "Street",
+        "billing_address": "Street",
+        "payment_method": "razorpay"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def _last_unit(db):
+    product = Product(name="Last unit", description="d", category="snacks", price=10.0, stock_quantity=1)
+    db.add(product)
+    db.commit()
+    return product.id
+
+def test_paying_a_cancelled_order_does_not_sell_its_stock_twice(db, client, shopper):
+    headers = auth_headers(shopper)
+    product_id = _last_unit(db)
+
+    order_id = _place_order(client, headers, product_id)
+    assert client.post(f"/api/orders/{order_id}/cancel", headers=headers).status_code == 200
+
+    response = client.post(f"/api/orders/{order_id}/payment", headers=headers, json={"payment_id": "test_1"})
+    assert response.status_code == 409
+
+    db.expire_all()
+    order = db.get(Order, order_id)
+    assert order.status.value == "cancelled"
+    assert order.payment_status.value == "completed"
+
+    # The released unit can still be sold exactly once
+    _place_order(client, headers, product_id)
+    assert db.get(Product, product_id).stock_quantity == 0
+
+def test_payment_error_after_capture_leaves_the_order_pending(db, client, shopper, monkeypatch):
+    headers = auth_headers(shopper)
+    product_id = _last_unit(db)
+    order_id = _place_order(client, headers, product_id)
+
+    def fail_after_capture(db, order_id):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr("routers.orders.finalize_paid_order", fail_after_capture)
+    response = client.post(f"/api/orders/{order_id}/payment", headers=headers, json={"payment_id": "test_1"})
+    assert response.status_code == 500
+
+    db.expire_all()
+    order = db.get(Order, order_id)
+    assert order.status.value == "pending"
+    assert order.payment_status.value == "pending"
+    assert db.get(Product, product_id).stock_quantity == 0
+
+def test_insufficient_stock_is_not_replayed_after_a_restock(db, client, shopper):
+    headers = {**auth_headers(shopper), "Idempotency-Key": "checkout-1"}
+    product_id = _last_unit(db)
+    body = {
+        "items": [{"product_id": product_id, "quantity": 2}],
+        "shipping_address": "Street",
+        "billing_address": "Street",
+        "payment_method": "razorpay"
+    }
+
+    response = client.post("/api/orders/", headers=headers, json=body)
+    assert response.status_code == 400
+
+    db.get(Product, product_id).stock_quantity = 5
+    db.commit()
+
+    response = client.post("/api/orders/", headers=headers, json=body)
+    assert response.status_code == 200
+    assert "Idempotent-Replayed" not in response.headers
+
+    replayed = client.post("/api/orders/", headers=headers, json=body)
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json()["id"] == response.json()["id"]
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import BACKEND_DIR
+
+# Runs in a fresh interpreter: conftest imports the app, which would mask a registry only main.py fills
+ENQUEUE_WITHOUT_APP = """
+import sys
+from database import Base, SessionLocal, engine
+from models import OutboxEvent
+from outbox import enqueue_event
+
+assert "main" not in sys.modules
+Base.metadata.create_all(bind=engine)
+db = SessionLocal()
+enqueue_event(db, "order.paid", {"order_id": 1, "user_id": 1, "order_number": "ORD-1"}, "order", 1)
+db.commit()
+print(sorted(handler for (handler,) in db.query(OutboxEvent.handler)))
+"""
+
+def test_enqueue_event_without_the_app_writes_a_row_per_handler(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'outbox.db'}")
+    result = subprocess.run(
+        [sys.executable, "-c", ENQUEUE_WITHOUT_APP],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "['notify_order_paid']"
+
+def test_enqueue_event_rejects_an_event_nobody_handles(db):
+    from outbox import enqueue_event
+
+    with pytest.raises(ValueError):
+        enqueue_event(db, "order.teleported", {}, "order", 1)
@@ -0,0 +1,32 @@
+import pytest
+
+from models import Product
+
+@pytest.fixture
+def catalog(db):
+    db.add_all([
+        Product(name=f"Bar {i}", description="d", category=["snacks", "supplements"][i % 2],
+                price=100.0 * (i + 1), stock_quantity=i % 3, rating=float(i % 5),
+                protein_g=5.0 * i, carbs_g=10.0, fat_g=float(i), calories=100.0 + 10 * i)
+        for i in range(10)
+    ])
+    db.commit()
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"category": "snacks"},
+    {"search": "Bar 1"},
+    {"min_price": 300, "max_price": 700},
+    {"min_protein": 10, "max_protein": 30},
+    {"min_carbs": 5, "max_carbs": 10},
+    {"min_fat": 2, "max_fat": 6},
+    {"min_calories": 150, "max_calories": 180},
+    {"category": "supplements", "min_protein": 20, "max_price": 900},
+])
+def test_facets_count_the_same_products_as_the_list(client, catalog, params):
+    products = client.get("/api/products/", params=params)
+    facets = client.get("/api/products/facets", params=params)
+
+    assert products.status_code == 200
+    assert facets.status_code == 200
+    assert facets.json()["total"] == len(products.json())
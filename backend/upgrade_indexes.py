@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Index upgrade script for FitLife360
+This script creates indexes added to the models after a database was
+created, which create_all never adds to an existing table. Run it once
+after upgrading; indexes that already exist are skipped. On Postgres the
+indexes are built concurrently, so the tables stay writable meanwhile.
+If a concurrent build fails it leaves an invalid index behind; drop it
+and run the script again.
+"""
+
+import os
+import sys
+from sqlalchemy import text
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine
+from models import Notification, Order
+
+# Models whose indexes existing databases may be missing
+INDEXED_MODELS = [
+    Order,
+    Notification,
+]
+
+def _concurrently(connection, table_name: str) -> str:
+    """CONCURRENTLY where Postgres supports it, which excludes partitioned tables"""
+    if engine.dialect.name != "postgresql":
+        return ""
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table_name}
+    ).scalar()
+    return "" if relkind == "p" else "CONCURRENTLY "
+
+def upgrade_indexes():
+    """Create any missing model indexes"""
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for model in INDEXED_MODELS:
+            table = model.__table__
+            concurrently = _concurrently(connection, table.name)
+
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                unique = "UNIQUE " if index.unique else ""
+                columns = ", ".join(column.name for column in index.columns)
+                print(f"📋 Ensuring index {index.name}...")
+                connection.execute(text(
+                    f"CREATE {unique}INDEX {concurrently}IF NOT EXISTS {index.name} ON {table.name} ({columns})"
+                ))
+
+    print("✅ Indexes are up to date")
+
+if __name__ == "__main__":
+    upgrade_indexes()
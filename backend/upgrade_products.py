@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Products table upgrade script for FitLife360
+This script adds product columns and indexes introduced after a database
+was created, which create_all never adds to an existing table. Run it once
+after upgrading; columns and indexes that already exist are skipped.
+"""
+
+import os
+import sys
+from sqlalchemy import inspect, text
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database import engine
+
+# column -> SQL type
+PRODUCT_COLUMNS = {
+    "image_variants": "TEXT",
+    "sku": "VARCHAR(64)",
+}
+
+# index -> column; bulk imports upsert on products.sku, which needs it unique
+PRODUCT_UNIQUE_INDEXES = {
+    "ix_products_sku": "sku",
+}
+
+def upgrade_products():
+    """Add any missing product columns and unique indexes"""
+    existing = {column["name"] for column in inspect(engine).get_columns("products")}
+    added = 0
+
+    with engine.begin() as connection:
+        for column, column_type in PRODUCT_COLUMNS.items():
+            if column in existing:
+                continue
+
+            print(f"📋 Adding products.{column}...")
+            connection.execute(text(f"ALTER TABLE products ADD COLUMN {column} {column_type}"))
+            added += 1
+
+        for index, column in PRODUCT_UNIQUE_INDEXES.items():
+            print(f"📋 Ensuring unique index {index}...")
+            connection.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {index} ON products ({column})"))
+
+    print(f"✅ Products table is up to date ({added} columns added)")
+
+if __name__ == "__main__":
+    upgrade_products()
@@ -42,6 +42,7 @@ import {
   Star,
 } from '@mui/icons-material';
 import apiClient from '../../utils/axiosConfig';
+import { useNotificationStream } from '../../hooks/useNotificationStream';
 
 const Transition = React.forwardRef(function Transition(props, ref) {
   return <Slide direction="left" ref={ref} {...props} />;
@@ -61,6 +62,16 @@ const GlobalNotificationPanel = ({ open, onClose }) => {
     }
   }, [open]);
 
+  // New notifications are pushed over the shared server-sent event stream
+  useNotificationStream({
+    onNotification: (notification) => {
+      setNotifications((current) => (
+        current.some((item) => item.id === notification.id) ? current : [notification, ...current]
+      ));
+    },
+    onResync: () => fetchNotifications(),
+  });
+
   const fetchNotifications = async () => {
     try {
       setLoading(true);
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   IconButton,
   Badge,
@@ -25,21 +25,52 @@ import {
   Error,
 } from '@mui/icons-material';
 import apiClient from '../../utils/axiosConfig';
+import { useNotificationStream } from '../../hooks/useNotificationStream';
 
 const NotificationDropdown = () => {
   const [notifications, setNotifications] = useState([]);
+  const [unreadCount, setUnreadCount] = useState(0);
   const [loading, setLoading] = useState(true);
   const [anchorEl, setAnchorEl] = useState(null);
   const [open, setOpen] = useState(false);
+  // Ids already counted, since a reconnect may replay notifications we have seen
+  const seenIds = useRef(new Set());
 
+  // The badge only needs the count; the list is loaded when the dropdown opens.
+  // New notifications are pushed over a server-sent event stream instead of polled.
   useEffect(() => {
-    fetchNotifications();
+    fetchUnreadCount();
   }, []);
 
+  useNotificationStream({
+    onNotification: (notification) => {
+      if (seenIds.current.has(notification.id)) return;
+      seenIds.current.add(notification.id);
+      setUnreadCount((count) => count + 1);
+      setNotifications((current) => (
+        current.some((item) => item.id === notification.id) ? current : [notification, ...current]
+      ));
+    },
+    onResync: () => {
+      fetchUnreadCount();
+      setNotifications([]);
+    },
+  });
+
+  const fetchUnreadCount = async () => {
+    try {
+      const response = await apiClient.get('/api/notifications/unread-count');
+      setUnreadCount(response.data.unread_count);
+    } catch (err) {
+      console.error('Error fetching unread count:', err.response?.data);
+    }
+  };
+
   const fetchNotifications = async () => {
     try {
       setLoading(true);
       const response = await apiClient.get('/api/notifications');
+      response.data.forEach((notification) => seenIds.current.add(notification.id));
       setNotifications(response.data);
     } catch (err) {
       console.error('Error fetching notifications:', err.response?.data);
@@ -51,6 +82,8 @@ const NotificationDropdown = () => {
   const handleClick = (event) => {
     setAnchorEl(event.currentTarget);
     setOpen(true);
+    fetchNotifications();
+    fetchUnreadCount();
   };
 
   const handleClose = () => {
@@ -120,8 +153,6 @@ const NotificationDropdown = () => {
     }
   };
 
-  const unreadCount = notifications.filter(n => !n.is_read).length;
-
   return (
     <>
       <IconButton
@@ -36,6 +36,7 @@ import {
   Person,
 } from '@mui/icons-material';
 import apiClient from '../../utils/axiosConfig';
+import { useNotificationStream } from '../../hooks/useNotificationStream';
 
 const NotificationPanel = ({ onClose, showMarkAll = true }) => {
   const [notifications, setNotifications] = useState([]);
@@ -50,6 +51,16 @@ const NotificationPanel = ({ onClose, showMarkAll = true }) => {
     fetchNotifications();
   }, []);
 
+  // New notifications are pushed over the shared server-sent event stream
+  useNotificationStream({
+    onNotification: (notification) => {
+      setNotifications((current) => (
+        current.some((item) => item.id === notification.id) ? current : [notification, ...current]
+      ));
+    },
+    onResync: () => fetchNotifications(),
+  });
+
   const fetchNotifications = async () => {
     try {
       setLoading(true);
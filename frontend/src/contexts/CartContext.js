@@ -1,4 +1,5 @@
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useCallback } from 'react';
+import apiClient from '../utils/axiosConfig';
 
 const CartContext = createContext();
 
@@ -13,13 +14,36 @@ export const useCart = () => {
 export const CartProvider = ({ children }) => {
   const [cartItems, setCartItems] = useState([]);
 
+  // Refresh price and stock for every cart line in a single batch request
+  const refreshCart = useCallback(async (items) => {
+    if (!items.length) {
+      return;
+    }
+
+    try {
+      const ids = items.map(item => item.id).join(',');
+      const response = await apiClient.get(`/api/products/batch?ids=${ids}`);
+      const latest = new Map(response.data.products.map(product => [product.id, product]));
+
+      setCartItems(prevItems =>
+        prevItems
+          .filter(item => !response.data.missing_ids.includes(item.id))
+          .map(item => (latest.has(item.id) ? { ...item, ...latest.get(item.id), quantity: item.quantity } : item))
+      );
+    } catch (error) {
+      console.error('Error refreshing cart:', error);
+    }
+  }, []);
+
   // Load cart from localStorage on mount
   useEffect(() => {
     const savedCart = localStorage.getItem('cart');
     if (savedCart) {
-      setCartItems(JSON.parse(savedCart));
+      const items = JSON.parse(savedCart);
+      setCartItems(items);
+      refreshCart(items);
     }
-  }, []);
+  }, [refreshCart]);
 
   // Save cart to localStorage whenever it changes
   useEffect(() => {
@@ -79,6 +103,7 @@ export const CartProvider = ({ children }) => {
     clearCart,
     getCartTotal,
     getCartItemCount,
+    refreshCart: () => refreshCart(cartItems),
   };
 
   return (
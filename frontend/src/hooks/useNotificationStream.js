@@ -0,0 +1,48 @@
+import { useEffect, useRef } from 'react';
+import apiClient from '../utils/axiosConfig';
+
+// One EventSource shared by every mounted component, closed when the last one unmounts
+const listeners = new Set();
+let stream = null;
+
+const dispatch = (type, event) => {
+  const data = JSON.parse(event.data);
+  listeners.forEach((listener) => listener(type, data));
+};
+
+const openStream = () => {
+  const token = localStorage.getItem('token');
+  if (!token) return;
+
+  const baseURL = apiClient.defaults.baseURL.replace(/\/$/, '');
+  stream = new EventSource(`${baseURL}/api/notifications/stream?token=${encodeURIComponent(token)}`);
+  stream.addEventListener('notification', (event) => dispatch('notification', event));
+  // Sent when we missed too much while disconnected to replay it all
+  stream.addEventListener('resync', (event) => dispatch('resync', event));
+};
+
+export const useNotificationStream = ({ onNotification, onResync }) => {
+  const handlers = useRef({ onNotification, onResync });
+  handlers.current = { onNotification, onResync };
+
+  useEffect(() => {
+    const listener = (type, data) => {
+      if (type === 'notification') {
+        handlers.current.onNotification?.(data);
+      } else {
+        handlers.current.onResync?.();
+      }
+    };
+
+    listeners.add(listener);
+    if (!stream) openStream();
+
+    return () => {
+      listeners.delete(listener);
+      if (listeners.size === 0 && stream) {
+        stream.close();
+        stream = null;
+      }
+    };
+  }, []);
+};
@@ -41,10 +41,13 @@ import apiClient from '../../utils/axiosConfig';
 
 const AdminNotifications = () => {
   const [notifications, setNotifications] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [filters, setFilters] = useState({ type: '', is_read: '', user_id: '' });
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [openDialog, setOpenDialog] = useState(false);
+  const [broadcastJob, setBroadcastJob] = useState(null);
   const [notificationForm, setNotificationForm] = useState({
     title: '',
     message: '',
@@ -55,15 +58,45 @@ const AdminNotifications = () => {
   });
 
   useEffect(() => {
-    fetchNotifications();
     fetchUsers();
   }, []);
 
-  const fetchNotifications = async () => {
+  useEffect(() => {
+    fetchNotifications();
+  }, [filters]);
+
+  // Follow a queued broadcast until the server has written every notification
+  useEffect(() => {
+    if (!broadcastJob || ['completed', 'failed'].includes(broadcastJob.status)) {
+      return undefined;
+    }
+
+    const timer = setTimeout(async () => {
+      try {
+        const response = await apiClient.get(`/api/notifications/broadcast/${broadcastJob.id}`);
+        setBroadcastJob(response.data);
+        if (response.data.status === 'completed') {
+          fetchNotifications();
+        }
+      } catch (err) {
+        console.error('Error fetching broadcast progress:', err.response?.data);
+        setBroadcastJob(null);
+      }
+    }, 2000);
+
+    return () => clearTimeout(timer);
+  }, [broadcastJob]);
+
+  const fetchNotifications = async (cursor = null) => {
     try {
       setLoading(true);
-      const response = await apiClient.get('/api/notifications/admin/all');
-      setNotifications(response.data);
+      const params = Object.fromEntries(Object.entries(filters).filter(([, value]) => value !== ''));
+      if (cursor) {
+        params.cursor = cursor;
+      }
+      const response = await apiClient.get('/api/notifications/admin/all', { params });
+      setNotifications(prevNotifications => (cursor ? [...prevNotifications, ...response.data] : response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (err) {
       console.error('Error fetching notifications:', err.response?.data);
       const errorMessage = err.response?.data?.detail || 
@@ -99,14 +132,15 @@ const AdminNotifications = () => {
           send_sms: notificationForm.send_sms
         });
       } else {
-        // Broadcast to all users
-        await apiClient.post('/api/notifications/broadcast', {
+        // Broadcast to all users; the server queues it and we poll its progress
+        const response = await apiClient.post('/api/notifications/broadcast', {
           title: notificationForm.title,
           message: notificationForm.message,
           notification_type: notificationForm.type,
           send_email: notificationForm.send_email,
           send_sms: notificationForm.send_sms
         });
+        setBroadcastJob({ id: response.data.job_id, status: 'pending', sent_count: 0 });
       }
 
       setOpenDialog(false);
@@ -191,6 +225,20 @@ const AdminNotifications = () => {
         </Alert>
       )}
 
+      {broadcastJob && (
+        <Alert
+          severity={broadcastJob.status === 'failed' ? 'error' : broadcastJob.status === 'completed' ? 'success' : 'info'}
+          sx={{ mb: 2 }}
+          onClose={() => setBroadcastJob(null)}
+        >
+          {broadcastJob.status === 'failed'
+            ? `Broadcast failed after ${broadcastJob.sent_count} notifications: ${broadcastJob.error}`
+            : broadcastJob.status === 'completed'
+              ? `Broadcast sent to ${broadcastJob.sent_count} users`
+              : `Broadcasting... ${broadcastJob.sent_count}${broadcastJob.total_recipients != null ? ` / ${broadcastJob.total_recipients}` : ''} users`}
+        </Alert>
+      )}
+
       {/* Send Notification Button */}
       <Box sx={{ mb: 3 }}>
         <Button
@@ -214,8 +262,53 @@ const AdminNotifications = () => {
       <Card>
         <CardContent>
           <Typography variant="h6" gutterBottom>
-            All Notifications ({notifications.length})
+            All Notifications ({notifications.length}{nextCursor ? '+' : ''})
           </Typography>
+          <Box sx={{ display: 'flex', gap: 2, mb: 2 }}>
+            <FormControl size="small" sx={{ minWidth: 160 }}>
+              <InputLabel>Type</InputLabel>
+              <Select
+                value={filters.type}
+                label="Type"
+                onChange={(e) => setFilters({ ...filters, type: e.target.value })}
+              >
+                <MenuItem value="">All</MenuItem>
+                <MenuItem value="general">General</MenuItem>
+                <MenuItem value="consultation">Consultation</MenuItem>
+                <MenuItem value="order">Order</MenuItem>
+                <MenuItem value="reminder">Reminder</MenuItem>
+                <MenuItem value="promotion">Promotion</MenuItem>
+                <MenuItem value="system">System</MenuItem>
+              </Select>
+            </FormControl>
+            <FormControl size="small" sx={{ minWidth: 160 }}>
+              <InputLabel>Status</InputLabel>
+              <Select
+                value={filters.is_read}
+                label="Status"
+                onChange={(e) => setFilters({ ...filters, is_read: e.target.value })}
+              >
+                <MenuItem value="">All</MenuItem>
+                <MenuItem value="false">Unread</MenuItem>
+                <MenuItem value="true">Read</MenuItem>
+              </Select>
+            </FormControl>
+            <FormControl size="small" sx={{ minWidth: 200 }}>
+              <InputLabel>User</InputLabel>
+              <Select
+                value={filters.user_id}
+                label="User"
+                onChange={(e) => setFilters({ ...filters, user_id: e.target.value })}
+              >
+                <MenuItem value="">All</MenuItem>
+                {users.map((user) => (
+                  <MenuItem key={user.id} value={user.id}>
+                    {user.first_name} {user.last_name} ({user.username})
+                  </MenuItem>
+                ))}
+              </Select>
+            </FormControl>
+          </Box>
           <TableContainer component={Paper}>
             <Table>
               <TableHead>
@@ -298,6 +391,13 @@ const AdminNotifications = () => {
               </TableBody>
             </Table>
           </TableContainer>
+          {nextCursor && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+              <Button variant="outlined" onClick={() => fetchNotifications(nextCursor)} disabled={loading}>
+                Load More
+              </Button>
+            </Box>
+          )}
         </CardContent>
       </Card>
 
@@ -19,6 +19,7 @@ import {
   Select,
   MenuItem,
   Box,
+  Checkbox,
 } from '@mui/material';
 import { LocalShipping, Update } from '@mui/icons-material';
 import apiClient from '../../utils/axiosConfig';
@@ -29,7 +30,10 @@ const AdminOrders = () => {
   const { user, token } = useAuth();
   const navigate = useNavigate();
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [selectedIds, setSelectedIds] = useState([]);
+  const [bulkStatus, setBulkStatus] = useState('shipped');
 
   useEffect(() => {
     if (user && token && user.role === 'ADMIN') {
@@ -41,10 +45,13 @@ const AdminOrders = () => {
     }
   }, [user, token, navigate]);
 
-  const fetchOrders = async () => {
+  const fetchOrders = async (cursor = null) => {
     try {
-      const response = await apiClient.get('/api/admin/orders');
-      setOrders(response.data);
+      const response = await apiClient.get('/api/admin/orders', {
+        params: cursor ? { cursor } : {},
+      });
+      setOrders(prevOrders => (cursor ? [...prevOrders, ...response.data] : response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Error fetching orders:', error);
       if (error.response?.status === 401 || error.response?.status === 403) {
@@ -65,6 +72,35 @@ const AdminOrders = () => {
     }
   };
 
+  const toggleSelected = (orderId) => {
+    setSelectedIds(prevIds => (
+      prevIds.includes(orderId)
+        ? prevIds.filter(id => id !== orderId)
+        : [...prevIds, orderId]
+    ));
+  };
+
+  const toggleAllSelected = () => {
+    setSelectedIds(selectedIds.length === orders.length ? [] : orders.map(order => order.id));
+  };
+
+  const handleBulkStatusUpdate = async () => {
+    try {
+      const response = await apiClient.post('/api/orders/bulk-status', {
+        status: bulkStatus,
+        order_ids: selectedIds,
+      });
+      const { updated, skipped_ids: skippedIds } = response.data;
+      if (skippedIds.length > 0) {
+        alert(`${updated} order(s) updated, ${skippedIds.length} skipped because they can't move to ${bulkStatus}`);
+      }
+      setSelectedIds([]);
+      fetchOrders();
+    } catch (error) {
+      console.error('Error updating order statuses:', error);
+    }
+  };
+
   const getStatusColor = (status) => {
     switch (status) {
       case 'pending': return 'warning';
@@ -107,10 +143,40 @@ const AdminOrders = () => {
 
       <Card>
         <CardContent>
+          {selectedIds.length > 0 && (
+            <Box sx={{ display: 'flex', alignItems: 'center', gap: 2, mb: 2 }}>
+              <Typography variant="body2">
+                {selectedIds.length} selected
+              </Typography>
+              <FormControl size="small" sx={{ minWidth: 140 }}>
+                <InputLabel>Move to</InputLabel>
+                <Select
+                  value={bulkStatus}
+                  label="Move to"
+                  onChange={(e) => setBulkStatus(e.target.value)}
+                >
+                  <MenuItem value="confirmed">Confirmed</MenuItem>
+                  <MenuItem value="shipped">Shipped</MenuItem>
+                  <MenuItem value="delivered">Delivered</MenuItem>
+                  <MenuItem value="cancelled">Cancelled</MenuItem>
+                </Select>
+              </FormControl>
+              <Button variant="contained" startIcon={<Update />} onClick={handleBulkStatusUpdate}>
+                Apply
+              </Button>
+            </Box>
+          )}
           <TableContainer>
             <Table>
               <TableHead>
                 <TableRow>
+                  <TableCell padding="checkbox">
+                    <Checkbox
+                      checked={orders.length > 0 && selectedIds.length === orders.length}
+                      indeterminate={selectedIds.length > 0 && selectedIds.length < orders.length}
+                      onChange={toggleAllSelected}
+                    />
+                  </TableCell>
                   <TableCell>Order #</TableCell>
                   <TableCell>Customer</TableCell>
                   <TableCell>Date</TableCell>
@@ -124,6 +190,12 @@ const AdminOrders = () => {
               <TableBody>
                 {orders.map((order) => (
                   <TableRow key={order.id}>
+                    <TableCell padding="checkbox">
+                      <Checkbox
+                        checked={selectedIds.includes(order.id)}
+                        onChange={() => toggleSelected(order.id)}
+                      />
+                    </TableCell>
                     <TableCell>
                       <Typography variant="body2" fontWeight="bold">
                         {order.order_number}
@@ -187,6 +259,13 @@ const AdminOrders = () => {
               </TableBody>
             </Table>
           </TableContainer>
+          {nextCursor && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+              <Button variant="outlined" onClick={() => fetchOrders(nextCursor)}>
+                Load More
+              </Button>
+            </Box>
+          )}
         </CardContent>
       </Card>
     </Container>
@@ -36,6 +36,8 @@ const AdminReports = () => {
     consultations: [],
     products: []
   });
+  // Order lists are paged, so the report's order count comes from the dashboard totals
+  const [totalOrders, setTotalOrders] = useState(0);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [reportType, setReportType] = useState('all');
@@ -48,11 +50,12 @@ const AdminReports = () => {
   const fetchReports = async () => {
     try {
       setLoading(true);
-      const [usersRes, ordersRes, consultationsRes, productsRes] = await Promise.all([
+      const [usersRes, ordersRes, consultationsRes, productsRes, dashboardRes] = await Promise.all([
         axios.get('/api/admin/users'),
-        axios.get('/api/admin/orders'),
+        axios.get('/api/admin/orders', { params: { limit: 10 } }),
         axios.get('/api/admin/consultations'),
-        axios.get('/api/admin/products')
+        axios.get('/api/admin/products'),
+        axios.get('/api/admin/dashboard')
       ]);
 
       setReports({
@@ -61,6 +64,7 @@ const AdminReports = () => {
         consultations: consultationsRes.data,
         products: productsRes.data
       });
+      setTotalOrders(dashboardRes.data.orders.total);
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to fetch reports');
     } finally {
@@ -68,22 +72,24 @@ const AdminReports = () => {
     }
   };
 
-  const exportToCSV = (data, filename) => {
-    if (!data || data.length === 0) return;
-
-    const headers = Object.keys(data[0]);
-    const csvContent = [
-      headers.join(','),
-      ...data.map(row => headers.map(header => row[header] || '').join(','))
-    ].join('\n');
+  const downloadExport = async (entity) => {
+    try {
+      // The server streams the file, so exports aren't limited to what's loaded here
+      const dateFrom = new Date(Date.now() - Number(dateRange) * 24 * 60 * 60 * 1000);
+      const response = await axios.get(`/api/admin/export/${entity}`, {
+        params: { format: 'csv', date_from: dateFrom.toISOString() },
+        responseType: 'blob'
+      });
 
-    const blob = new Blob([csvContent], { type: 'text/csv' });
-    const url = window.URL.createObjectURL(blob);
-    const link = document.createElement('a');
-    link.href = url;
-    link.download = `${filename}.csv`;
-    link.click();
-    window.URL.revokeObjectURL(url);
+      const url = window.URL.createObjectURL(response.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `${entity}_report.csv`;
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (err) {
+      setError('Failed to export report');
+    }
   };
 
   const getStatusColor = (status) => {
@@ -165,12 +171,12 @@ const AdminReports = () => {
                 startIcon={<Download />}
                 onClick={() => {
                   if (reportType === 'all') {
-                    exportToCSV(reports.users, 'users_report');
-                    exportToCSV(reports.orders, 'orders_report');
-                    exportToCSV(reports.consultations, 'consultations_report');
-                    exportToCSV(reports.products, 'products_report');
+                    downloadExport('users');
+                    downloadExport('orders');
+                    downloadExport('consultations');
+                    downloadExport('products');
                   } else {
-                    exportToCSV(reports[reportType], `${reportType}_report`);
+                    downloadExport(reportType);
                   }
                 }}
                 fullWidth
@@ -194,7 +200,7 @@ const AdminReports = () => {
               <Button
                 size="small"
                 startIcon={<Download />}
-                onClick={() => exportToCSV(reports.users, 'users_report')}
+                onClick={() => downloadExport('users')}
               >
                 Export
               </Button>
@@ -246,12 +252,12 @@ const AdminReports = () => {
             <Box display="flex" justifyContent="space-between" alignItems="center" mb={2}>
               <Typography variant="h6">
                 <Assessment sx={{ mr: 1, verticalAlign: 'middle' }} />
-                Orders Report ({reports.orders.length})
+                Orders Report ({totalOrders})
               </Typography>
               <Button
                 size="small"
                 startIcon={<Download />}
-                onClick={() => exportToCSV(reports.orders, 'orders_report')}
+                onClick={() => downloadExport('orders')}
               >
                 Export
               </Button>
@@ -312,7 +318,7 @@ const AdminReports = () => {
               <Button
                 size="small"
                 startIcon={<Download />}
-                onClick={() => exportToCSV(reports.consultations, 'consultations_report')}
+                onClick={() => downloadExport('consultations')}
               >
                 Export
               </Button>
@@ -373,7 +379,7 @@ const AdminReports = () => {
               <Button
                 size="small"
                 startIcon={<Download />}
-                onClick={() => exportToCSV(reports.products, 'products_report')}
+                onClick={() => downloadExport('products')}
               >
                 Export
               </Button>
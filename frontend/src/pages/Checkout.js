@@ -23,7 +23,7 @@ import apiClient from '../utils/axiosConfig';
 
 const Checkout = () => {
   const navigate = useNavigate();
-  const { cartItems, getCartTotal, clearCart } = useCart();
+  const { cartItems, getCartTotal, clearCart, refreshCart } = useCart();
   const { user, token } = useAuth();
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
@@ -42,6 +42,12 @@ const Checkout = () => {
     }
   }, [user, token, navigate]);
 
+  // Pick up current prices and stock before the user places the order
+  useEffect(() => {
+    refreshCart();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
   // Load Razorpay configuration
   useEffect(() => {
     const loadRazorpayConfig = async () => {
@@ -103,10 +109,16 @@ const Checkout = () => {
               signature: response.razorpay_signature,
             });
 
-            // Process payment for the order
-            await apiClient.post(`/api/orders/${order.id}/payment`, {
-              payment_id: response.razorpay_payment_id,
-            });
+            // With webhooks on, the server confirms the order once Razorpay
+            // reports the capture, so there's no gateway round trip here
+            if (!razorpayConfig.webhooks_enabled) {
+              // The payment id doubles as the idempotency key, so a retried call is replayed
+              await apiClient.post(`/api/orders/${order.id}/payment`, {
+                payment_id: response.razorpay_payment_id,
+              }, {
+                headers: { 'Idempotency-Key': response.razorpay_payment_id },
+              });
+            }
 
             // Clear cart and redirect
             clearCart();
@@ -26,6 +26,7 @@ const Orders = () => {
   const navigate = useNavigate();
   const { user, token } = useAuth();
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -38,10 +39,13 @@ const Orders = () => {
     }
   }, [user, token, navigate]);
 
-  const fetchOrders = async () => {
+  const fetchOrders = async (cursor = null) => {
     try {
-      const response = await apiClient.get('/api/orders');
-      setOrders(response.data);
+      const response = await apiClient.get('/api/orders', {
+        params: cursor ? { cursor } : {},
+      });
+      setOrders(prevOrders => (cursor ? [...prevOrders, ...response.data] : response.data));
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Error fetching orders:', error);
       if (error.response?.status === 401 || error.response?.status === 403) {
@@ -179,6 +183,13 @@ const Orders = () => {
           </Table>
         </TableContainer>
       )}
+      {nextCursor && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button variant="outlined" onClick={() => fetchOrders(nextCursor)}>
+            Load More
+          </Button>
+        </Box>
+      )}
     </Container>
   );
 };
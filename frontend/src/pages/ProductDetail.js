@@ -26,6 +26,7 @@ const ProductDetail = () => {
   const { addToCart } = useCart();
   const [product, setProduct] = useState(null);
   const [reviews, setReviews] = useState([]);
+  const [boughtTogether, setBoughtTogether] = useState([]);
   const [loading, setLoading] = useState(true);
   const [quantity, setQuantity] = useState(1);
   const [reviewData, setReviewData] = useState({
@@ -39,6 +40,7 @@ const ProductDetail = () => {
   useEffect(() => {
     fetchProduct();
     fetchReviews();
+    fetchBoughtTogether();
   }, [id]);
 
   const fetchProduct = async () => {
@@ -61,6 +63,15 @@ const ProductDetail = () => {
     }
   };
 
+  const fetchBoughtTogether = async () => {
+    try {
+      const response = await apiClient.get(`/api/products/${id}/bought-together?limit=4`);
+      setBoughtTogether(response.data);
+    } catch (error) {
+      console.error('Error fetching recommendations:', error);
+    }
+  };
+
   const handleAddToCart = () => {
     addToCart(product, quantity);
     setMessage('Product added to cart!');
@@ -227,6 +238,43 @@ const ProductDetail = () => {
           </Card>
         </Grid>
 
+        {/* Frequently Bought Together */}
+        {boughtTogether.length > 0 && (
+          <Grid item xs={12}>
+            <Card>
+              <CardContent>
+                <Typography variant="h6" gutterBottom>
+                  Frequently Bought Together
+                </Typography>
+                <Grid container spacing={2}>
+                  {boughtTogether.map((related) => (
+                    <Grid item xs={6} md={3} key={related.id}>
+                      <Box
+                        sx={{ cursor: 'pointer' }}
+                        onClick={() => navigate(`/products/${related.id}`)}
+                      >
+                        {related.image_url && (
+                          <Box
+                            component="img"
+                            src={related.image_url}
+                            alt={related.name}
+                            loading="lazy"
+                            sx={{ width: '100%', height: 140, objectFit: 'cover', borderRadius: 1, mb: 1 }}
+                          />
+                        )}
+                        <Typography variant="subtitle2">{related.name}</Typography>
+                        <Typography variant="body2" color="primary">
+                          ${related.price}
+                        </Typography>
+                      </Box>
+                    </Grid>
+                  ))}
+                </Grid>
+              </CardContent>
+            </Card>
+          </Grid>
+        )}
+
         {/* Reviews Section */}
         <Grid item xs={12}>
           <Card>